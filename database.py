@@ -1,19 +1,86 @@
 """
 Модуль для работы с базой данных SQLite
 """
+import json
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import zlib
+from datetime import datetime, date, timedelta
+from itertools import islice
+from typing import List, Dict, Optional, Tuple, Callable, Iterable, Iterator
 from decimal import Decimal
+from utils.maintenance_rules import RULE_CALENDAR, RuleResolver, validate_rule
+from utils.depreciation import (METHODS, METHOD_STRAIGHT_LINE, DEFAULT_DECLINING_FACTOR,
+                                DepreciationEngine, current_period)
+from utils.report_cache import ReportCache
+from utils.pivot import PivotQuery
+from utils.tco import TcoReport
+
+
+# Интервалы ТО по категориям оборудования, дней.
+# Заполняют таблицу maintenance_rules при ее создании
+MAINTENANCE_INTERVALS = {
+    'Компьютерная техника': 180,
+    'Офисная мебель': 365,
+    'Оргтехника': 90,
+    'Производственное оборудование': 30,
+    'Транспорт': 60
+}
+
+# Таблицы, версии которых учитывает кэш отчетов (увеличиваются триггерами при записи)
+VERSIONED_TABLES = ('equipment', 'maintenance', 'assignments',
+                    'depreciation_rules', 'depreciation_periods')
+
+# Сроки полезного использования по категориям оборудования, месяцев.
+# Заполняют таблицу depreciation_rules при ее создании (линейный способ)
+USEFUL_LIFE_MONTHS = {
+    'Компьютерная техника': 36,
+    'Офисная мебель': 84,
+    'Оргтехника': 60,
+    'Производственное оборудование': 120,
+    'Транспорт': 60
+}
 
 
 class Database:
     """Класс для работы с базой данных оборудования"""
     
-    def __init__(self, db_path: str = "equipment.db"):
+    # Строк, читаемых из курсора за раз в потоковых методах iter_*
+    ITER_BATCH_SIZE = 5000
+    
+    # Результаты отчетов не больше этого числа строк сохраняются в таблице report_cache
+    PERSIST_MAX_ROWS = 20_000
+    
+    # Строк на странице постраничных отчетов
+    REPORT_PAGE_SIZE = 500
+    
+    # Записей в одной вставке при импорте оборудования
+    IMPORT_CHUNK_SIZE = 5000
+    
+    def __init__(self, db_path: str = "equipment.db", persist_reports: bool = False):
         self.db_path = db_path
+        self._change_listeners = []
+        self.report_cache = ReportCache()
+        # Сохранять небольшие отчеты в базе данных, чтобы они переживали перезапуск
+        self.persist_reports = persist_reports
         self.init_database()
     
+    # Уведомления об изменениях данных
+    def add_change_listener(self, callback: Callable[[str, str, Optional[int]], None]):
+        """Подписаться на изменения: callback(таблица, действие, id записи).
+        Действие - 'insert', 'update' или 'delete'; id None означает массовое изменение
+        """
+        self._change_listeners.append(callback)
+    
+    def remove_change_listener(self, callback: Callable[[str, str, Optional[int]], None]):
+        """Отписаться от изменений данных"""
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+    
+    def _notify(self, table: str, action: str, record_id: Optional[int]):
+        """Оповестить подписчиков об изменении данных"""
+        for callback in list(self._change_listeners):
+            callback(table, action, record_id)
+    
     def get_connection(self):
         """Получить соединение с базой данных"""
         try:
@@ -25,6 +92,22 @@ class Database:
         except sqlite3.Error as e:
             raise ConnectionError(f"Ошибка подключения к базе данных: {e}")
     
+    def _iter_query(self, query: str, params=()) -> Iterator[sqlite3.Row]:
+        """Записи запроса по мере чтения из курсора (блоками ITER_BATCH_SIZE строк).
+        Соединение закрывается после чтения всех записей или закрытия итератора,
+        поэтому итератор нужно читать в том же потоке, в котором он создан
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.ITER_BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+    
     def init_database(self):
         """Инициализация базы данных и создание таблиц"""
         conn = self.get_connection()
@@ -69,6 +152,14 @@ class Database:
             ON maintenance(equipment_id)
         """)
         
+        # Составной индекс для поиска последнего ТО каждого оборудования без сортировки;
+        # тип ТО входит в индекс, чтобы не читать строки таблицы
+        cursor.execute("DROP INDEX IF EXISTS idx_maintenance_equipment_date")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_maintenance_equipment_date_type 
+            ON maintenance(equipment_id, maintenance_date, type)
+        """)
+        
         # Таблица назначений/перемещений
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS assignments (
@@ -88,6 +179,448 @@ class Database:
             ON assignments(equipment_id)
         """)
         
+        # Правила интервалов ТО: для категории или для конкретного оборудования.
+        # rule_type: calendar - интервал в днях, usage - по наработке
+        # (ресурс usage_limit при средней наработке daily_usage в день),
+        # seasonal - интервал на период season_start..season_end ("ММ-ДД")
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'maintenance_rules'
+        """)
+        rules_exist = cursor.fetchone() is not None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT,
+                equipment_id INTEGER,
+                rule_type TEXT NOT NULL DEFAULT 'calendar',
+                interval_days INTEGER,
+                usage_limit REAL,
+                daily_usage REAL,
+                season_start TEXT,
+                season_end TEXT,
+                FOREIGN KEY (equipment_id) REFERENCES equipment(id) ON DELETE CASCADE,
+                CHECK ((category IS NULL) != (equipment_id IS NULL))
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_maintenance_rules_category 
+            ON maintenance_rules(category)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_maintenance_rules_equipment 
+            ON maintenance_rules(equipment_id)
+        """)
+        
+        # План ТО: распределение предстоящего обслуживания по дням и бригадам
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS planned_maintenance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                equipment_id INTEGER NOT NULL,
+                planned_date DATE NOT NULL,
+                due_date DATE NOT NULL,
+                team TEXT,
+                FOREIGN KEY (equipment_id) REFERENCES equipment(id) ON DELETE CASCADE
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_planned_maintenance_date 
+            ON planned_maintenance(planned_date)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_planned_maintenance_equipment 
+            ON planned_maintenance(equipment_id)
+        """)
+        
+        # Предрассчитанный список предстоящего ТО (заполняется фоновым заданием)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_due (
+                equipment_id INTEGER PRIMARY KEY,
+                last_date DATE,
+                last_type TEXT,
+                interval_days INTEGER NOT NULL,
+                days_since INTEGER NOT NULL,
+                next_date DATE NOT NULL,
+                status TEXT NOT NULL,
+                FOREIGN KEY (equipment_id) REFERENCES equipment(id) ON DELETE CASCADE
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_maintenance_due_next_date
+            ON maintenance_due(next_date)
+        """)
+        
+        # Параметры и время последнего расчета. data_version увеличивается триггерами
+        # при изменении правил интервалов (в том числе другим процессом) и требует
+        # полного пересчета, computed_version - версия, по которой выполнен расчет
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_due_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                data_version INTEGER NOT NULL DEFAULT 0,
+                computed_version INTEGER,
+                computed_at TIMESTAMP,
+                as_of DATE,
+                days_ahead INTEGER,
+                default_interval INTEGER
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO maintenance_due_state (id) VALUES (1)")
+        
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_maintenance_rules_{event.lower()}_data_version
+                AFTER {event} ON maintenance_rules
+                BEGIN
+                    UPDATE maintenance_due_state SET data_version = data_version + 1 WHERE id = 1;
+                END
+            """)
+        
+        # Очередь оборудования, срок ТО которого нужно пересчитать после изменения
+        # его обслуживания, категории или даты покупки. Повторное изменение переносит
+        # запись в конец очереди (новый id), поэтому обработанную часть очереди
+        # можно удалить по id, не потеряв изменения, сделанные во время пересчета
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_due_dirty (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                equipment_id INTEGER NOT NULL UNIQUE
+            )
+        """)
+        
+        for table, event in (('equipment', 'INSERT'), ('equipment', 'UPDATE'),
+                             ('equipment', 'DELETE'), ('maintenance', 'INSERT'),
+                             ('maintenance', 'UPDATE'), ('maintenance', 'DELETE')):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{event.lower()}_data_version")
+        
+        for name, event, equipment_ids in (
+                ('equipment_insert', 'INSERT ON equipment', 'SELECT NEW.id'),
+                ('equipment_update', 'UPDATE OF category, purchase_date ON equipment',
+                 'SELECT NEW.id'),
+                ('maintenance_insert', 'INSERT ON maintenance', 'SELECT NEW.equipment_id'),
+                ('maintenance_update', 'UPDATE ON maintenance',
+                 'SELECT OLD.equipment_id UNION SELECT NEW.equipment_id'),
+                ('maintenance_delete', 'DELETE ON maintenance', 'SELECT OLD.equipment_id')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{name}_due_dirty
+                AFTER {event}
+                BEGIN
+                    INSERT OR REPLACE INTO maintenance_due_dirty (equipment_id) {equipment_ids};
+                END
+            """)
+        
+        # Количество и стоимость ТО по дням и категориям для календаря нагрузки.
+        # Поддерживается триггерами; category '' - оборудование без категории
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'maintenance_daily'
+        """)
+        daily_exist = cursor.fetchone() is not None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_daily (
+                day DATE NOT NULL,
+                category TEXT NOT NULL,
+                maintenance_count INTEGER NOT NULL,
+                total_cost REAL NOT NULL,
+                PRIMARY KEY (day, category)
+            ) WITHOUT ROWID
+        """)
+        
+        def add_to_daily(select: str) -> str:
+            return f"""
+                    INSERT INTO maintenance_daily (day, category, maintenance_count, total_cost)
+                    {select}
+                    ON CONFLICT(day, category) DO UPDATE SET
+                        maintenance_count = maintenance_count + excluded.maintenance_count,
+                        total_cost = total_cost + excluded.total_cost;"""
+        
+        def category_of(equipment_id: str) -> str:
+            return f"COALESCE((SELECT category FROM equipment WHERE id = {equipment_id}), '')"
+        
+        def remove_empty(day: str, equipment_id: str) -> str:
+            return f"""
+                    DELETE FROM maintenance_daily
+                    WHERE day = {day} AND category = {category_of(equipment_id)}
+                      AND maintenance_count <= 0;"""
+        
+        new_row = add_to_daily(
+            f"SELECT NEW.maintenance_date, {category_of('NEW.equipment_id')}, "
+            f"1, COALESCE(CAST(NEW.cost AS DECIMAL), 0) WHERE true"
+        )
+        old_row = add_to_daily(
+            f"SELECT OLD.maintenance_date, {category_of('OLD.equipment_id')}, "
+            f"-1, -COALESCE(CAST(OLD.cost AS DECIMAL), 0) WHERE true"
+        ) + remove_empty('OLD.maintenance_date', 'OLD.equipment_id')
+        
+        def move_equipment(category: str, sign: str) -> str:
+            return add_to_daily(
+                f"SELECT maintenance_date, COALESCE({category}, ''), {sign}COUNT(*), "
+                f"{sign}COALESCE(SUM(CAST(cost AS DECIMAL)), 0) "
+                f"FROM maintenance WHERE equipment_id = NEW.id GROUP BY maintenance_date"
+            )
+        
+        for name, event, body in (
+                ('maintenance_insert', 'INSERT ON maintenance', new_row),
+                ('maintenance_delete', 'DELETE ON maintenance', old_row),
+                ('maintenance_update',
+                 'UPDATE OF maintenance_date, cost, equipment_id ON maintenance',
+                 old_row + new_row),
+                ('equipment_category', 'UPDATE OF category ON equipment '
+                                       'WHEN OLD.category IS NOT NEW.category',
+                 move_equipment('OLD.category', '-') + move_equipment('NEW.category', '')
+                 + """
+                    DELETE FROM maintenance_daily
+                    WHERE category = COALESCE(OLD.category, '') AND maintenance_count <= 0;""")):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{name}_daily
+                AFTER {event}
+                BEGIN{body}
+                END
+            """)
+        
+        if not daily_exist:
+            cursor.execute("""
+                INSERT INTO maintenance_daily (day, category, maintenance_count, total_cost)
+                SELECT m.maintenance_date, COALESCE(e.category, ''), COUNT(*),
+                       COALESCE(SUM(CAST(m.cost AS DECIMAL)), 0)
+                FROM maintenance m
+                JOIN equipment e ON e.id = m.equipment_id
+                GROUP BY m.maintenance_date, COALESCE(e.category, '')
+            """)
+        
+        # Индекс по дате ТО со стоимостью: выборки и итоги за период без чтения таблицы
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_maintenance_date_cost
+            ON maintenance(maintenance_date, cost)
+        """)
+        
+        # Месячные итоги ТО по категориям и типам для отчетов по стоимости.
+        # Триггеры отмечают затронутые месяцы в maintenance_monthly_dirty,
+        # итоги этих месяцев пересчитываются перед чтением (refresh_maintenance_monthly):
+        # минимум и максимум нельзя уменьшить при удалении записи без пересчета
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'maintenance_monthly'
+        """)
+        monthly_exist = cursor.fetchone() is not None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_monthly (
+                month TEXT NOT NULL,
+                category TEXT NOT NULL,
+                type TEXT NOT NULL,
+                maintenance_count INTEGER NOT NULL,
+                cost_count INTEGER NOT NULL,
+                total_cost REAL NOT NULL,
+                min_cost REAL,
+                max_cost REAL,
+                PRIMARY KEY (month, category, type)
+            ) WITHOUT ROWID
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_monthly_dirty (
+                month TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        """)
+        
+        for name, event, months in (
+                ('maintenance_insert', 'INSERT ON maintenance',
+                 'SELECT substr(NEW.maintenance_date, 1, 7)'),
+                ('maintenance_update', 'UPDATE OF maintenance_date, cost, type, equipment_id '
+                                       'ON maintenance',
+                 'SELECT substr(OLD.maintenance_date, 1, 7) '
+                 'UNION SELECT substr(NEW.maintenance_date, 1, 7)'),
+                ('maintenance_delete', 'DELETE ON maintenance',
+                 'SELECT substr(OLD.maintenance_date, 1, 7)'),
+                ('equipment_category', 'UPDATE OF category ON equipment '
+                                       'WHEN OLD.category IS NOT NEW.category',
+                 'SELECT DISTINCT substr(maintenance_date, 1, 7) FROM maintenance '
+                 'WHERE equipment_id = NEW.id')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{name}_monthly
+                AFTER {event}
+                BEGIN
+                    INSERT OR IGNORE INTO maintenance_monthly_dirty (month) {months};
+                END
+            """)
+        
+        if not monthly_exist:
+            cursor.execute("""
+                INSERT OR IGNORE INTO maintenance_monthly_dirty (month)
+                SELECT DISTINCT substr(maintenance_date, 1, 7) FROM maintenance
+            """)
+        
+        # Правила амортизации по категориям и закрытые периоды амортизации:
+        # расчет закрытого периода сохраняется и больше не пересчитывается
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'depreciation_rules'
+        """)
+        depreciation_rules_exist = cursor.fetchone() is not None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS depreciation_rules (
+                category TEXT PRIMARY KEY,
+                method TEXT NOT NULL DEFAULT 'straight_line',
+                useful_life_months INTEGER NOT NULL,
+                salvage_rate REAL NOT NULL DEFAULT 0,
+                declining_factor REAL NOT NULL DEFAULT 2,
+                CHECK (useful_life_months > 0)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS depreciation_periods (
+                period TEXT PRIMARY KEY,
+                closed_at TEXT NOT NULL,
+                equipment_count INTEGER NOT NULL,
+                purchase_price REAL NOT NULL,
+                accumulated_depreciation REAL NOT NULL,
+                book_value REAL NOT NULL,
+                monthly_depreciation REAL NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS depreciation_snapshots (
+                period TEXT NOT NULL,
+                equipment_id INTEGER NOT NULL,
+                inventory_number TEXT NOT NULL,
+                name TEXT,
+                category TEXT,
+                purchase_date DATE,
+                purchase_price REAL,
+                status TEXT,
+                total_maintenance_cost REAL,
+                method TEXT NOT NULL,
+                useful_life_months INTEGER NOT NULL,
+                accumulated_depreciation REAL NOT NULL,
+                book_value REAL NOT NULL,
+                monthly_depreciation REAL NOT NULL,
+                remaining_months INTEGER NOT NULL,
+                PRIMARY KEY (period, inventory_number),
+                FOREIGN KEY (period) REFERENCES depreciation_periods(period) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        """)
+        
+        if not depreciation_rules_exist:
+            cursor.executemany("""
+                INSERT INTO depreciation_rules (category, method, useful_life_months)
+                VALUES (?, ?, ?)
+            """, [(category, METHOD_STRAIGHT_LINE, months)
+                  for category, months in USEFUL_LIFE_MONTHS.items()])
+        
+        # Версии таблиц для кэша отчетов: любая запись в таблицу увеличивает ее версию
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS table_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        cursor.executemany("INSERT OR IGNORE INTO table_versions (name) VALUES (?)",
+                           [(table,) for table in VERSIONED_TABLES])
+        # Смена местоположения при назначении не влияет на отчеты и не меняет версию
+        update_columns = {
+            'equipment': ' OF inventory_number, name, category, purchase_date, purchase_price, status'
+        }
+        for table in VERSIONED_TABLES:
+            for event in ('insert', 'update', 'delete'):
+                columns = update_columns.get(table, '') if event == 'update' else ''
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event}_version
+                    AFTER {event.upper()}{columns} ON {table}
+                    BEGIN
+                        UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                """)
+        
+        # Сохраненные результаты отчетов (при persist_reports)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS report_cache (
+                report TEXT NOT NULL,
+                params TEXT NOT NULL,
+                versions TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                result BLOB NOT NULL,
+                PRIMARY KEY (report, params)
+            )
+        """)
+        
+        if not rules_exist:
+            cursor.executemany("""
+                INSERT INTO maintenance_rules (category, rule_type, interval_days)
+                VALUES (?, ?, ?)
+            """, [(category, RULE_CALENDAR, interval)
+                  for category, interval in MAINTENANCE_INTERVALS.items()])
+        
+        conn.commit()
+        conn.close()
+        # Файл базы данных мог быть заменен (восстановление из копии)
+        self.report_cache.clear()
+    
+    # Кэш отчетов
+    def get_table_versions(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        """Текущие версии таблиц (в порядке tables)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT name, version FROM table_versions
+            WHERE name IN ({', '.join('?' * len(tables))})
+        """, tables)
+        versions = dict(cursor.fetchall())
+        conn.close()
+        return tuple(versions.get(table, 0) for table in tables)
+    
+    def _cached_report(self, report: str, params: Tuple, tables: Tuple[str, ...],
+                       build: Callable[[], object]):
+        """Результат отчета из кэша, если с момента расчета в таблицы tables ничего
+        не записывалось, иначе - рассчитанный build() и сохраненный в кэше.
+        Возвращается копия списка строк, чтобы вызывающий код не менял кэш
+        """
+        versions = self.get_table_versions(tables)
+        result = self.report_cache.get(report, params, versions)
+        if result is None and self.persist_reports:
+            result = self._load_persisted_report(report, params, versions)
+            if result is not None:
+                self.report_cache.put(report, params, versions, result)
+        if result is None:
+            result = build()
+            self.report_cache.put(report, params, versions, result)
+            if self.persist_reports:
+                self._persist_report(report, params, versions, result)
+        return list(result) if isinstance(result, list) else dict(result)
+    
+    def _load_persisted_report(self, report: str, params: Tuple, versions: Tuple):
+        """Сохраненный в таблице report_cache результат с теми же версиями таблиц"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT result FROM report_cache WHERE report = ? AND params = ? AND versions = ?
+        """, (report, json.dumps(params), json.dumps(versions)))
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row['result']))
+    
+    def _persist_report(self, report: str, params: Tuple, versions: Tuple, result):
+        """Сохранить небольшой результат отчета в таблице report_cache"""
+        if isinstance(result, list) and len(result) > self.PERSIST_MAX_ROWS:
+            return
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO report_cache (report, params, versions, created_at, result)
+            VALUES (?, ?, ?, ?, ?)
+        """, (report, json.dumps(params), json.dumps(versions),
+              datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+              zlib.compress(json.dumps(result).encode('utf-8'))))
+        conn.commit()
+        conn.close()
+    
+    def clear_report_cache(self):
+        """Очистить кэш отчетов в памяти и в таблице report_cache"""
+        self.report_cache.clear()
+        conn = self.get_connection()
+        conn.execute("DELETE FROM report_cache")
         conn.commit()
         conn.close()
     
@@ -108,11 +641,85 @@ class Database:
                   str(purchase_price) if purchase_price else None,
                   current_location, status))
             conn.commit()
-            return cursor.lastrowid
+            equipment_id = cursor.lastrowid
         except sqlite3.IntegrityError:
             raise ValueError(f"Оборудование с инвентарным номером {inventory_number} уже существует")
         finally:
             conn.close()
+        self._notify('equipment', 'insert', equipment_id)
+        self.apply_maintenance_due_changes()
+        return equipment_id
+    
+    def import_equipment(self, records: Iterable[Tuple], atomic: bool = False,
+                         on_error: Callable[[int, str], None] = None,
+                         progress: Callable[[int], None] = None, notify: bool = True) -> int:
+        """Добавить оборудование из потока записей (номер строки, inventory_number, name,
+        category, purchase_date, purchase_price, current_location, status).
+        Записи вставляются пачками по IMPORT_CHUNK_SIZE одним executemany в одном
+        соединении. Записи с инвентарным номером, который уже есть в базе или встречался
+        выше, пропускаются; on_error(номер строки, текст) получает причину.
+        Без atomic каждая пачка фиксируется своей транзакцией (при сбое остаются
+        зафиксированные пачки), с atomic весь импорт - одна транзакция, которая
+        откатывается при первой ошибке. progress(добавлено) вызывается после каждой пачки.
+        Без notify подписчики не оповещаются (импорт в фоновом потоке): после него
+        нужно вызвать notify_equipment_imported в потоке интерфейса.
+        Возвращает количество добавленных записей
+        """
+        records = iter(records)
+        imported = 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            while True:
+                chunk = list(islice(records, self.IMPORT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                cursor.execute("""
+                    SELECT inventory_number FROM equipment
+                    WHERE inventory_number IN (SELECT value FROM json_each(?))
+                """, (json.dumps([record[1] for record in chunk]),))
+                existing = {row[0] for row in cursor.fetchall()}
+                rows = []
+                for record in chunk:
+                    if record[1] in existing:
+                        if on_error:
+                            on_error(record[0], f"Оборудование с инвентарным номером "
+                                                f"{record[1]} уже существует")
+                        if atomic:
+                            conn.rollback()
+                            return 0
+                        continue
+                    existing.add(record[1])
+                    rows.append(record[1:])
+                cursor.executemany("""
+                    INSERT INTO equipment
+                    (inventory_number, name, category, purchase_date, purchase_price,
+                     current_location, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                imported += len(rows)
+                if not atomic:
+                    conn.commit()
+                if progress:
+                    progress(imported)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        if imported and notify:
+            self.notify_equipment_imported()
+        return imported
+    
+    def notify_equipment_imported(self):
+        """Оповестить подписчиков об импорте оборудования и пересчитать сроки ТО
+        добавленного оборудования: по одному оповещению на таблицу с record_id None
+        вместо оповещения на каждую запись
+        """
+        self._notify('equipment', 'insert', None)
+        if self.apply_maintenance_due_changes(notify=False):
+            self._notify('maintenance_due', 'update', None)
     
     def get_equipment_by_inventory(self, inventory_number: str) -> Optional[Dict]:
         """Получить оборудование по инвентарному номеру (оптимизировано для < 1 сек)"""
@@ -127,6 +734,17 @@ class Database:
             return dict(row)
         return None
     
+    def get_equipment_by_id(self, equipment_id: int) -> Optional[Dict]:
+        """Получить оборудование по ID"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM equipment WHERE id = ?", (equipment_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if row:
+            return dict(row)
+        return None
+    
     def get_all_equipment(self) -> List[Dict]:
         """Получить все оборудование"""
         conn = self.get_connection()
@@ -136,6 +754,36 @@ class Database:
         conn.close()
         return [dict(row) for row in rows]
     
+    def iter_equipment(self) -> Iterator[sqlite3.Row]:
+        """Все оборудование потоком записей (для экспорта без загрузки в память)"""
+        return self._iter_query("SELECT * FROM equipment ORDER BY inventory_number")
+    
+    def get_equipment_names(self) -> List[Dict]:
+        """Получить краткий список оборудования (id, инвентарный номер, наименование)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, inventory_number, name 
+            FROM equipment 
+            ORDER BY inventory_number
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def get_equipment_categories(self) -> List[str]:
+        """Получить список используемых категорий оборудования"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT category FROM equipment
+            WHERE category IS NOT NULL AND category != ''
+            ORDER BY category
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+        return [row['category'] for row in rows]
+    
     def update_equipment(self, equipment_id: int, **kwargs):
         """Обновить данные оборудования"""
         conn = self.get_connection()
@@ -160,6 +808,9 @@ class Database:
             conn.commit()
         
         conn.close()
+        if fields:
+            self._notify('equipment', 'update', equipment_id)
+            self.apply_maintenance_due_changes()
     
     def delete_equipment(self, equipment_id: int):
         """Удалить оборудование"""
@@ -168,6 +819,9 @@ class Database:
         cursor.execute("DELETE FROM equipment WHERE id = ?", (equipment_id,))
         conn.commit()
         conn.close()
+        self._notify('equipment', 'delete', equipment_id)
+        # Запись списка предстоящего ТО удаляется каскадно
+        self._notify('maintenance_due', 'delete', equipment_id)
     
     # Методы для работы с обслуживанием
     def add_maintenance(self, equipment_id: int, maintenance_date: str, 
@@ -181,9 +835,13 @@ class Database:
             VALUES (?, ?, ?, ?, ?)
         """, (equipment_id, maintenance_date, type, 
               str(cost) if cost else '0', description))
-        conn.commit()
         maintenance_id = cursor.lastrowid
+        # Проведенное ТО закрывает запланированное для этого оборудования
+        cursor.execute("DELETE FROM planned_maintenance WHERE equipment_id = ?", (equipment_id,))
+        conn.commit()
         conn.close()
+        self._notify('maintenance', 'insert', maintenance_id)
+        self.apply_maintenance_due_changes()
         return maintenance_id
     
     def get_maintenance_by_id(self, maintenance_id: int) -> Optional[Dict]:
@@ -219,6 +877,9 @@ class Database:
             conn.commit()
         
         conn.close()
+        if fields:
+            self._notify('maintenance', 'update', maintenance_id)
+            self.apply_maintenance_due_changes()
     
     def delete_maintenance(self, maintenance_id: int):
         """Удалить запись о техническом обслуживании"""
@@ -227,6 +888,8 @@ class Database:
         cursor.execute("DELETE FROM maintenance WHERE id = ?", (maintenance_id,))
         conn.commit()
         conn.close()
+        self._notify('maintenance', 'delete', maintenance_id)
+        self.apply_maintenance_due_changes()
     
     def get_maintenance_by_equipment(self, equipment_id: int) -> List[Dict]:
         """Получить все обслуживания для оборудования"""
@@ -243,7 +906,17 @@ class Database:
     
     def get_maintenance_report(self, start_date: str = None, 
                               end_date: str = None) -> List[Dict]:
-        """Получить отчет по техническому обслуживанию (оптимизировано для < 5 сек)"""
+        """Получить отчет по техническому обслуживанию (оптимизировано для < 5 сек).
+        Результат кэшируется до изменения обслуживания или оборудования
+        """
+        return self._cached_report(
+            'maintenance_report', (start_date, end_date), ('maintenance', 'equipment'),
+            lambda: self._query_maintenance_report(start_date, end_date)
+        )
+    
+    def _query_maintenance_report(self, start_date: str = None,
+                                  end_date: str = None) -> List[Dict]:
+        """Выполнить запрос отчета по техническому обслуживанию"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -267,6 +940,113 @@ class Database:
         conn.close()
         return [dict(row) for row in rows]
     
+    def iter_maintenance_report(self, start_date: str = None,
+                                end_date: str = None) -> Iterator[sqlite3.Row]:
+        """Отчет по техническому обслуживанию потоком записей (для экспорта).
+        Записи читаются по индексу даты в порядке убывания без сортировки
+        """
+        query = """
+            SELECT m.*, e.inventory_number, e.name, e.category
+            FROM maintenance m
+            JOIN equipment e ON m.equipment_id = e.id
+        """
+        params = ()
+        if start_date and end_date:
+            query += " WHERE m.maintenance_date BETWEEN ? AND ?"
+            params = (start_date, end_date)
+        return self._iter_query(query + " ORDER BY m.maintenance_date DESC", params)
+    
+    def count_maintenance_report(self, start_date: str = None, end_date: str = None) -> int:
+        """Количество записей отчета по техническому обслуживанию"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if start_date and end_date:
+            cursor.execute("""
+                SELECT COUNT(*) FROM maintenance WHERE maintenance_date BETWEEN ? AND ?
+            """, (start_date, end_date))
+        else:
+            cursor.execute("SELECT COUNT(*) FROM maintenance")
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    def get_maintenance_report_page(self, start_date: str = None, end_date: str = None,
+                                    offset: int = 0, limit: int = None,
+                                    descending: bool = True) -> Dict:
+        """Страница отчета по техническому обслуживанию с итогами всего периода.
+        Одним запросом: итоги периода (количество, общая, минимальная и максимальная стоимость)
+        и стоимость строк до страницы считаются по индексу даты и стоимости без чтения
+        таблицы, оконные функции нумеруют строки страницы и считают нарастающий итог.
+        Порядок строк - по дате, стоимости и id (порядок индекса, без сортировки).
+        Возвращает итоги, offset, limit и rows - строки отчета с row_number и running_cost
+        """
+        limit = limit or self.REPORT_PAGE_SIZE
+        where, params = "1", {}
+        if start_date and end_date:
+            where = "maintenance_date BETWEEN :start_date AND :end_date"
+            params = {'start_date': start_date, 'end_date': end_date}
+        params.update(offset=offset, limit=limit)
+        direction = "DESC" if descending else "ASC"
+        order = f"maintenance_date {direction}, cost {direction}, id {direction}"
+        page_order = f"page.maintenance_date {direction}, page.cost {direction}, page.id {direction}"
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            WITH totals AS (
+                SELECT COUNT(*) AS total_maintenances, SUM(cost) AS total_cost,
+                       AVG(cost) AS avg_cost, MIN(cost) AS min_cost, MAX(cost) AS max_cost
+                FROM maintenance
+                WHERE {where}
+            ),
+            preceding AS (
+                SELECT COALESCE(SUM(cost), 0) AS preceding_cost
+                FROM (SELECT cost FROM maintenance WHERE {where} ORDER BY {order} LIMIT :offset)
+            ),
+            page AS (
+                SELECT m.*, e.inventory_number, e.name, e.category
+                FROM (SELECT id FROM maintenance WHERE {where}
+                      ORDER BY {order} LIMIT :limit OFFSET :offset) p
+                JOIN maintenance m ON m.id = p.id
+                JOIN equipment e ON e.id = m.equipment_id
+            )
+            SELECT totals.*, page.*,
+                   :offset + ROW_NUMBER() OVER w AS row_number,
+                   preceding_cost + SUM(page.cost) OVER (w ROWS UNBOUNDED PRECEDING) AS running_cost
+            FROM totals
+            CROSS JOIN preceding
+            LEFT JOIN page ON 1
+            WINDOW w AS (ORDER BY {page_order})
+            ORDER BY {page_order}
+        """, params)
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        totals = {key: rows[0][key] for key in
+                  ('total_maintenances', 'total_cost', 'avg_cost', 'min_cost', 'max_cost')}
+        for row in rows:
+            for key in totals:
+                del row[key]
+        totals.update(offset=offset, limit=limit,
+                      rows=[row for row in rows if row['id'] is not None])
+        return totals
+    
+    def get_maintenance_report_row(self, maintenance_id: int) -> Optional[Dict]:
+        """Получить запись обслуживания в формате строки отчета (с данными оборудования)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT m.*, e.inventory_number, e.name, e.category
+            FROM maintenance m
+            JOIN equipment e ON m.equipment_id = e.id
+            WHERE m.id = ?
+        """, (maintenance_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if row:
+            return dict(row)
+        return None
+    
     # Методы для работы с назначениями
     def add_assignment(self, equipment_id: int, assigned_to: str, 
                       department: str = None, start_date: str = None,
@@ -303,6 +1083,9 @@ class Database:
         conn.commit()
         assignment_id = cursor.lastrowid
         conn.close()
+        self._notify('assignments', 'insert', assignment_id)
+        # Изменилось текущее местоположение оборудования
+        self._notify('equipment', 'update', equipment_id)
         return assignment_id
     
     def get_assignment_by_id(self, assignment_id: int) -> Optional[Dict]:
@@ -349,6 +1132,8 @@ class Database:
             conn.commit()
         
         conn.close()
+        if fields:
+            self._notify('assignments', 'update', assignment_id)
     
     def delete_assignment(self, assignment_id: int):
         """Удалить назначение оборудования"""
@@ -357,6 +1142,7 @@ class Database:
         cursor.execute("DELETE FROM assignments WHERE id = ?", (assignment_id,))
         conn.commit()
         conn.close()
+        self._notify('assignments', 'delete', assignment_id)
     
     def get_assignments_by_equipment(self, equipment_id: int) -> List[Dict]:
         """Получить историю назначений для оборудования"""
@@ -371,60 +1157,1004 @@ class Database:
         conn.close()
         return [dict(row) for row in rows]
     
-    # Методы для отчетов
-    def get_depreciation_report(self) -> List[Dict]:
-        """Отчет по амортизации оборудования"""
+    def get_assignments_report(self, equipment_id: int = None) -> List[Dict]:
+        """Получить назначения вместе с данными оборудования одним запросом"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        query = """
+            SELECT a.*, e.inventory_number, e.name
+            FROM assignments a
+            JOIN equipment e ON a.equipment_id = e.id
+        """
+        params = ()
+        if equipment_id is not None:
+            query += " WHERE a.equipment_id = ?"
+            params = (equipment_id,)
+        query += " ORDER BY a.start_date DESC"
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def get_assignment_report_row(self, assignment_id: int) -> Optional[Dict]:
+        """Получить назначение в формате строки отчета (с данными оборудования)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT a.*, e.inventory_number, e.name
+            FROM assignments a
+            JOIN equipment e ON a.equipment_id = e.id
+            WHERE a.id = ?
+        """, (assignment_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if row:
+            return dict(row)
+        return None
+    
+    # Амортизация
+    def get_depreciation_rules(self) -> List[Dict]:
+        """Получить правила амортизации по категориям"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM depreciation_rules ORDER BY category")
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def set_depreciation_rule(self, category: str, useful_life_months: int,
+                              method: str = METHOD_STRAIGHT_LINE, salvage_rate: float = 0.0,
+                              declining_factor: float = DEFAULT_DECLINING_FACTOR):
+        """Задать правило амортизации категории (заменяет существующее)"""
+        if method not in METHODS:
+            raise ValueError(f"Неизвестный способ амортизации: {method}")
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO depreciation_rules
+            (category, method, useful_life_months, salvage_rate, declining_factor)
+            VALUES (?, ?, ?, ?, ?)
+        """, (category, method, useful_life_months, salvage_rate, declining_factor))
+        conn.commit()
+        conn.close()
+        self._notify('depreciation_rules', 'update', None)
+    
+    def get_depreciation_engine(self) -> DepreciationEngine:
+        """Движок амортизации с правилами категорий из базы данных"""
+        return DepreciationEngine.from_rows(self.get_depreciation_rules())
+    
+    def get_depreciation_inputs(self) -> Dict[str, List]:
+        """Данные оборудования для расчета амортизации по колонкам (для векторных расчетов):
+        id, inventory_number, name, category, purchase_date, purchase_price, status
+        и total_maintenance_cost. Некорректные даты покупки заменяются на NULL
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT 
+            SELECT
                 e.id,
                 e.inventory_number,
                 e.name,
                 e.category,
-                e.purchase_date,
-                e.purchase_price,
+                date(e.purchase_date) AS purchase_date,
+                CAST(e.purchase_price AS REAL) AS purchase_price,
                 e.status,
-                COALESCE(SUM(CAST(m.cost AS DECIMAL)), 0) as total_maintenance_cost,
-                CASE 
-                    WHEN e.purchase_date IS NOT NULL 
-                    THEN CAST(julianday('now') - julianday(e.purchase_date) AS INTEGER)
-                    ELSE 0
-                END as days_in_use
+                COALESCE(m.total_cost, 0) AS total_maintenance_cost
             FROM equipment e
-            LEFT JOIN maintenance m ON e.id = m.equipment_id
-            GROUP BY e.id
+            LEFT JOIN (
+                SELECT equipment_id, SUM(CAST(cost AS DECIMAL)) AS total_cost
+                FROM maintenance
+                GROUP BY equipment_id
+            ) m ON m.equipment_id = e.id
             ORDER BY e.inventory_number
         """)
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+        conn.close()
+        return {column: [row[index] for row in rows] for index, column in enumerate(columns)}
+    
+    # Методы для отчетов
+    def get_depreciation_report(self, period: str = None) -> List[Dict]:
+        """Отчет по амортизации оборудования на конец периода "ГГГГ-ММ" (по умолчанию -
+        текущего): накопленная амортизация, остаточная стоимость, начисление за месяц
+        и оставшийся срок. Для закрытого периода возвращается сохраненный расчет
+        """
+        period = period or current_period()
+        return self._cached_report(
+            'depreciation', (period,),
+            ('equipment', 'maintenance', 'depreciation_rules', 'depreciation_periods'),
+            lambda: self._build_depreciation_report(period)
+        )
+    
+    def _build_depreciation_report(self, period: str) -> List[Dict]:
+        """Рассчитать отчет по амортизации (или прочитать расчет закрытого периода)"""
+        if self.get_depreciation_period(period):
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT equipment_id AS id, inventory_number, name, category, purchase_date,
+                       purchase_price, status, total_maintenance_cost, method,
+                       useful_life_months, accumulated_depreciation, book_value,
+                       monthly_depreciation, remaining_months
+                FROM depreciation_snapshots
+                WHERE period = ?
+                ORDER BY inventory_number
+            """, (period,))
+            rows = cursor.fetchall()
+            conn.close()
+            return [dict(row) for row in rows]
+        
+        return self.get_depreciation_engine().run(self.get_depreciation_inputs(), period).rows()
+    
+    def iter_depreciation_report(self, period: str = None) -> Iterator:
+        """Отчет по амортизации потоком записей (для экспорта): закрытый период
+        читается из курсора, открытый рассчитывается и выдается без построения списка строк
+        """
+        period = period or current_period()
+        if self.get_depreciation_period(period):
+            return self._iter_query("""
+                SELECT equipment_id AS id, inventory_number, name, category, purchase_date,
+                       purchase_price, status, total_maintenance_cost, method,
+                       useful_life_months, accumulated_depreciation, book_value,
+                       monthly_depreciation, remaining_months
+                FROM depreciation_snapshots
+                WHERE period = ?
+                ORDER BY inventory_number
+            """, (period,))
+        return self.get_depreciation_engine().run(self.get_depreciation_inputs(), period).iter_rows()
+    
+    def get_depreciation_schedule(self, start_period: str = None, months: int = 12) -> List[Dict]:
+        """График амортизации парка по месяцам и категориям"""
+        return self.get_depreciation_engine().schedule(self.get_depreciation_inputs(),
+                                                       start_period, months)
+    
+    def get_depreciation_period(self, period: str) -> Optional[Dict]:
+        """Закрытый период амортизации с итогами (None, если период не закрыт)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM depreciation_periods WHERE period = ?", (period,))
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row) if row else None
+    
+    def get_depreciation_periods(self) -> List[Dict]:
+        """Закрытые периоды амортизации, начиная с последнего"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM depreciation_periods ORDER BY period DESC")
         rows = cursor.fetchall()
         conn.close()
         return [dict(row) for row in rows]
     
-    def get_maintenance_cost_report(self, start_date: str = None, 
-                                    end_date: str = None) -> Dict:
-        """Отчет по стоимости содержания оборудования"""
+    def close_depreciation_period(self, period: str = None) -> Dict:
+        """Закрыть период: рассчитать амортизацию на его конец и сохранить расчет.
+        Отчеты за закрытый период читают сохраненные данные без пересчета.
+        Возвращает итоги периода
+        """
+        period = period or current_period()
+        if self.get_depreciation_period(period):
+            raise ValueError(f"Период {period} уже закрыт")
+        result = self.get_depreciation_engine().run(self.get_depreciation_inputs(), period)
+        totals = result.totals()
+        totals['closed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO depreciation_periods
+                (period, closed_at, equipment_count, purchase_price,
+                 accumulated_depreciation, book_value, monthly_depreciation)
+                VALUES (:period, :closed_at, :equipment_count, :purchase_price,
+                        :accumulated_depreciation, :book_value, :monthly_depreciation)
+            """, totals)
+            cursor.executemany("""
+                INSERT INTO depreciation_snapshots
+                (period, equipment_id, inventory_number, name, category, purchase_date,
+                 purchase_price, status, total_maintenance_cost, method, useful_life_months,
+                 accumulated_depreciation, book_value, monthly_depreciation, remaining_months)
+                VALUES (:period, :id, :inventory_number, :name, :category, :purchase_date,
+                        :purchase_price, :status, :total_maintenance_cost, :method,
+                        :useful_life_months, :accumulated_depreciation, :book_value,
+                        :monthly_depreciation, :remaining_months)
+            """, (dict(row, period=period) for row in result.rows()))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._notify('depreciation_periods', 'insert', None)
+        return totals
+    
+    def reopen_depreciation_period(self, period: str):
+        """Открыть закрытый период: сохраненный расчет удаляется"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute("DELETE FROM depreciation_snapshots WHERE period = ?", (period,))
+        cursor.execute("DELETE FROM depreciation_periods WHERE period = ?", (period,))
+        conn.commit()
+        conn.close()
+        self._notify('depreciation_periods', 'delete', None)
+    
+    def refresh_maintenance_monthly(self) -> int:
+        """Пересчитать месячные итоги для месяцев, отмеченных триггерами.
+        Первое удаление начинает транзакцию записи, поэтому месяцы, отмеченные
+        другими соединениями во время пересчета, не теряются.
+        Возвращает количество пересчитанных месяцев
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM maintenance_monthly_dirty LIMIT 1")
+            if cursor.fetchone() is None:
+                return 0
+            cursor.execute("""
+                DELETE FROM maintenance_monthly
+                WHERE month IN (SELECT month FROM maintenance_monthly_dirty)
+            """)
+            # Записи месяца выбираются по индексу диапазоном дат
+            cursor.execute("""
+                INSERT INTO maintenance_monthly
+                (month, category, type, maintenance_count, cost_count,
+                 total_cost, min_cost, max_cost)
+                SELECT d.month, COALESCE(e.category, ''), m.type, COUNT(*), COUNT(m.cost),
+                       COALESCE(SUM(CAST(m.cost AS DECIMAL)), 0),
+                       MIN(CAST(m.cost AS DECIMAL)), MAX(CAST(m.cost AS DECIMAL))
+                FROM maintenance_monthly_dirty d
+                JOIN maintenance m
+                  ON m.maintenance_date >= d.month || '-01'
+                 AND m.maintenance_date < date(d.month || '-01', '+1 month')
+                LEFT JOIN equipment e ON e.id = m.equipment_id
+                GROUP BY d.month, COALESCE(e.category, ''), m.type
+            """)
+            cursor.execute("DELETE FROM maintenance_monthly_dirty")
+            month_count = cursor.rowcount
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return month_count
+    
+    def get_maintenance_cost_report(self, start_date: str = None, 
+                                    end_date: str = None) -> Dict:
+        """Отчет по стоимости содержания оборудования: количество, общая, средняя,
+        минимальная и максимальная стоимость ТО.
+        Полные месяцы периода берутся из месячных итогов, записи обслуживания
+        читаются только для неполных месяцев в начале и в конце периода.
+        Результат кэшируется до изменения обслуживания
+        """
+        return self._cached_report(
+            'maintenance_cost', (start_date, end_date), ('maintenance',),
+            lambda: self._build_maintenance_cost_report(start_date, end_date)
+        )
+    
+    def _build_maintenance_cost_report(self, start_date: str = None,
+                                       end_date: str = None) -> Dict:
+        """Рассчитать сводку по стоимости содержания по месячным итогам"""
+        self.refresh_maintenance_monthly()
         
         if start_date and end_date:
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_maintenances,
-                    SUM(CAST(cost AS DECIMAL)) as total_cost,
-                    AVG(CAST(cost AS DECIMAL)) as avg_cost
-                FROM maintenance
-                WHERE maintenance_date BETWEEN ? AND ?
-            """, (start_date, end_date))
+            start = date.fromisoformat(start_date)
+            end = date.fromisoformat(end_date)
+            # Первый день первого полного месяца и последний день последнего полного
+            first_full = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            following = end + timedelta(days=1)
+            last_full = end if following.day == 1 else end.replace(day=1) - timedelta(days=1)
+            if first_full > last_full:
+                # Полных месяцев нет - весь период по записям
+                params = {'first_month': '~', 'last_month': '',
+                          'head_start': start_date, 'head_end': end_date,
+                          'tail_start': '~', 'tail_end': ''}
+            else:
+                params = {
+                    'first_month': first_full.isoformat()[:7],
+                    'last_month': last_full.isoformat()[:7],
+                    'head_start': start_date,
+                    'head_end': (first_full - timedelta(days=1)).isoformat(),
+                    'tail_start': (last_full + timedelta(days=1)).isoformat(),
+                    'tail_end': end_date
+                }
         else:
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_maintenances,
-                    SUM(CAST(cost AS DECIMAL)) as total_cost,
-                    AVG(CAST(cost AS DECIMAL)) as avg_cost
+            # Весь период - только месячные итоги
+            params = {'first_month': '', 'last_month': '~',
+                      'head_start': '~', 'head_end': '', 'tail_start': '~', 'tail_end': ''}
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                COALESCE(SUM(maintenance_count), 0) AS total_maintenances,
+                SUM(total_cost) AS total_cost,
+                SUM(total_cost) / SUM(cost_count) AS avg_cost,
+                MIN(min_cost) AS min_cost,
+                MAX(max_cost) AS max_cost
+            FROM (
+                SELECT SUM(maintenance_count) AS maintenance_count, SUM(cost_count) AS cost_count,
+                       SUM(total_cost) AS total_cost, MIN(min_cost) AS min_cost,
+                       MAX(max_cost) AS max_cost
+                FROM maintenance_monthly
+                WHERE month BETWEEN :first_month AND :last_month
+                UNION ALL
+                SELECT COUNT(*), COUNT(cost), SUM(CAST(cost AS DECIMAL)),
+                       MIN(CAST(cost AS DECIMAL)), MAX(CAST(cost AS DECIMAL))
                 FROM maintenance
-            """)
+                WHERE maintenance_date BETWEEN :head_start AND :head_end
+                UNION ALL
+                SELECT COUNT(*), COUNT(cost), SUM(CAST(cost AS DECIMAL)),
+                       MIN(CAST(cost AS DECIMAL)), MAX(CAST(cost AS DECIMAL))
+                FROM maintenance
+                WHERE maintenance_date BETWEEN :tail_start AND :tail_end
+            )
+        """, params)
         
         row = cursor.fetchone()
         conn.close()
         return dict(row) if row else {}
-
+    
+    def get_maintenance_daily(self, start_date: str, end_date: str,
+                              category: str = None) -> List[Dict]:
+        """Количество и стоимость ТО по дням за период (из дневных итогов, без чтения
+        записей обслуживания). category '' - оборудование без категории
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT day, SUM(maintenance_count) AS maintenance_count,
+                   ROUND(SUM(total_cost), 2) AS total_cost
+            FROM maintenance_daily
+            WHERE day BETWEEN :start AND :end
+              AND (:category IS NULL OR category = :category)
+            GROUP BY day
+            ORDER BY day
+        """, {'start': start_date, 'end': end_date, 'category': category})
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    # Отчет о стоимости владения
+    def get_tco_report(self, period: str = None) -> TcoReport:
+        """Отчет о стоимости владения (utils/tco.py) с амортизацией на конец периода
+        "ГГГГ-ММ" (по умолчанию - текущего). Колонки по типам ТО и отделам известны
+        сразу, строки читаются потоком через iter_tco_report
+        """
+        self.refresh_maintenance_monthly()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Типы ТО - из месячных итогов, а не из всех записей обслуживания
+        cursor.execute("SELECT DISTINCT type FROM maintenance_monthly ORDER BY type")
+        types = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT COALESCE(department, '') FROM assignments ORDER BY 1")
+        departments = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return TcoReport(self.get_depreciation_engine(), types, departments,
+                         period or current_period())
+    
+    def iter_tco_report(self, report: TcoReport, inventory_number: str = None) -> Iterator[Dict]:
+        """Строки отчета о стоимости владения всем оборудованием (или одной единицей).
+        Оборудование, итоги ТО по типам и дни назначений по отделам читаются тремя
+        курсорами в порядке инвентарного номера и сливаются за один проход.
+        Дни незавершенных назначений считаются по сегодняшний день
+        """
+        condition = "WHERE e.inventory_number = :inventory_number" if inventory_number else ""
+        params = {'inventory_number': inventory_number, 'today': date.today().isoformat()}
+        assets = self._iter_query(f"""
+            SELECT e.id, e.inventory_number, e.name, e.category,
+                   date(e.purchase_date) AS purchase_date,
+                   CAST(e.purchase_price AS REAL) AS purchase_price, e.status
+            FROM equipment e
+            {condition}
+            ORDER BY e.inventory_number
+        """, params)
+        maintenance = self._iter_query(f"""
+            SELECT e.inventory_number, m.type, COUNT(*), TOTAL(CAST(m.cost AS DECIMAL))
+            FROM equipment e
+            JOIN maintenance m ON m.equipment_id = e.id
+            {condition}
+            GROUP BY e.inventory_number, m.type
+            ORDER BY e.inventory_number, m.type
+        """, params)
+        assignments = self._iter_query(f"""
+            SELECT e.inventory_number, COALESCE(a.department, ''),
+                   CAST(ROUND(TOTAL(MAX(julianday(COALESCE(a.end_date, :today))
+                                        - julianday(a.start_date), 0))) AS INTEGER)
+            FROM equipment e
+            JOIN assignments a ON a.equipment_id = e.id
+            {condition}
+            GROUP BY e.inventory_number, COALESCE(a.department, '')
+            ORDER BY e.inventory_number, COALESCE(a.department, '')
+        """, params)
+        return report.iter_rows(assets, maintenance, assignments)
+    
+    # Сводные отчеты
+    def get_pivot_report(self, dimensions: List[str], measures: List[str],
+                         start_month: str = None, end_month: str = None) -> List[Dict]:
+        """Сводный отчет: показатели measures по сочетаниям значений измерений dimensions
+        (см. utils/pivot.py) за месяцы start_month..end_month ("ГГГГ-ММ").
+        Результат кэшируется до изменения оборудования, обслуживания или назначений
+        """
+        query = PivotQuery(dimensions, measures, start_month, end_month)
+        return self._cached_report(
+            'pivot', (tuple(dimensions), tuple(measures), start_month, end_month),
+            ('equipment', 'maintenance', 'assignments'),
+            lambda: self._build_pivot_report(query)
+        )
+    
+    def _build_pivot_report(self, query: PivotQuery) -> List[Dict]:
+        """Выполнить запрос сводного отчета"""
+        if query.uses_rollup:
+            self.refresh_maintenance_monthly()
+        sql, params = query.sql()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        conn.close()
+        return query.records(rows)
+    
+    # Методы для работы с правилами интервалов ТО
+    _RULE_FIELDS = ['category', 'equipment_id', 'rule_type', 'interval_days',
+                    'usage_limit', 'daily_usage', 'season_start', 'season_end']
+    
+    def add_maintenance_rule(self, interval_days: int = None, category: str = None,
+                             equipment_id: int = None, rule_type: str = RULE_CALENDAR,
+                             usage_limit: float = None, daily_usage: float = None,
+                             season_start: str = None, season_end: str = None) -> int:
+        """Добавить правило интервала ТО для категории или для оборудования"""
+        if (category is None) == (equipment_id is None):
+            raise ValueError("Правило задается либо для категории, либо для оборудования")
+        validate_rule({'rule_type': rule_type, 'interval_days': interval_days,
+                       'usage_limit': usage_limit, 'daily_usage': daily_usage,
+                       'season_start': season_start, 'season_end': season_end})
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO maintenance_rules (category, equipment_id, rule_type, interval_days,
+                                           usage_limit, daily_usage, season_start, season_end)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (category, equipment_id, rule_type, interval_days,
+              usage_limit, daily_usage, season_start, season_end))
+        conn.commit()
+        rule_id = cursor.lastrowid
+        conn.close()
+        self._notify('maintenance_rules', 'insert', rule_id)
+        return rule_id
+    
+    def get_maintenance_rules(self, category: str = None, equipment_id: int = None) -> List[Dict]:
+        """Получить правила интервалов ТО (все или для категории/оборудования)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if equipment_id is not None:
+            cursor.execute("SELECT * FROM maintenance_rules WHERE equipment_id = ? ORDER BY id",
+                           (equipment_id,))
+        elif category is not None:
+            cursor.execute("SELECT * FROM maintenance_rules WHERE category = ? ORDER BY id",
+                           (category,))
+        else:
+            cursor.execute("SELECT * FROM maintenance_rules ORDER BY id")
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def update_maintenance_rule(self, rule_id: int, **kwargs):
+        """Обновить правило интервала ТО"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Проверяется правило целиком: новые значения вместе с сохраненными
+        cursor.execute("SELECT * FROM maintenance_rules WHERE id = ?", (rule_id,))
+        row = cursor.fetchone()
+        if row is not None:
+            try:
+                validate_rule({**dict(row), **kwargs})
+            except ValueError:
+                conn.close()
+                raise
+        
+        fields = []
+        values = []
+        for key, value in kwargs.items():
+            if key in self._RULE_FIELDS:
+                fields.append(f"{key} = ?")
+                values.append(value)
+        
+        if fields:
+            values.append(rule_id)
+            query = f"UPDATE maintenance_rules SET {', '.join(fields)} WHERE id = ?"
+            try:
+                cursor.execute(query, values)
+                conn.commit()
+            except sqlite3.IntegrityError:
+                raise ValueError("Правило задается либо для категории, либо для оборудования")
+            finally:
+                conn.close()
+        else:
+            conn.close()
+        if fields:
+            self._notify('maintenance_rules', 'update', rule_id)
+    
+    def delete_maintenance_rule(self, rule_id: int):
+        """Удалить правило интервала ТО"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM maintenance_rules WHERE id = ?", (rule_id,))
+        conn.commit()
+        conn.close()
+        self._notify('maintenance_rules', 'delete', rule_id)
+    
+    def get_rule_resolver(self, default_interval: int = 90) -> RuleResolver:
+        """Скомпилировать правила интервалов ТО для разрешения в памяти"""
+        return RuleResolver(self.get_maintenance_rules(), default_interval)
+    
+    # Планировщик технического обслуживания
+    def get_maintenance_schedule(self, days_ahead: int = 30, default_interval: int = 90,
+                                 category: str = None, today: str = None,
+                                 resolver: RuleResolver = None,
+                                 equipment_ids: List[int] = None) -> List[Dict]:
+        """Предстоящее обслуживание всего оборудования одним запросом.
+        
+        Для каждого оборудования определяются последнее ТО, интервал по правилам
+        (оборудования, категории, затем default_interval) и дата следующего ТО.
+        Сезон правила определяется по дате последнего ТО (для оборудования без ТО -
+        по дате покупки). Возвращается оборудование со сроком ТО не позже
+        today + days_ahead, а также оборудование без ТО, у которого с покупки прошло
+        не меньше интервала. Результат отсортирован по дате следующего ТО.
+        planned_date - дата из сохраненного плана ТО (если оборудование запланировано).
+        equipment_ids ограничивает расчет указанным оборудованием (поиск по первичному ключу).
+        """
+        if today is None:
+            today = date.today().isoformat()
+        if resolver is None:
+            resolver = self.get_rule_resolver(default_interval)
+        
+        # Граничные даты считаются один раз на отрезок правил, а не для каждой строки:
+        # ТО попадает в горизонт, если последнее проведено не позже due_cutoff
+        today_date = date.fromisoformat(today)
+        horizon = today_date + timedelta(days=days_ahead)
+        
+        def with_cutoffs(segments):
+            return [(key, start, end, interval,
+                     (horizon - timedelta(days=interval)).isoformat(),
+                     (today_date - timedelta(days=interval)).isoformat())
+                    for key, start, end, interval in segments]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Отрезки правил во временных таблицах с ключом для поиска по индексу
+        for table, key in (('schedule_equipment_rules', 'equipment_id INTEGER'),
+                           ('schedule_category_rules', 'category TEXT')):
+            cursor.execute(f"""
+                CREATE TEMP TABLE {table} (
+                    {key}, season_start TEXT, season_end TEXT, interval_days INTEGER,
+                    due_cutoff TEXT, first_cutoff TEXT,
+                    PRIMARY KEY ({key.split()[0]}, season_start)
+                ) WITHOUT ROWID
+            """)
+        cursor.executemany("INSERT INTO schedule_equipment_rules VALUES (?, ?, ?, ?, ?, ?)",
+                           with_cutoffs(resolver.segments_by_equipment()))
+        cursor.executemany("INSERT INTO schedule_category_rules VALUES (?, ?, ?, ?, ?, ?)",
+                           with_cutoffs(resolver.segments_by_category()))
+        
+        default_interval = resolver.default_interval
+        equipment_filter = ""
+        if equipment_ids is not None:
+            equipment_filter = "AND e.id IN (SELECT value FROM json_each(:equipment_ids))"
+        cursor.execute(f"""
+            WITH resolved AS (
+                SELECT
+                    c.*,
+                    COALESCE(er.interval_days, cr.interval_days, :default_interval) AS interval_days,
+                    COALESCE(er.due_cutoff, cr.due_cutoff, :default_due_cutoff) AS due_cutoff,
+                    COALESCE(er.first_cutoff, cr.first_cutoff, :default_first_cutoff) AS first_cutoff
+                FROM (
+                    SELECT
+                        e.id,
+                        e.inventory_number,
+                        e.name,
+                        e.category,
+                        e.purchase_date,
+                        (SELECT MAX(m.maintenance_date) FROM maintenance m
+                         WHERE m.equipment_id = e.id) AS last_date
+                    FROM equipment e
+                    WHERE (:category IS NULL OR e.category = :category)
+                    {equipment_filter}
+                    -- LIMIT не дает встроить подзапрос во внешний запрос,
+                    -- поэтому MAX(maintenance_date) вычисляется один раз на строку
+                    LIMIT -1
+                ) c
+                -- Сезон правила определяется по дню года ("ММ-ДД") опорной даты
+                LEFT JOIN temp.schedule_equipment_rules er
+                    ON er.equipment_id = c.id
+                   AND substr(COALESCE(c.last_date, c.purchase_date), 6, 5)
+                       BETWEEN er.season_start AND er.season_end
+                LEFT JOIN temp.schedule_category_rules cr
+                    ON cr.category = c.category
+                   AND substr(COALESCE(c.last_date, c.purchase_date), 6, 5)
+                       BETWEEN cr.season_start AND cr.season_end
+            ),
+            schedule AS (
+                SELECT
+                    r.id,
+                    r.inventory_number,
+                    r.name,
+                    r.category,
+                    r.last_date,
+                    (SELECT m.type FROM maintenance m
+                     WHERE m.equipment_id = r.id AND m.maintenance_date = r.last_date
+                     LIMIT 1) AS last_type,
+                    r.interval_days,
+                    (SELECT MIN(p.planned_date) FROM planned_maintenance p
+                     WHERE p.equipment_id = r.id) AS planned_date,
+                    CAST(julianday(:today) - julianday(COALESCE(r.last_date, r.purchase_date))
+                         AS INTEGER) AS days_since,
+                    CASE
+                        WHEN r.last_date IS NULL THEN :today
+                        ELSE date(r.last_date, '+' || r.interval_days || ' days')
+                    END AS next_date
+                FROM resolved r
+                WHERE CASE
+                          WHEN r.last_date IS NULL THEN r.purchase_date <= r.first_cutoff
+                          ELSE r.last_date <= r.due_cutoff
+                      END
+            )
+            SELECT
+                *,
+                CASE
+                    WHEN last_date IS NULL THEN 'Требуется первое ТО'
+                    WHEN next_date <= :today THEN 'Требуется ТО'
+                    ELSE 'Запланировано'
+                END AS status
+            FROM schedule
+            -- Некорректные даты пропускаются
+            WHERE days_since IS NOT NULL AND next_date IS NOT NULL
+            ORDER BY next_date, inventory_number
+        """, {
+            'default_interval': default_interval,
+            'default_due_cutoff': (horizon - timedelta(days=default_interval)).isoformat(),
+            'default_first_cutoff': (today_date - timedelta(days=default_interval)).isoformat(),
+            'category': category,
+            'equipment_ids': json.dumps(equipment_ids),
+            'today': today
+        })
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    # План ТО с учетом мощности бригад
+    def save_maintenance_plan(self, plan: List[Dict]):
+        """Сохранить план ТО, заменив предыдущий.
+        plan - записи с полями equipment_id, planned_date, due_date, team
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM planned_maintenance")
+            cursor.executemany("""
+                INSERT INTO planned_maintenance (equipment_id, planned_date, due_date, team)
+                VALUES (?, ?, ?, ?)
+            """, [(item['equipment_id'], item['planned_date'], item['due_date'], item.get('team'))
+                  for item in plan])
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._notify('planned_maintenance', 'insert', None)
+    
+    def get_planned_maintenance(self, start_date: str = None, end_date: str = None) -> List[Dict]:
+        """Получить план ТО (с данными оборудования) за период"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        query = """
+            SELECT p.*, e.inventory_number, e.name, e.category
+            FROM planned_maintenance p
+            JOIN equipment e ON p.equipment_id = e.id
+        """
+        params = ()
+        if start_date and end_date:
+            query += " WHERE p.planned_date BETWEEN ? AND ?"
+            params = (start_date, end_date)
+        query += " ORDER BY p.planned_date, p.team, p.due_date"
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def get_planned_load(self, start_date: str, end_date: str) -> List[Dict]:
+        """Количество запланированных ТО по дням и бригадам за период"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT planned_date, team, COUNT(*) AS planned_count
+            FROM planned_maintenance
+            WHERE planned_date BETWEEN ? AND ?
+            GROUP BY planned_date, team
+            ORDER BY planned_date, team
+        """, (start_date, end_date))
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    # Предрассчитанный список предстоящего ТО
+    def refresh_maintenance_due(self, days_ahead: int = 365, default_interval: int = 90,
+                                today: str = None) -> int:
+        """Пересчитать список предстоящего ТО в таблицу maintenance_due.
+        Возвращает количество записей. Подписчики не оповещаются: метод
+        предназначен для вызова из фонового потока или отдельного процесса
+        """
+        if today is None:
+            today = date.today().isoformat()
+        
+        # Версия правил и позиция в очереди изменений запоминаются до расчета:
+        # изменения, сделанные во время расчета, останутся непримененными
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT data_version, (SELECT COALESCE(MAX(id), 0) FROM maintenance_due_dirty) AS last_change
+            FROM maintenance_due_state WHERE id = 1
+        """)
+        data_version, last_change = cursor.fetchone()
+        conn.close()
+        schedule = self.get_maintenance_schedule(days_ahead=days_ahead,
+                                                 default_interval=default_interval,
+                                                 today=today)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM maintenance_due")
+            self._insert_maintenance_due(cursor, schedule)
+            cursor.execute("DELETE FROM maintenance_due_dirty WHERE id <= ?", (last_change,))
+            cursor.execute("""
+                UPDATE maintenance_due_state
+                SET computed_version = ?, computed_at = ?, as_of = ?,
+                    days_ahead = ?, default_interval = ?
+                WHERE id = 1
+            """, (data_version, datetime.now().isoformat(sep=' ', timespec='seconds'), today,
+                  days_ahead, default_interval))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return len(schedule)
+    
+    @staticmethod
+    def _insert_maintenance_due(cursor, schedule: List[Dict]):
+        """Записать строки расчета get_maintenance_schedule в maintenance_due"""
+        cursor.executemany("""
+            INSERT OR REPLACE INTO maintenance_due
+            (equipment_id, last_date, last_type, interval_days, days_since, next_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(item['id'], item['last_date'], item['last_type'], item['interval_days'],
+               item['days_since'], item['next_date'], item['status'])
+              for item in schedule])
+    
+    def apply_maintenance_due_changes(self, notify: bool = True) -> List[int]:
+        """Пересчитать в maintenance_due только оборудование из очереди изменений
+        (его обслуживание, категория или дата покупки изменились после расчета).
+        Выполняется, только если остальной список актуален - иначе он будет
+        полностью пересчитан фоновым заданием. Возвращает ID пересчитанного оборудования;
+        при notify подписчики получают ('maintenance_due', 'update', ID) для каждого
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM maintenance_due_state WHERE id = 1")
+        state = dict(cursor.fetchone())
+        if not self.is_maintenance_due_current(state):
+            conn.close()
+            return []
+        cursor.execute("SELECT id, equipment_id FROM maintenance_due_dirty")
+        changes = cursor.fetchall()
+        conn.close()
+        if not changes:
+            return []
+        
+        last_change = max(change['id'] for change in changes)
+        equipment_ids = sorted({change['equipment_id'] for change in changes})
+        schedule = self.get_maintenance_schedule(days_ahead=state['days_ahead'],
+                                                 default_interval=state['default_interval'],
+                                                 today=state['as_of'],
+                                                 equipment_ids=equipment_ids)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            # Оборудование, срок которого вышел за горизонт, удаляется из списка
+            cursor.execute("""
+                DELETE FROM maintenance_due
+                WHERE equipment_id IN (SELECT value FROM json_each(?))
+            """, (json.dumps(equipment_ids),))
+            self._insert_maintenance_due(cursor, schedule)
+            cursor.execute("DELETE FROM maintenance_due_dirty WHERE id <= ?", (last_change,))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        if notify:
+            for equipment_id in equipment_ids:
+                self._notify('maintenance_due', 'update', equipment_id)
+        return equipment_ids
+    
+    def get_maintenance_due_state(self) -> Dict:
+        """Версия данных, параметры и время последнего расчета списка предстоящего ТО
+        (computed_at пустое, если расчет еще не выполнялся)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM maintenance_due_state WHERE id = 1")
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row)
+    
+    @staticmethod
+    def is_maintenance_due_current(state: Dict, today: str = None,
+                                   days_ahead: int = None, default_interval: int = None) -> bool:
+        """Подходит ли расчет с параметрами state для запроса: рассчитан сегодня,
+        после расчета данные не менялись, горизонт не меньше запрошенного
+        и интервал по умолчанию тот же
+        """
+        if state['computed_version'] != state['data_version']:
+            return False
+        if state['as_of'] != (today or date.today().isoformat()):
+            return False
+        if days_ahead is not None and days_ahead > state['days_ahead']:
+            return False
+        return default_interval is None or default_interval == state['default_interval']
+    
+    def get_maintenance_due(self, days_ahead: int = 30, default_interval: int = 90,
+                            category: str = None, today: str = None,
+                            equipment_id: int = None) -> Optional[List[Dict]]:
+        """Предстоящее ТО из предрассчитанного списка в формате get_maintenance_schedule
+        (equipment_id - только запись указанного оборудования).
+        Возвращает None, если актуального расчета с подходящими параметрами нет -
+        тогда список нужно считать запросом get_maintenance_schedule
+        """
+        if today is None:
+            today = date.today().isoformat()
+        horizon = (date.fromisoformat(today) + timedelta(days=days_ahead)).isoformat()
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM maintenance_due_state WHERE id = 1")
+        state = dict(cursor.fetchone())
+        if not self.is_maintenance_due_current(state, today, days_ahead, default_interval):
+            conn.close()
+            return None
+        
+        cursor.execute("""
+            SELECT
+                e.id,
+                e.inventory_number,
+                e.name,
+                e.category,
+                d.last_date,
+                d.last_type,
+                d.interval_days,
+                (SELECT MIN(p.planned_date) FROM planned_maintenance p
+                 WHERE p.equipment_id = e.id) AS planned_date,
+                d.days_since,
+                d.next_date,
+                d.status
+            FROM maintenance_due d
+            JOIN equipment e ON e.id = d.equipment_id
+            WHERE d.next_date <= :horizon
+              AND (:category IS NULL OR e.category = :category)
+              AND (:equipment_id IS NULL OR d.equipment_id = :equipment_id)
+            ORDER BY d.next_date, e.inventory_number
+        """, {'horizon': horizon, 'category': category, 'equipment_id': equipment_id})
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def get_due_counts(self, upcoming_days: int = 30) -> Dict:
+        """Сводка по предрассчитанному списку: просроченное ТО (overdue), оборудование
+        без ТО (first), ТО в ближайшие upcoming_days дней (upcoming), а также время
+        расчета computed_at и признак актуальности current
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM maintenance_due_state WHERE id = 1")
+        state = dict(cursor.fetchone())
+        if state['computed_at'] is None:
+            conn.close()
+            return {'overdue': 0, 'first': 0, 'upcoming': 0,
+                    'computed_at': None, 'current': False}
+        
+        horizon = (date.fromisoformat(state['as_of']) + timedelta(days=upcoming_days)).isoformat()
+        cursor.execute("""
+            SELECT
+                COALESCE(SUM(status = 'Требуется ТО'), 0) AS overdue,
+                COALESCE(SUM(status = 'Требуется первое ТО'), 0) AS first,
+                COALESCE(SUM(status = 'Запланировано' AND next_date <= ?), 0) AS upcoming
+            FROM maintenance_due
+        """, (horizon,))
+        counts = dict(cursor.fetchone())
+        conn.close()
+        counts['computed_at'] = state['computed_at']
+        counts['current'] = self.is_maintenance_due_current(state)
+        return counts
+    
+    def get_next_due(self, limit: int = 10, after: str = None) -> List[Dict]:
+        """Ближайшие limit сроков ТО начиная с даты after (по умолчанию - сегодня)
+        из предрассчитанного списка. Поиск идет по индексу next_date, поэтому время
+        запроса зависит от limit, а не от количества оборудования
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT d.equipment_id AS id, e.inventory_number, e.name, e.category,
+                   d.next_date, d.status
+            FROM maintenance_due d
+            JOIN equipment e ON e.id = d.equipment_id
+            WHERE d.next_date >= ?
+            ORDER BY d.next_date, d.equipment_id
+            LIMIT ?
+        """, (after or date.today().isoformat(), limit))
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    # Данные для прогноза обслуживания
+    def get_forecast_inputs(self) -> Dict[str, List]:
+        """Данные оборудования для прогноза ТО по колонкам (для векторных расчетов):
+        id, category, department (текущее назначение), purchase_date, last_date, last_type.
+        Списанное оборудование не включается, некорректные даты заменяются на NULL
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                p.id,
+                p.category,
+                (SELECT a.department FROM assignments a
+                 WHERE a.equipment_id = p.id AND a.end_date IS NULL
+                 ORDER BY a.start_date DESC LIMIT 1) AS department,
+                date(p.purchase_date) AS purchase_date,
+                date(p.last_date) AS last_date,
+                (SELECT m.type FROM maintenance m
+                 WHERE m.equipment_id = p.id AND m.maintenance_date = p.last_date
+                 LIMIT 1) AS last_type
+            FROM (
+                SELECT
+                    e.id,
+                    e.category,
+                    e.purchase_date,
+                    (SELECT MAX(m.maintenance_date) FROM maintenance m
+                     WHERE m.equipment_id = e.id) AS last_date
+                FROM equipment e
+                WHERE e.status IS NULL OR e.status != 'written_off'
+                -- Подзапрос выполняется отдельно, поэтому MAX(maintenance_date)
+                -- вычисляется один раз на строку
+                LIMIT -1 OFFSET 0
+            ) p
+        """)
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+        conn.close()
+        return {column: [row[index] for row in rows] for index, column in enumerate(columns)}
+    
+    def get_maintenance_cost_averages(self) -> List[Dict]:
+        """Средняя стоимость обслуживания по категориям оборудования и типам ТО"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                e.category,
+                m.type,
+                COUNT(*) AS maintenance_count,
+                AVG(CAST(m.cost AS REAL)) AS avg_cost
+            FROM maintenance m
+            JOIN equipment e ON m.equipment_id = e.id
+            GROUP BY e.category, m.type
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
@@ -0,0 +1,6 @@
+"""
+EquipmentTracker без графического интерфейса: отчеты, экспорт, импорт,
+резервное копирование и фоновые задания из командной строки
+
+    python -m equipmenttracker --help
+"""
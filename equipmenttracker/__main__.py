@@ -0,0 +1,10 @@
+"""
+Запуск командной строки: python -m equipmenttracker
+"""
+import sys
+
+from equipmenttracker.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Командная строка EquipmentTracker.
+
+Модуль не импортирует Qt: использует те же Database, итераторы записей
+и модули выгрузки (utils/stream_export.py, utils/xlsx_writer.py), что и интерфейс.
+Отчеты и экспорт пишутся потоком в файл (CSV или XLSX по расширению)
+или в стандартный вывод (CSV):
+
+    python -m equipmenttracker report depreciation --period 2025-12 -o depreciation.xlsx
+    python -m equipmenttracker report maintenance --start 2025-01-01 --end 2025-12-31
+    python -m equipmenttracker report pivot --rows category --columns month --measure maintenance_cost
+    python -m equipmenttracker report tco --period 2025-12 -o tco.xlsx
+    python -m equipmenttracker export equipment -o equipment.csv
+    python -m equipmenttracker import equipment new_equipment.csv
+    python -m equipmenttracker backup create --dir backups
+    python -m equipmenttracker schedule --once
+"""
+import argparse
+import io
+import os
+import sqlite3
+import sys
+from typing import Iterable, List, Sequence, Tuple
+
+from database import Database
+from utils.pivot import DIMENSIONS, MEASURES, pivot_table
+from utils.stream_export import (DEPRECIATION_EXPORT_COLUMNS, EQUIPMENT_EXPORT_COLUMNS,
+                                 MAINTENANCE_EXPORT_COLUMNS, write_csv_stream, write_file)
+
+
+# Колонки сводки по стоимости содержания
+COST_SUMMARY_COLUMNS = [
+    ("Начало периода", 'start_date', 'date'),
+    ("Конец периода", 'end_date', 'date'),
+    ("Всего обслуживаний", 'total_maintenances', 'int'),
+    ("Общая стоимость", 'total_cost', 'money'),
+    ("Средняя стоимость", 'avg_cost', 'money'),
+    ("Минимальная стоимость", 'min_cost', 'money'),
+    ("Максимальная стоимость", 'max_cost', 'money')
+]
+
+# Значение --output для записи в стандартный вывод
+STDOUT = '-'
+
+
+def write_rows(rows: Iterable, columns: Sequence[Tuple], output: str) -> int:
+    """Записать записи в файл или в стандартный вывод. Возвращает количество строк"""
+    if output == STDOUT:
+        stream = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+        try:
+            return write_csv_stream(rows, columns, stream)
+        finally:
+            stream.flush()
+            stream.detach()
+    count = write_file(rows, columns, output)
+    print(f"Записано строк: {count} ({output})", file=sys.stderr)
+    return count
+
+
+def report_depreciation(db: Database, args: argparse.Namespace) -> int:
+    """Отчет по амортизации на конец периода"""
+    write_rows(db.iter_depreciation_report(args.period), DEPRECIATION_EXPORT_COLUMNS, args.output)
+    return 0
+
+
+def report_maintenance(db: Database, args: argparse.Namespace) -> int:
+    """Отчет по техническому обслуживанию за период"""
+    write_rows(db.iter_maintenance_report(args.start, args.end),
+               MAINTENANCE_EXPORT_COLUMNS, args.output)
+    return 0
+
+
+def report_cost(db: Database, args: argparse.Namespace) -> int:
+    """Сводка по стоимости содержания за период"""
+    summary = dict(db.get_maintenance_cost_report(args.start, args.end),
+                   start_date=args.start, end_date=args.end)
+    write_rows([summary], COST_SUMMARY_COLUMNS, args.output)
+    return 0
+
+
+def report_pivot(db: Database, args: argparse.Namespace) -> int:
+    """Сводный отчет: строки и колонки по измерениям, ячейки - показатель"""
+    dimensions = args.rows + ([args.columns] if args.columns else [])
+    records = db.get_pivot_report(dimensions, [args.measure], args.start_month, args.end_month)
+    columns, rows = pivot_table(records, args.rows, args.columns, args.measure)
+    write_rows(rows, columns, args.output)
+    return 0
+
+
+def report_tco(db: Database, args: argparse.Namespace) -> int:
+    """Стоимость владения оборудованием (всем или одной единицей)"""
+    report = db.get_tco_report(args.period)
+    write_rows(db.iter_tco_report(report, args.inventory_number), report.columns(), args.output)
+    return 0
+
+
+def export_equipment(db: Database, args: argparse.Namespace) -> int:
+    """Экспорт реестра оборудования"""
+    write_rows(db.iter_equipment(), EQUIPMENT_EXPORT_COLUMNS, args.output)
+    return 0
+
+
+def export_maintenance(db: Database, args: argparse.Namespace) -> int:
+    """Экспорт всей истории обслуживания"""
+    write_rows(db.iter_maintenance_report(), MAINTENANCE_EXPORT_COLUMNS, args.output)
+    return 0
+
+
+def import_equipment(db: Database, args: argparse.Namespace) -> int:
+    """Импорт оборудования из CSV (с --atomic - все или ничего). Код возврата 1, если были ошибки.
+    Выводятся первые сообщения и путь к файлу со всеми сообщениями
+    """
+    from utils.import_data import ImportDiagnostics, ImportManager
+    progress = None
+    if sys.stderr.isatty():
+        def progress(state):
+            print(f"\r{state.text()}", end="", file=sys.stderr, flush=True)
+    diagnostics = ImportDiagnostics(args.log)
+    imported, diagnostics = ImportManager.import_equipment_file(db, args.file, args.atomic,
+                                                                diagnostics, progress,
+                                                                workers=args.workers)
+    if progress:
+        print(file=sys.stderr)
+    for message in diagnostics.warnings:
+        print(f"Предупреждение: {message}", file=sys.stderr)
+    for message in diagnostics.errors:
+        print(f"Ошибка: {message}", file=sys.stderr)
+    print(f"Успешно импортировано: {imported}; предупреждений: {diagnostics.warning_count}, "
+          f"ошибок: {diagnostics.error_count}", file=sys.stderr)
+    if diagnostics.path:
+        print(f"Все сообщения: {diagnostics.path}", file=sys.stderr)
+    return 1 if diagnostics.error_count else 0
+
+
+def backup_create(db: Database, args: argparse.Namespace) -> int:
+    """Резервная копия базы данных"""
+    from utils.backup import BackupManager
+    from utils.logger import app_logger
+    try:
+        backup_path = BackupManager.create_backup(db.db_path, args.dir)
+    except Exception as e:
+        app_logger.log_error("Создание резервной копии", str(e))
+        print(e, file=sys.stderr)
+        return 1
+    app_logger.log_backup_action("Создана", backup_path)
+    print(backup_path)
+    return 0
+
+
+def backup_restore(db: Database, args: argparse.Namespace) -> int:
+    """Восстановление базы данных из резервной копии (текущая база сначала копируется)"""
+    from utils.backup import BackupManager
+    from utils.logger import app_logger
+    try:
+        current_backup = BackupManager.create_backup(db.db_path, args.dir)
+        BackupManager.restore_backup(args.file, db.db_path)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    # Копия могла быть создана до появления новых таблиц
+    db.init_database()
+    app_logger.log_backup_action("Восстановлена", args.file)
+    print(f"База данных восстановлена, текущая БД сохранена в: {current_backup}", file=sys.stderr)
+    return 0
+
+
+def schedule(db: Database, args: argparse.Namespace) -> int:
+    """Пересчет списка предстоящего ТО (utils/due_scheduler.py)"""
+    from utils import due_scheduler
+    return due_scheduler.run(db, args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Разбор параметров командной строки"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default="equipment.db", help="путь к базе данных")
+
+    def output_argument(parser: argparse.ArgumentParser):
+        parser.add_argument("-o", "--output", default=STDOUT,
+                            help="файл .csv или .xlsx (по умолчанию CSV в стандартный вывод)")
+
+    def period_arguments(parser: argparse.ArgumentParser):
+        parser.add_argument("--start", help="начало периода ГГГГ-ММ-ДД")
+        parser.add_argument("--end", help="конец периода ГГГГ-ММ-ДД")
+
+    parser = argparse.ArgumentParser(
+        prog="equipmenttracker",
+        description="EquipmentTracker без графического интерфейса"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="отчеты").add_subparsers(dest="report", required=True)
+    command = report.add_parser("depreciation", parents=[common], help="амортизация на конец периода")
+    command.add_argument("--period", help="период ГГГГ-ММ (по умолчанию текущий)")
+    output_argument(command)
+    command.set_defaults(handler=report_depreciation)
+    command = report.add_parser("maintenance", parents=[common], help="техническое обслуживание")
+    period_arguments(command)
+    output_argument(command)
+    command.set_defaults(handler=report_maintenance)
+    command = report.add_parser("cost", parents=[common], help="стоимость содержания")
+    period_arguments(command)
+    output_argument(command)
+    command.set_defaults(handler=report_cost)
+    command = report.add_parser("pivot", parents=[common], help="сводный отчет")
+    command.add_argument("--rows", nargs="+", default=["category"], choices=list(DIMENSIONS),
+                         help="измерения строк (по умолчанию category)")
+    command.add_argument("--columns", choices=list(DIMENSIONS), help="измерение колонок")
+    command.add_argument("--measure", default="maintenance_cost", choices=list(MEASURES),
+                         help="показатель (по умолчанию maintenance_cost)")
+    command.add_argument("--start-month", help="первый месяц ТО ГГГГ-ММ")
+    command.add_argument("--end-month", help="последний месяц ТО ГГГГ-ММ")
+    output_argument(command)
+    command.set_defaults(handler=report_pivot)
+    command = report.add_parser("tco", parents=[common], help="стоимость владения")
+    command.add_argument("--period", help="период амортизации ГГГГ-ММ (по умолчанию текущий)")
+    command.add_argument("--inventory-number", help="только оборудование с этим инвентарным номером")
+    output_argument(command)
+    command.set_defaults(handler=report_tco)
+
+    export = commands.add_parser("export", help="экспорт данных").add_subparsers(dest="export", required=True)
+    command = export.add_parser("equipment", parents=[common], help="реестр оборудования")
+    output_argument(command)
+    command.set_defaults(handler=export_equipment)
+    command = export.add_parser("maintenance", parents=[common], help="история обслуживания")
+    output_argument(command)
+    command.set_defaults(handler=export_maintenance)
+
+    imports = commands.add_parser("import", help="импорт данных").add_subparsers(dest="import", required=True)
+    command = imports.add_parser("equipment", parents=[common], help="оборудование из CSV")
+    command.add_argument("file", help="CSV файл")
+    command.add_argument("--atomic", action="store_true",
+                         help="при любой ошибке не добавлять ничего")
+    command.add_argument("--log", help="файл для всех сообщений импорта (по умолчанию временный)")
+    command.add_argument("--workers", type=int,
+                         help="процессов разбора файла (по умолчанию по числу ядер)")
+    command.set_defaults(handler=import_equipment)
+
+    backup = commands.add_parser("backup", help="резервное копирование").add_subparsers(dest="backup", required=True)
+    command = backup.add_parser("create", parents=[common], help="создать резервную копию")
+    command.add_argument("--dir", default="backups", help="каталог резервных копий")
+    command.set_defaults(handler=backup_create)
+    command = backup.add_parser("restore", parents=[common], help="восстановить из резервной копии")
+    command.add_argument("file", help="файл резервной копии")
+    command.add_argument("--dir", default="backups", help="каталог копии текущей базы")
+    command.set_defaults(handler=backup_restore)
+
+    from utils.due_scheduler import add_arguments
+    command = commands.add_parser("schedule", parents=[common],
+                                  help="пересчет списка предстоящего ТО")
+    add_arguments(command)
+    command.set_defaults(handler=schedule)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    """Точка входа командной строки"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(Database(args.db), args)
+    except BrokenPipeError:
+        # Вывод прерван (например, head): остаток не пишем
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
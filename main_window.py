@@ -3,27 +3,42 @@
 """
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QTabWidget, QStatusBar, QMessageBox, QMenuBar, QMenu)
-from PyQt6.QtCore import Qt
+import threading
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QIcon, QAction
 from utils.backup import BackupManager
+from utils.due_scheduler import MaintenanceDueJob
 from utils.logger import app_logger
 from utils.styles import ModernStyles
 from database import Database
+from models.equipment_list_model import EquipmentListModel
 from widgets.equipment_widget import EquipmentWidget
 from widgets.maintenance_widget import MaintenanceWidget
 from widgets.assignments_widget import AssignmentsWidget
 from widgets.reports_widget import ReportsWidget
 from widgets.dashboard_widget import DashboardWidget
 from widgets.maintenance_scheduler_widget import MaintenanceSchedulerWidget
+from widgets.lazy_tab import LazyTab
 
 
 class MainWindow(QMainWindow):
     """Главное окно приложения"""
     
+    # Фоновый пересчет списка предстоящего ТО завершен
+    due_list_refreshed = pyqtSignal()
+    
+    # Период проверки актуальности списка предстоящего ТО и задержка
+    # пересчета после изменения данных, мс
+    DUE_POLL_INTERVAL = 60_000
+    DUE_CHANGE_DELAY = 2_000
+    
     def __init__(self):
         super().__init__()
-        self.db = Database()
+        self.db = Database(persist_reports=True)
+        # Общая модель списка оборудования для всех выпадающих списков
+        self.equipment_model = EquipmentListModel(self.db, self)
         self.init_ui()
+        self.init_due_job()
     
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
@@ -84,29 +99,43 @@ class MainWindow(QMainWindow):
         """)
         main_layout.addWidget(self.tabs)
         
+        # Вкладки создаются при первом открытии, а скрытые вкладки
+        # обновляются только когда становятся видимыми
+        
         # Вкладка "Дашборд"
-        self.dashboard_widget = DashboardWidget(self.db)
-        self.tabs.addTab(self.dashboard_widget, "📊 Дашборд")
+        self.dashboard_tab = LazyTab(lambda: DashboardWidget(self.db))
+        self.tabs.addTab(self.dashboard_tab, "📊 Дашборд")
         
         # Вкладка "Оборудование"
-        self.equipment_widget = EquipmentWidget(self.db)
-        self.tabs.addTab(self.equipment_widget, "📦 Реестр оборудования")
+        self.equipment_tab = LazyTab(
+            lambda: EquipmentWidget(self.db, self.equipment_model),
+            lambda widget: widget.equipment_updated.connect(self.on_equipment_updated)
+        )
+        self.tabs.addTab(self.equipment_tab, "📦 Реестр оборудования")
         
         # Вкладка "Техническое обслуживание"
-        self.maintenance_widget = MaintenanceWidget(self.db)
-        self.tabs.addTab(self.maintenance_widget, "🔧 Техническое обслуживание")
+        self.maintenance_tab = LazyTab(lambda: MaintenanceWidget(self.db, self.equipment_model))
+        self.tabs.addTab(self.maintenance_tab, "🔧 Техническое обслуживание")
         
         # Вкладка "Планировщик ТО"
-        self.scheduler_widget = MaintenanceSchedulerWidget(self.db)
-        self.tabs.addTab(self.scheduler_widget, "📅 Планировщик ТО")
+        self.scheduler_tab = LazyTab(lambda: MaintenanceSchedulerWidget(self.db))
+        self.tabs.addTab(self.scheduler_tab, "📅 Планировщик ТО")
         
         # Вкладка "Перемещения"
-        self.assignments_widget = AssignmentsWidget(self.db)
-        self.tabs.addTab(self.assignments_widget, "👥 История перемещений")
+        self.assignments_tab = LazyTab(
+            lambda: AssignmentsWidget(self.db, self.equipment_model),
+            lambda widget: widget.assignment_updated.connect(self.on_assignment_updated)
+        )
+        self.tabs.addTab(self.assignments_tab, "👥 История перемещений")
         
         # Вкладка "Отчеты"
-        self.reports_widget = ReportsWidget(self.db)
-        self.tabs.addTab(self.reports_widget, "📊 Отчеты")
+        self.reports_tab = LazyTab(lambda: ReportsWidget(self.db))
+        self.tabs.addTab(self.reports_tab, "📊 Отчеты")
+        
+        self.lazy_tabs = [
+            self.dashboard_tab, self.equipment_tab, self.maintenance_tab,
+            self.scheduler_tab, self.assignments_tab, self.reports_tab
+        ]
         
         # Меню
         self.create_menu()
@@ -125,10 +154,61 @@ class MainWindow(QMainWindow):
             }
         """)
         self.statusBar().showMessage("✅ Готово к работе")
+    
+    def init_due_job(self):
+        """Запуск периодического пересчета списка предстоящего ТО в фоновом потоке"""
+        self.due_job = MaintenanceDueJob(self.db)
+        self._due_thread = None
+        self.due_list_refreshed.connect(self.on_due_list_refreshed)
+        
+        self.due_timer = QTimer(self)
+        self.due_timer.setInterval(self.DUE_POLL_INTERVAL)
+        self.due_timer.timeout.connect(self.refresh_due_list)
+        self.due_timer.start()
         
-        # Подключаем сигналы для обновления данных между вкладками
-        self.equipment_widget.equipment_updated.connect(self.on_equipment_updated)
-        self.assignments_widget.assignment_updated.connect(self.on_assignment_updated)
+        # Серия изменений данных приводит к одному пересчету
+        self.due_change_timer = QTimer(self)
+        self.due_change_timer.setSingleShot(True)
+        self.due_change_timer.setInterval(self.DUE_CHANGE_DELAY)
+        self.due_change_timer.timeout.connect(self.refresh_due_list)
+        self.db.add_change_listener(self.on_data_changed)
+        
+        QTimer.singleShot(0, self.refresh_due_list)
+    
+    def on_data_changed(self, table: str, action: str, record_id):
+        """Изменения обслуживания и оборудования применяются к списку предстоящего ТО
+        построчно при записи; после изменения правил список пересчитывается полностью
+        """
+        if table == 'maintenance_rules':
+            self.due_change_timer.start()
+        elif table == 'maintenance_due':
+            dashboard = self.dashboard_tab.content
+            if dashboard is not None:
+                dashboard.refresh_due_counts()
+    
+    def refresh_due_list(self):
+        """Пересчитать список предстоящего ТО в фоновом потоке, если он устарел"""
+        if self._due_thread is not None and self._due_thread.is_alive():
+            # Идущий расчет мог не учесть последние изменения - проверим позже
+            self.due_change_timer.start()
+            return
+        self._due_thread = threading.Thread(target=self._run_due_job, daemon=True)
+        self._due_thread.start()
+    
+    def _run_due_job(self):
+        """Тело фонового потока: виджеты не затрагиваются, результат передается сигналом"""
+        try:
+            if self.due_job.run_once() is not None:
+                self.due_list_refreshed.emit()
+        except Exception as e:
+            app_logger.log_error("Пересчет списка предстоящего ТО", str(e))
+    
+    def on_due_list_refreshed(self):
+        """Обновить сводку сроков ТО на дашборде и планировщик"""
+        dashboard = self.dashboard_tab.content
+        if dashboard is not None:
+            dashboard.refresh_due_counts()
+        self.scheduler_tab.mark_dirty()
     
     def create_menu(self):
         """Создать меню приложения"""
@@ -190,6 +270,8 @@ class MainWindow(QMainWindow):
                     current_backup = BackupManager.create_backup(self.db.db_path)
                     
                     BackupManager.restore_backup(backup_path, self.db.db_path)
+                    # Копия могла быть создана до появления новых таблиц
+                    self.db.init_database()
                     app_logger.log_backup_action("Восстановлена", backup_path)
                     
                     QMessageBox.information(
@@ -198,13 +280,10 @@ class MainWindow(QMainWindow):
                         f"Текущая БД сохранена в: {current_backup}"
                     )
                     
-                    # Перезагружаем все виджеты
-                    self.equipment_widget.refresh_data()
-                    self.maintenance_widget.refresh_data()
-                    self.assignments_widget.refresh_data()
-                    self.reports_widget.refresh_data()
-                    self.dashboard_widget.refresh_data()
-                    self.scheduler_widget.refresh_data()
+                    # Перезагружаем все открытые вкладки
+                    for tab in self.lazy_tabs:
+                        tab.mark_dirty()
+                    self.refresh_due_list()
                     
                     self.statusBar().showMessage("База данных восстановлена", 5000)
                 except Exception as e:
@@ -212,18 +291,18 @@ class MainWindow(QMainWindow):
     
     def on_equipment_updated(self):
         """Обработчик обновления оборудования"""
-        self.dashboard_widget.refresh_data()
-        self.maintenance_widget.refresh_equipment_list()
-        self.assignments_widget.refresh_equipment_list()
-        self.reports_widget.refresh_data()
-        self.scheduler_widget.refresh_data()
+        self.dashboard_tab.mark_dirty()
+        self.maintenance_tab.mark_dirty()
+        self.assignments_tab.mark_dirty()
+        self.reports_tab.mark_dirty()
+        self.scheduler_tab.mark_dirty()
         self.statusBar().showMessage("Данные обновлены", 2000)
     
     def on_assignment_updated(self):
         """Обработчик обновления назначений"""
-        self.dashboard_widget.refresh_data()
-        self.equipment_widget.refresh_data()
-        self.reports_widget.refresh_data()
+        self.dashboard_tab.mark_dirty()
+        self.equipment_tab.mark_dirty()
+        self.reports_tab.mark_dirty()
         self.statusBar().showMessage("Данные обновлены", 2000)
     
     def closeEvent(self, event):
@@ -0,0 +1,3 @@
+"""
+Модели данных Qt для EquipmentTracker
+"""
@@ -0,0 +1,157 @@
+"""
+Общая модель списка оборудования для выпадающих списков и диалогов
+"""
+from bisect import bisect_left
+from functools import partial
+from typing import Dict, List, Optional
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from database import Database
+from utils.search_index import EquipmentSearchIndex
+
+
+class EquipmentListModel(QAbstractListModel):
+    """Список оборудования, отсортированный по инвентарному номеру.
+    Загружается один раз и обновляется построчно по уведомлениям Database
+    """
+    
+    IdRole = Qt.ItemDataRole.UserRole
+    
+    def __init__(self, db: Database, parent=None):
+        super().__init__(parent)
+        self.db = db
+        # Параллельные списки, отсортированные по инвентарному номеру
+        self._keys: List[str] = []
+        self._ids: List[int] = []
+        self._labels: List[str] = []
+        self._inventory_by_id: Dict[int, str] = {}
+        # Префиксный индекс для подсказок строится из тех же данных
+        self.search_index = EquipmentSearchIndex()
+        self.reload()
+        
+        db.add_change_listener(self.on_data_changed)
+        self.destroyed.connect(partial(db.remove_change_listener, self.on_data_changed))
+    
+    @staticmethod
+    def format_label(equipment: Dict) -> str:
+        """Текст элемента списка"""
+        return f"{equipment['inventory_number']} - {equipment['name']}"
+    
+    def reload(self):
+        """Полностью перезагрузить список из базы данных"""
+        self.beginResetModel()
+        equipment_list = self.db.get_equipment_names()
+        self._keys = [eq['inventory_number'] for eq in equipment_list]
+        self._ids = [eq['id'] for eq in equipment_list]
+        self._labels = [self.format_label(eq) for eq in equipment_list]
+        self._inventory_by_id = dict(zip(self._ids, self._keys))
+        self.search_index.build(equipment_list)
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._ids)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._labels[index.row()]
+        if role == self.IdRole:
+            return self._ids[index.row()]
+        return None
+    
+    def row_of(self, equipment_id: int) -> int:
+        """Номер строки оборудования (-1, если не найдено)"""
+        key = self._inventory_by_id.get(equipment_id)
+        if key is None:
+            return -1
+        return bisect_left(self._keys, key)
+    
+    def equipment_id(self, row: int) -> Optional[int]:
+        """ID оборудования в строке"""
+        if 0 <= row < len(self._ids):
+            return self._ids[row]
+        return None
+    
+    def label_of(self, equipment_id: int) -> Optional[str]:
+        """Текст элемента списка для оборудования"""
+        row = self.row_of(equipment_id)
+        return self._labels[row] if row >= 0 else None
+    
+    def inventory_number_of(self, equipment_id: int) -> Optional[str]:
+        """Инвентарный номер оборудования"""
+        return self._inventory_by_id.get(equipment_id)
+    
+    def on_data_changed(self, table: str, action: str, record_id: Optional[int]):
+        """Обработчик уведомлений об изменении данных"""
+        if table != 'equipment':
+            return
+        if record_id is None:
+            self.reload()
+        elif action == 'insert':
+            self._insert(record_id)
+        elif action == 'update':
+            self._update(record_id)
+        elif action == 'delete':
+            self._remove(record_id)
+    
+    def _insert(self, equipment_id: int):
+        """Добавить строку для нового оборудования"""
+        equipment = self.db.get_equipment_by_id(equipment_id)
+        if not equipment or equipment_id in self._inventory_by_id:
+            return
+        key = equipment['inventory_number']
+        row = bisect_left(self._keys, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._keys.insert(row, key)
+        self._ids.insert(row, equipment_id)
+        self._labels.insert(row, self.format_label(equipment))
+        self._inventory_by_id[equipment_id] = key
+        self.search_index.add(equipment_id, key, equipment['name'])
+        self.endInsertRows()
+    
+    def _update(self, equipment_id: int):
+        """Обновить строку, перемещая ее при смене инвентарного номера"""
+        row = self.row_of(equipment_id)
+        if row < 0:
+            self._insert(equipment_id)
+            return
+        equipment = self.db.get_equipment_by_id(equipment_id)
+        if not equipment:
+            self._remove(equipment_id)
+            return
+        
+        key = equipment['inventory_number']
+        label = self.format_label(equipment)
+        self.search_index.add(equipment_id, key, equipment['name'])
+        new_row = bisect_left(self._keys, key)
+        if new_row in (row, row + 1):
+            self._keys[row] = key
+            self._labels[row] = label
+            self._inventory_by_id[equipment_id] = key
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+            return
+        
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), new_row)
+        for values in (self._keys, self._ids, self._labels):
+            del values[row]
+        target = new_row - 1 if new_row > row else new_row
+        self._keys.insert(target, key)
+        self._ids.insert(target, equipment_id)
+        self._labels.insert(target, label)
+        self._inventory_by_id[equipment_id] = key
+        self.endMoveRows()
+    
+    def _remove(self, equipment_id: int):
+        """Удалить строку оборудования"""
+        row = self.row_of(equipment_id)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        for values in (self._keys, self._ids, self._labels):
+            del values[row]
+        del self._inventory_by_id[equipment_id]
+        self.search_index.remove(equipment_id)
+        self.endRemoveRows()
@@ -0,0 +1,44 @@
+"""
+Общие объекты оформления ячеек таблиц
+"""
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor, QFont
+from utils.styles import ModernStyles
+
+
+class Presentation:
+    """Шрифты, цвета и выравнивание для ячеек, создаваемые один раз на приложение"""
+    
+    _instance = None
+    
+    STATUS_COLORS = {
+        'active': ModernStyles.STATUS_ACTIVE,
+        'in_repair': ModernStyles.STATUS_REPAIR,
+        'written_off': ModernStyles.STATUS_WRITTEN_OFF,
+        'reserved': ModernStyles.STATUS_RESERVED
+    }
+    
+    def __init__(self):
+        self.status_font = QFont("Arial", 10, QFont.Weight.Bold)
+        self.status_brushes = {
+            status: QBrush(QColor(color)) for status, color in self.STATUS_COLORS.items()
+        }
+        self.default_status_brush = QBrush(QColor(ModernStyles.TEXT_SECONDARY))
+        self.due_brush = QBrush(Qt.GlobalColor.red)
+        self.planned_brush = QBrush(Qt.GlobalColor.blue)
+        self.number_alignment = (Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter).value
+    
+    @classmethod
+    def instance(cls) -> 'Presentation':
+        """Общий экземпляр (создается при первом обращении, после запуска QApplication)"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+    
+    def status_brush(self, status: str) -> QBrush:
+        """Цвет текста для статуса оборудования"""
+        return self.status_brushes.get(status, self.default_status_brush)
+    
+    def due_status_brush(self, status: str) -> QBrush:
+        """Цвет текста для статуса планового ТО"""
+        return self.due_brush if status and "Требуется" in status else self.planned_brush
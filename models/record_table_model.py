@@ -0,0 +1,248 @@
+"""
+Табличная модель записей с ленивым форматированием ячеек
+"""
+from typing import Callable, Dict, List, Optional
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from models.presentation import Presentation
+from utils.formatting import format_money, format_status, truncate_text, money_sort_key
+
+
+class Column:
+    """Описание колонки таблицы.
+    kind: 'text', 'int', 'money' (с символом рубля), 'money_plain', 'status', 'due' (статус ТО),
+    'truncated', 'date' (дата "ГГГГ-ММ-ДД", отображается как есть)
+    """
+    
+    def __init__(self, title: str, key: str = None, kind: str = 'text',
+                 value: Callable[[Dict], object] = None):
+        self.title = title
+        self.key = key
+        self.kind = kind
+        self.value = value
+    
+    def raw(self, record: Dict):
+        """Исходное значение ячейки"""
+        if self.value:
+            return self.value(record)
+        return record.get(self.key)
+    
+    def display(self, value) -> str:
+        """Текст ячейки"""
+        if self.kind == 'money':
+            return format_money(value)
+        if self.kind == 'money_plain':
+            return format_money(value, currency=False)
+        if self.kind == 'status':
+            return format_status(value)
+        if self.kind == 'truncated':
+            return truncate_text(value)
+        if self.kind == 'int':
+            return str(value or 0)
+        return '' if value is None else str(value)
+    
+    def sort_key(self, record: Dict):
+        """Ключ сортировки по исходному значению"""
+        value = self.raw(record)
+        if self.kind in ('money', 'money_plain'):
+            return money_sort_key(value)
+        if self.kind == 'int':
+            return value or 0
+        return '' if value is None else str(value)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Модель таблицы над списком словарей.
+    Ячейки форматируются в data() только для видимых строк
+    """
+    
+    RecordRole = Qt.ItemDataRole.UserRole
+    
+    def __init__(self, columns: List[Column], parent=None, id_key: str = 'id'):
+        super().__init__(parent)
+        self.columns = columns
+        self.id_key = id_key
+        self._records: List[Dict] = []
+        # Индекс ID -> строка, перестраивается лениво после вставок и удалений
+        self._row_by_id: Optional[Dict] = None
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._presentation = Presentation.instance()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._records)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section].title
+        return super().headerData(section, orientation, role)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self._records[index.row()]
+        column = self.columns[index.column()]
+        
+        if role == Qt.ItemDataRole.DisplayRole:
+            return column.display(column.raw(record))
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if column.kind in ('money', 'money_plain'):
+                return self._presentation.number_alignment
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column.kind == 'status':
+                return self._presentation.status_brush(column.raw(record))
+            if column.kind == 'due':
+                return self._presentation.due_status_brush(column.raw(record))
+        elif role == Qt.ItemDataRole.FontRole:
+            if column.kind == 'status':
+                return self._presentation.status_font
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            if column.kind == 'truncated':
+                return column.raw(record) or None
+        elif role == self.RecordRole:
+            return record
+        return None
+    
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Сортировка по исходным значениям колонки"""
+        self._sort_column = column
+        self._sort_order = order
+        if column < 0 or not self._records:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        tracked = [(self._records[index.row()], index.column()) for index in persistent]
+        
+        key = self.columns[column].sort_key
+        self._records.sort(key=key, reverse=order == Qt.SortOrder.DescendingOrder)
+        self._row_by_id = None
+        
+        # Сохраняем выделение и текущую строку при пересортировке
+        positions = {id(record): row for row, record in enumerate(self._records)}
+        self.changePersistentIndexList(
+            persistent,
+            [self.index(positions[id(record)], col) for record, col in tracked]
+        )
+        self.layoutChanged.emit()
+    
+    def set_records(self, records: List[Dict]):
+        """Заменить все записи модели"""
+        self.beginResetModel()
+        self._records = list(records)
+        if self._sort_column >= 0:
+            key = self.columns[self._sort_column].sort_key
+            self._records.sort(key=key, reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+        self._row_by_id = None
+        self.endResetModel()
+    
+    def record(self, row: int) -> Optional[Dict]:
+        """Запись в строке"""
+        if 0 <= row < len(self._records):
+            return self._records[row]
+        return None
+    
+    def records(self) -> List[Dict]:
+        """Все записи в порядке отображения"""
+        return self._records
+
+    
+    def row_of(self, record_id, hint: int = -1) -> int:
+        """Строка записи по ID (-1, если записи нет в модели).
+        hint - ожидаемая строка, например текущая строка таблицы
+        """
+        if 0 <= hint < len(self._records) and self._records[hint][self.id_key] == record_id:
+            return hint
+        if self._row_by_id is None:
+            self._row_by_id = {
+                record[self.id_key]: row for row, record in enumerate(self._records)
+            }
+        return self._row_by_id.get(record_id, -1)
+    
+    def _insert_position(self, record: Dict, records: List[Dict]) -> int:
+        """Позиция новой записи с учетом текущей сортировки"""
+        if self._sort_column < 0:
+            return len(records)
+        key = self.columns[self._sort_column].sort_key
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        value = key(record)
+        low, high = 0, len(records)
+        while low < high:
+            middle = (low + high) // 2
+            other = key(records[middle])
+            if (other < value) if descending else (value < other):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+    
+    def insert_record(self, record: Dict) -> int:
+        """Добавить запись, не перезагружая модель. Возвращает номер строки"""
+        row = self._insert_position(record, self._records)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._records.insert(row, record)
+        self._row_by_id = None
+        self.endInsertRows()
+        return row
+    
+    def update_record(self, record: Dict, hint: int = -1) -> int:
+        """Заменить запись с тем же ID, перемещая строку при изменении порядка сортировки.
+        Возвращает новый номер строки (-1, если записи нет в модели)
+        """
+        row = self.row_of(record[self.id_key], hint)
+        if row < 0:
+            return -1
+        
+        others = self._records[:row] + self._records[row + 1:]
+        new_row = self._insert_position(record, others) if self._sort_column >= 0 else row
+        if new_row == row:
+            self._records[row] = record
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+            return row
+        
+        # Для beginMoveRows позиция указывается до удаления строки
+        destination = new_row + 1 if new_row > row else new_row
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+        del self._records[row]
+        self._records.insert(new_row, record)
+        self._row_by_id = None
+        self.endMoveRows()
+        return new_row
+    
+    def remove_record(self, record_id, hint: int = -1) -> bool:
+        """Удалить запись по ID"""
+        row = self.row_of(record_id, hint)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._records[row]
+        self._row_by_id = None
+        self.endRemoveRows()
+        return True
+
+
+def equipment_label(record: Dict) -> str:
+    """Оборудование записи в виде "инвентарный номер - наименование\""""
+    return f"{record.get('inventory_number', '')} - {record.get('name', '')}"
+
+
+def maintenance_columns() -> List[Column]:
+    """Колонки таблиц обслуживания (вкладка ТО и отчеты)"""
+    return [
+        Column("ID", 'id', 'int'),
+        Column("Оборудование", value=equipment_label),
+        Column("Дата", 'maintenance_date'),
+        Column("Тип", 'type'),
+        Column("Стоимость", 'cost', 'money'),
+        Column("Описание", 'description', 'truncated')
+    ]
+
+
+def maintenance_report_columns() -> List[Column]:
+    """Колонки постраничных отчетов по обслуживанию: с нарастающим итогом стоимости"""
+    return maintenance_columns() + [Column("Нарастающий итог", 'running_cost', 'money')]
@@ -0,0 +1,86 @@
+"""
+Параллельный разбор импорта дает те же записи и замечания, что и последовательный
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import utils.import_data as import_data
+from utils.import_data import iter_records, iter_records_parallel, record_boundaries
+
+
+def _write(lines, newline):
+    """CSV файл с меткой порядка байтов из строк lines"""
+    handle, path = tempfile.mkstemp(suffix=".csv")
+    with open(handle, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(newline.join(lines) + newline)
+    return path
+
+
+def _lines(newline):
+    """Строки с кавычкой в середине поля, многострочными значениями и "" внутри кавычек"""
+    lines = ['"Инвентарный номер";Наименование;Категория;Цена покупки']
+    for i in range(400):
+        if i % 53 == 10:
+            lines.append(f'INV{i};Монитор 24";Мониторы;100')
+        elif i % 37 == 0:
+            lines.append(f'INV{i};"многострочный{newline}""имя"" {i}";"Кат;1";x')
+        elif i % 41 == 0:
+            lines.append(f';"без номера {i}";Кат;')
+        else:
+            lines.append(f'INV{i};Имя {i};Кат;{i},5')
+    return lines
+
+
+class ParallelImportTest(unittest.TestCase):
+
+    def _compare(self, path, chunk_bytes):
+        serial_warnings, parallel_warnings = [], []
+        serial = list(iter_records(path, lambda *args: serial_warnings.append(args),
+                                   lambda rows, read: None))
+        parallel = list(iter_records_parallel(path, 2, lambda *args: parallel_warnings.append(args),
+                                              lambda rows, read: None, chunk_bytes))
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial_warnings, parallel_warnings)
+        return serial
+
+    def test_parallel_matches_serial(self):
+        for newline in ('\n', '\r\n'):
+            path = _write(_lines(newline), newline)
+            try:
+                for chunk_bytes in (1, 7, 300, 4096):
+                    with self.subTest(newline=newline, chunk_bytes=chunk_bytes):
+                        records = self._compare(path, chunk_bytes)
+                        skipped = sum(1 for i in range(400)
+                                      if i % 53 != 10 and i % 37 and i % 41 == 0)
+                        self.assertEqual(len(records), 400 - skipped)
+                        self.assertIn(f'многострочный{newline}"имя" 0', records[0][2])
+            finally:
+                os.remove(path)
+
+    def test_boundaries_across_scan_blocks(self):
+        # Кавычки и переводы строк попадают на границы блоков чтения
+        path = _write(_lines('\r\n'), '\r\n')
+        try:
+            with mock.patch.object(import_data, '_SCAN_BLOCK_BYTES', 5):
+                bounded = list(record_boundaries(path, 0, 300))
+            self.assertEqual(bounded, list(record_boundaries(path, 0, 300)))
+        finally:
+            os.remove(path)
+
+    def test_stray_quote_keeps_ranges_small(self):
+        lines = ['Инвентарный номер;Наименование'] + ['INV0;Монитор 24"'] + [
+            f'INV{i};Имя {i}' for i in range(1, 5000)
+        ]
+        path = _write(lines, '\n')
+        try:
+            offsets = list(record_boundaries(path, 0, 4096))
+            ranges = [end - start for start, end in zip([0] + offsets, offsets)]
+            self.assertLess(max(ranges), 4096 + 100)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Проверка границ сезона правил ТО: неверный сезон не сохраняется,
+а сохраненный ранее не ломает разрешение интервалов
+"""
+import os
+import tempfile
+import unittest
+
+from database import Database
+from utils.maintenance_rules import RULE_SEASONAL, RuleResolver, validate_rule
+
+
+class SeasonValidationTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.db = Database(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_bad_season_day_rejected(self):
+        for start, end in (('3-1', '05-31'), ('13-01', '05-31'), ('02-30', '05-31'),
+                           ('03-01', '5-31')):
+            with self.subTest(start=start, end=end):
+                with self.assertRaises(ValueError):
+                    self.db.add_maintenance_rule(30, category='Транспорт', rule_type=RULE_SEASONAL,
+                                                 season_start=start, season_end=end)
+        self.assertEqual(self.db.get_rule_resolver().category_rules['Транспорт'].segments(),
+                         [('01-01', '12-31', 60)])
+
+    def test_missing_season_bound_rejected(self):
+        with self.assertRaises(ValueError):
+            self.db.add_maintenance_rule(30, category='Транспорт', rule_type=RULE_SEASONAL,
+                                         season_start='03-01')
+        rule_id = self.db.add_maintenance_rule(30, category='Транспорт', rule_type=RULE_SEASONAL,
+                                               season_start='03-01', season_end='05-31')
+        with self.assertRaises(ValueError):
+            self.db.update_maintenance_rule(rule_id, season_end=None)
+        validate_rule({'rule_type': RULE_SEASONAL, 'interval_days': 30,
+                       'season_start': '12-01', 'season_end': '02-29'})
+
+    def test_stored_bad_season_skipped(self):
+        # Правило, сохраненное до появления проверки, пропускается с предупреждением
+        resolver = RuleResolver([
+            {'id': 1, 'category': 'Транспорт', 'rule_type': 'calendar', 'interval_days': 60},
+            {'id': 2, 'category': 'Транспорт', 'rule_type': RULE_SEASONAL, 'interval_days': 30,
+             'season_start': '3-1', 'season_end': '05-31'}
+        ])
+        self.assertEqual(resolver.interval(None, 'Транспорт', '2024-04-10'), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
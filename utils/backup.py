@@ -1,10 +1,12 @@
 """
-Утилиты для резервного копирования базы данных
+Утилиты для резервного копирования базы данных.
+
+Модуль импортирует Qt только в диалогах выбора файла, поэтому копирование
+и восстановление доступны из командной строки без графической среды
 """
 import shutil
 from datetime import datetime
 from pathlib import Path
-from PyQt6.QtWidgets import QFileDialog, QMessageBox
 
 
 class BackupManager:
@@ -42,6 +44,7 @@ class BackupManager:
     @staticmethod
     def get_backup_filename(parent, default_dir: str = "backups") -> str:
         """Получить путь к файлу резервной копии через диалог"""
+        from PyQt6.QtWidgets import QFileDialog
         filename, _ = QFileDialog.getOpenFileName(
             parent,
             "Выберите файл резервной копии",
@@ -0,0 +1,107 @@
+"""
+Распределение предстоящего ТО по рабочим дням с учетом мощности бригад
+"""
+import heapq
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_TEAM = 'Общая бригада'
+
+
+def _weekday(ordinal: int) -> int:
+    """День недели (0 - понедельник) по порядковому номеру даты"""
+    return (ordinal - 1) % 7
+
+
+class CapacityPlanner:
+    """Жадное планирование по наиболее раннему сроку (EDF) для каждой бригады.
+
+    Задача может быть выполнена не раньше чем за lead_days дней до срока
+    (просроченные - с первого дня плана). Каждый рабочий день бригада берет
+    из очереди с приоритетом по сроку не больше своей дневной мощности задач,
+    поэтому пик одного дня распределяется по соседним дням: частично заранее,
+    в пределах допустимого опережения, остальное - с опозданием
+    """
+
+    def __init__(self, capacity_per_day: int = 20, team_capacities: Dict[str, int] = None,
+                 lead_days: int = 7, workdays: Iterable[int] = (0, 1, 2, 3, 4)):
+        self.capacity_per_day = capacity_per_day
+        self.team_capacities = dict(team_capacities or {})
+        self.lead_days = max(0, lead_days)
+        self.workdays = frozenset(workdays)
+        if not self.workdays:
+            raise ValueError("Не задано ни одного рабочего дня")
+        for capacity in [capacity_per_day, *self.team_capacities.values()]:
+            if capacity < 1:
+                raise ValueError("Мощность бригады должна быть не меньше одного ТО в день")
+
+    def capacity(self, team: str) -> int:
+        """Дневная мощность бригады"""
+        return self.team_capacities.get(team, self.capacity_per_day)
+
+    def _next_workday(self, ordinal: int) -> int:
+        """Ближайший рабочий день начиная с ordinal"""
+        while _weekday(ordinal) not in self.workdays:
+            ordinal += 1
+        return ordinal
+
+    def plan(self, tasks: Iterable[Dict], start: str = None) -> List[Dict]:
+        """Распределить задачи по дням.
+        tasks - записи с полями equipment_id, due_date ("ГГГГ-ММ-ДД") и team (бригада,
+        пустая - общая бригада). Возвращает записи с плановой датой planned_date
+        и опозданием late_days относительно срока
+        """
+        first_day = date.fromisoformat(start) if start else date.today()
+        first_ordinal = first_day.toordinal()
+
+        # Задачи бригады: (день, с которого можно выполнять, срок, ID оборудования)
+        by_team: Dict[str, List] = defaultdict(list)
+        for task in tasks:
+            due = date.fromisoformat(task['due_date']).toordinal()
+            release = max(due - self.lead_days, first_ordinal)
+            by_team[task.get('team') or DEFAULT_TEAM].append((release, due, task['equipment_id']))
+
+        plan = []
+        for team, team_tasks in by_team.items():
+            team_tasks.sort()
+            capacity = self.capacity(team)
+            queue = []
+            position = 0
+            day = self._next_workday(first_ordinal)
+            while position < len(team_tasks) or queue:
+                # Пустые дни пропускаются сразу до ближайшей доступной задачи
+                if not queue and team_tasks[position][0] > day:
+                    day = self._next_workday(team_tasks[position][0])
+                while position < len(team_tasks) and team_tasks[position][0] <= day:
+                    release, due, equipment_id = team_tasks[position]
+                    heapq.heappush(queue, (due, equipment_id))
+                    position += 1
+                planned_date = date.fromordinal(day).isoformat()
+                for _ in range(min(capacity, len(queue))):
+                    due, equipment_id = heapq.heappop(queue)
+                    plan.append({
+                        'equipment_id': equipment_id,
+                        'team': team,
+                        'due_date': date.fromordinal(due).isoformat(),
+                        'planned_date': planned_date,
+                        'late_days': max(0, day - due)
+                    })
+                day = self._next_workday(day + 1)
+
+        plan.sort(key=lambda item: (item['planned_date'], item['team'], item['due_date']))
+        return plan
+
+    @staticmethod
+    def daily_load(plan: List[Dict]) -> Dict[str, int]:
+        """Количество запланированных ТО по дням"""
+        load: Dict[str, int] = defaultdict(int)
+        for item in plan:
+            load[item['planned_date']] += 1
+        return dict(load)
+
+
+def team_of(category: Optional[str]) -> str:
+    """Бригада, обслуживающая категорию оборудования"""
+    return category or DEFAULT_TEAM
@@ -0,0 +1,230 @@
+"""
+Амортизация оборудования: линейный способ и способ уменьшаемого остатка
+"""
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from utils.forecast import NO_CATEGORY, _codes
+
+
+# Способы начисления амортизации
+METHOD_STRAIGHT_LINE = 'straight_line'
+METHOD_DECLINING_BALANCE = 'declining_balance'
+METHODS = (METHOD_STRAIGHT_LINE, METHOD_DECLINING_BALANCE)
+METHOD_LABELS = {
+    METHOD_STRAIGHT_LINE: 'Линейный',
+    METHOD_DECLINING_BALANCE: 'Уменьшаемого остатка'
+}
+
+# Правило для категорий без собственного правила
+DEFAULT_USEFUL_LIFE_MONTHS = 60
+DEFAULT_DECLINING_FACTOR = 2.0
+
+
+def current_period() -> str:
+    """Текущий отчетный период "ГГГГ-ММ" """
+    return date.today().isoformat()[:7]
+
+
+class DepreciationRule:
+    """Правило амортизации категории: способ, срок полезного использования в месяцах,
+    ликвидационная стоимость (доля цены покупки) и коэффициент ускорения
+    для способа уменьшаемого остатка
+    """
+
+    __slots__ = ('method', 'useful_life_months', 'salvage_rate', 'declining_factor')
+
+    def __init__(self, method: str = METHOD_STRAIGHT_LINE,
+                 useful_life_months: int = DEFAULT_USEFUL_LIFE_MONTHS,
+                 salvage_rate: float = 0.0, declining_factor: float = DEFAULT_DECLINING_FACTOR):
+        if method not in METHODS:
+            raise ValueError(f"Неизвестный способ амортизации: {method}")
+        if not useful_life_months or useful_life_months < 1:
+            raise ValueError("Срок полезного использования должен быть не меньше месяца")
+        if not 0 <= (salvage_rate or 0) < 1:
+            raise ValueError("Ликвидационная стоимость задается долей цены от 0 до 1")
+        self.method = method
+        self.useful_life_months = int(useful_life_months)
+        self.salvage_rate = float(salvage_rate or 0)
+        self.declining_factor = float(declining_factor or DEFAULT_DECLINING_FACTOR)
+
+    @classmethod
+    def from_row(cls, row: Dict) -> 'DepreciationRule':
+        """Правило из записи таблицы depreciation_rules"""
+        return cls(row.get('method') or METHOD_STRAIGHT_LINE,
+                   row.get('useful_life_months') or DEFAULT_USEFUL_LIFE_MONTHS,
+                   row.get('salvage_rate') or 0.0,
+                   row.get('declining_factor') or DEFAULT_DECLINING_FACTOR)
+
+    def book_fractions(self, months: int) -> np.ndarray:
+        """Остаточная стоимость в долях цены покупки после 0..months месяцев начисления.
+        Способ уменьшаемого остатка переходит на линейное списание остатка, как только
+        оно дает большее начисление, поэтому к концу срока остается ликвидационная стоимость
+        """
+        life = self.useful_life_months
+        fractions = np.full(months + 1, self.salvage_rate)
+        if self.method == METHOD_STRAIGHT_LINE:
+            steps = np.arange(min(life, months) + 1)
+            fractions[:len(steps)] = 1.0 - (1.0 - self.salvage_rate) * steps / life
+            return fractions
+        rate = self.declining_factor / life
+        value = 1.0
+        fractions[0] = value
+        for month in range(1, min(life, months) + 1):
+            straight = (value - self.salvage_rate) / (life - month + 1)
+            value = max(value - max(value * rate, straight), self.salvage_rate)
+            fractions[month] = value
+        return fractions
+
+
+class DepreciationResult:
+    """Амортизация оборудования на конец периода (массивы в порядке входных данных)"""
+
+    def __init__(self, period: str, inputs: Dict[str, List], methods: List[str],
+                 useful_life: np.ndarray, prices: np.ndarray, accumulated: np.ndarray,
+                 book_values: np.ndarray, monthly: np.ndarray, remaining: np.ndarray):
+        self.period = period
+        self.inputs = inputs
+        self.methods = methods
+        self.useful_life = useful_life
+        self.prices = prices
+        self.accumulated = accumulated
+        self.book_values = book_values
+        self.monthly = monthly
+        self.remaining = remaining
+
+    def totals(self) -> Dict:
+        """Итоги по всему оборудованию"""
+        return {
+            'period': self.period,
+            'equipment_count': len(self.prices),
+            'purchase_price': round(float(self.prices.sum()), 2),
+            'accumulated_depreciation': round(float(self.accumulated.sum()), 2),
+            'book_value': round(float(self.book_values.sum()), 2),
+            'monthly_depreciation': round(float(self.monthly.sum()), 2)
+        }
+
+    def iter_rows(self) -> Iterator[Dict]:
+        """Строки отчета по одной: данные оборудования из входных колонок
+        и показатели амортизации
+        """
+        columns = list(self.inputs)
+        values = [self.inputs[column] for column in columns]
+        accumulated = np.round(self.accumulated, 2).tolist()
+        book_values = np.round(self.book_values, 2).tolist()
+        monthly = np.round(self.monthly, 2).tolist()
+        useful_life = self.useful_life.tolist()
+        remaining = self.remaining.tolist()
+        for index, row in enumerate(zip(*values)):
+            item = dict(zip(columns, row))
+            item['method'] = self.methods[index]
+            item['useful_life_months'] = useful_life[index]
+            item['accumulated_depreciation'] = accumulated[index]
+            item['book_value'] = book_values[index]
+            item['monthly_depreciation'] = monthly[index]
+            item['remaining_months'] = remaining[index]
+            yield item
+
+    def rows(self) -> List[Dict]:
+        """Строки отчета списком"""
+        return list(self.iter_rows())
+
+
+class DepreciationEngine:
+    """Расчет амортизации всего оборудования массивами.
+
+    Остаточная стоимость в долях цены зависит только от правила и числа месяцев
+    начисления, поэтому для каждого правила один раз строится таблица долей
+    (правило x месяц), а стоимость оборудования получается выборкой из нее.
+    Амортизация начисляется с месяца, следующего за месяцем покупки
+    """
+
+    def __init__(self, rules: Dict[str, DepreciationRule] = None,
+                 default_rule: DepreciationRule = None):
+        self.rules = dict(rules or {})
+        self.default_rule = default_rule or DepreciationRule()
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> 'DepreciationEngine':
+        """Движок по записям таблицы depreciation_rules"""
+        return cls({row['category']: DepreciationRule.from_row(row) for row in rows})
+
+    def rule(self, category: Optional[str]) -> DepreciationRule:
+        """Правило категории (или правило по умолчанию)"""
+        return self.rules.get(category or '', self.default_rule)
+
+    def _prepare(self, inputs: Dict[str, List]):
+        """Цены, месяцы покупки, номера правил и таблица долей остаточной стоимости"""
+        prices = np.array([float(price or 0) for price in inputs['purchase_price']],
+                          dtype=np.float64)
+        purchase_months = np.array([value[:7] if value else 'NaT'
+                                    for value in inputs['purchase_date']], dtype='datetime64[M]')
+        category_codes, category_labels = _codes(inputs['category'], NO_CATEGORY)
+        rules = [self.rule(None if label == NO_CATEGORY else label) for label in category_labels]
+        # Последний месяц таблиц - за пределами всех сроков: начисление в нем нулевое
+        longest = (max(rule.useful_life_months for rule in rules) if rules else 0) + 1
+        tables = np.array([rule.book_fractions(longest) for rule in rules]).reshape(len(rules), longest + 1)
+        return prices, purchase_months, category_codes, rules, tables, longest
+
+    def run(self, inputs: Dict[str, List], period: str = None) -> DepreciationResult:
+        """Амортизация на конец периода "ГГГГ-ММ" (по умолчанию - текущего).
+        inputs - данные по колонкам из Database.get_depreciation_inputs()
+        """
+        period = period or current_period()
+        prices, purchase_months, category_codes, rules, tables, longest = self._prepare(inputs)
+        if not len(prices):
+            empty = np.zeros(0)
+            return DepreciationResult(period, inputs, [], empty.astype(np.int64), empty,
+                                      empty, empty, empty, empty.astype(np.int64))
+
+        # Месяцы начисления к концу периода; без даты покупки амортизация не начисляется
+        elapsed = (np.datetime64(period, 'M') - purchase_months).astype(np.int64)
+        elapsed[np.isnat(purchase_months)] = 0
+        elapsed = np.clip(elapsed, 0, longest)
+        previous = np.maximum(elapsed - 1, 0)
+
+        book_values = prices * tables[category_codes, elapsed]
+        monthly = np.where(elapsed > 0, prices * tables[category_codes, previous] - book_values, 0.0)
+        useful_life = np.array([rule.useful_life_months for rule in rules],
+                               dtype=np.int64)[category_codes]
+        remaining = np.maximum(useful_life - elapsed, 0)
+        remaining[np.isnat(purchase_months)] = useful_life[np.isnat(purchase_months)]
+        methods = [rules[code].method for code in category_codes.tolist()]
+        return DepreciationResult(period, inputs, methods, useful_life, prices,
+                                  prices - book_values, book_values, monthly, remaining)
+
+    def schedule(self, inputs: Dict[str, List], start_period: str = None,
+                 months: int = 12) -> List[Dict]:
+        """График амортизации парка по месяцам и категориям начиная с периода
+        start_period: начисление за месяц и остаточная стоимость на конец месяца
+        """
+        start = np.datetime64(start_period or current_period(), 'M')
+        prices, purchase_months, category_codes, rules, tables, longest = self._prepare(inputs)
+        _, category_labels = _codes(inputs['category'], NO_CATEGORY)
+        known = ~np.isnat(purchase_months)
+        base = (start - purchase_months[known]).astype(np.int64)
+        codes = category_codes[known]
+        known_prices = prices[known]
+        # Оборудование без даты покупки сохраняет цену покупки в остаточной стоимости
+        unknown_values = np.bincount(category_codes[~known], weights=prices[~known],
+                                     minlength=len(category_labels))
+
+        result = []
+        for offset in range(months):
+            elapsed = np.clip(base + offset, 0, longest)
+            book_values = known_prices * tables[codes, elapsed]
+            charges = known_prices * tables[codes, np.maximum(elapsed - 1, 0)] - book_values
+            charge_totals = np.bincount(codes, weights=charges, minlength=len(category_labels))
+            book_totals = np.bincount(codes, weights=book_values,
+                                      minlength=len(category_labels)) + unknown_values
+            month = str(start + offset)
+            for index, label in enumerate(category_labels):
+                result.append({
+                    'period': month,
+                    'category': label,
+                    'depreciation': round(float(charge_totals[index]), 2),
+                    'book_value': round(float(book_totals[index]), 2)
+                })
+        return result
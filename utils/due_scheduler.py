@@ -0,0 +1,101 @@
+"""
+Фоновый пересчет списка предстоящего ТО в таблицу maintenance_due.
+
+Модуль не зависит от Qt: задание запускается таймером приложения в отдельном
+потоке или как самостоятельный процесс:
+
+    python -m utils.due_scheduler --db equipment.db --poll 60
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+from datetime import date
+from typing import Optional
+
+from database import Database
+from utils.logger import app_logger
+
+
+class MaintenanceDueJob:
+    """Пересчет списка предстоящего ТО: полный, если предыдущий расчет устарел
+    (изменились правила интервалов, наступил новый день или изменились параметры),
+    иначе - только оборудования из очереди изменений
+    """
+
+    def __init__(self, db: Database, days_ahead: int = 365, default_interval: int = 90):
+        self.db = db
+        self.days_ahead = days_ahead
+        self.default_interval = default_interval
+
+    def is_current(self, today: str = None) -> bool:
+        """Актуален ли последний расчет"""
+        return Database.is_maintenance_due_current(
+            self.db.get_maintenance_due_state(), today or date.today().isoformat(),
+            self.days_ahead, self.default_interval
+        )
+
+    def run_once(self, force: bool = False) -> Optional[int]:
+        """Пересчитать список, если он устарел (полностью - всегда при force).
+        Возвращает количество пересчитанных записей или None, если пересчет не понадобился
+        """
+        if not force and self.is_current():
+            # Изменения, не примененные при записи (например, из-за ошибки)
+            changed = self.db.apply_maintenance_due_changes(notify=False)
+            return len(changed) if changed else None
+        count = self.db.refresh_maintenance_due(days_ahead=self.days_ahead,
+                                                default_interval=self.default_interval)
+        app_logger.logger.info(f"Список предстоящего ТО пересчитан: {count} записей")
+        return count
+
+    def run_forever(self, poll_seconds: float = 60, stop_event: threading.Event = None):
+        """Проверять актуальность расчета каждые poll_seconds секунд до установки stop_event.
+        Ошибки базы данных (например, занятая другим процессом база) не прерывают работу
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                self.run_once()
+            except (sqlite3.Error, ConnectionError) as e:
+                app_logger.log_error("Пересчет списка предстоящего ТО", str(e))
+            stop_event.wait(poll_seconds)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Параметры задания командной строки (кроме пути к базе данных)"""
+    parser.add_argument("--days-ahead", type=int, default=365,
+                        help="горизонт списка, дней (по умолчанию 365)")
+    parser.add_argument("--interval", type=int, default=90,
+                        help="интервал ТО по умолчанию, дней (по умолчанию 90)")
+    parser.add_argument("--poll", type=float, default=60,
+                        help="период проверки актуальности, секунд (по умолчанию 60)")
+    parser.add_argument("--once", action="store_true",
+                        help="пересчитать один раз и завершить работу")
+
+
+def run(db: Database, args: argparse.Namespace) -> int:
+    """Выполнить задание с разобранными параметрами командной строки"""
+    job = MaintenanceDueJob(db, args.days_ahead, args.interval)
+    if args.once:
+        job.run_once(force=True)
+        return 0
+    try:
+        job.run_forever(args.poll)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None) -> int:
+    """Точка входа командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Фоновый пересчет списка предстоящего ТО EquipmentTracker"
+    )
+    parser.add_argument("--db", default="equipment.db", help="путь к базе данных")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    return run(Database(args.db), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,19 @@
 Утилиты для экспорта данных
 """
 import csv
+import os
+import threading
 from datetime import datetime
-from typing import List, Dict
-from PyQt6.QtWidgets import QFileDialog, QMessageBox
-from PyQt6.QtCore import QObject
+from typing import Callable, Iterable, List, Dict, Optional, Sequence, Tuple
+from PyQt6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+from PyQt6.QtCore import QObject, QEventLoop, Qt, pyqtSignal
+from utils.stream_export import ExportCancelled, write_file
+
+
+class _ExportSignals(QObject):
+    """Сигналы фонового экспорта (передаются в поток интерфейса)"""
+    progress = pyqtSignal(int)
+    done = pyqtSignal()
 
 
 class ExportManager(QObject):
@@ -33,8 +42,9 @@ class ExportManager(QObject):
     
     @staticmethod
     def export_table_to_csv(table, filename: str = None) -> bool:
-        """Экспорт таблицы QTableWidget в CSV"""
-        if table.rowCount() == 0:
+        """Экспорт таблицы (QTableView или QTableWidget) в CSV по данным ее модели"""
+        model = table.model()
+        if model.rowCount() == 0:
             return False
         
         if not filename:
@@ -47,16 +57,16 @@ class ExportManager(QObject):
                 
                 # Заголовки
                 headers = []
-                for col in range(table.columnCount()):
-                    headers.append(table.horizontalHeaderItem(col).text())
+                for col in range(model.columnCount()):
+                    headers.append(model.headerData(col, Qt.Orientation.Horizontal) or '')
                 writer.writerow(headers)
                 
                 # Данные
-                for row in range(table.rowCount()):
+                for row in range(model.rowCount()):
                     row_data = []
-                    for col in range(table.columnCount()):
-                        item = table.item(row, col)
-                        row_data.append(item.text() if item else '')
+                    for col in range(model.columnCount()):
+                        value = model.index(row, col).data()
+                        row_data.append('' if value is None else str(value))
                     writer.writerow(row_data)
             
             return True
@@ -65,16 +75,75 @@ class ExportManager(QObject):
             return False
     
     @staticmethod
-    def get_export_filename(parent, default_name: str = "export") -> str:
-        """Получить имя файла для экспорта через диалог"""
+    def stream_to_file(parent, rows_factory: Callable[[], Iterable],
+                       columns: Sequence[Tuple], filename: str,
+                       total: int = None) -> Optional[int]:
+        """Экспорт записей в CSV или XLSX (по расширению файла) в фоновом потоке
+        с окном хода выполнения и отменой.
+        rows_factory вызывается в фоновом потоке и возвращает итератор записей
+        (например, Database.iter_*), columns - (заголовок, ключ записи[, тип]).
+        Возвращает количество строк или None, если экспорт отменен; ошибки
+        чтения и записи пробрасываются в вызывающий код
+        """
+        dialog = QProgressDialog("Экспорт данных...", "Отмена", 0, total or 0, parent)
+        dialog.setWindowTitle("Экспорт")
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(500)
+        dialog.setAutoReset(False)
+        dialog.setValue(0)
+        cancel_event = threading.Event()
+        dialog.canceled.connect(cancel_event.set)
+        
+        def update(written: int):
+            if total:
+                dialog.setValue(min(written, total))
+            dialog.setLabelText(f"Экспортировано строк: {written:,}".replace(',', ' '))
+        
+        signals = _ExportSignals()
+        signals.progress.connect(update)
+        loop = QEventLoop()
+        signals.done.connect(loop.quit)
+        outcome = {}
+        
+        def run():
+            try:
+                outcome['count'] = write_file(rows_factory(), columns, filename,
+                                              signals.progress.emit, cancel_event)
+            except ExportCancelled:
+                outcome['count'] = None
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                signals.done.emit()
+        
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        loop.exec()
+        thread.join()
+        dialog.canceled.disconnect(cancel_event.set)
+        dialog.close()
+        
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['count']
+    
+    @staticmethod
+    def get_export_filename(parent, default_name: str = "export", excel: bool = False) -> str:
+        """Получить имя файла для экспорта через диалог (excel - можно выбрать XLSX)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_filename = f"{default_name}_{timestamp}.csv"
+        default_filename = f"{default_name}_{timestamp}.{'xlsx' if excel else 'csv'}"
+        filters = "CSV Files (*.csv);;All Files (*)"
+        if excel:
+            filters = "Excel Files (*.xlsx);;" + filters
         
-        filename, _ = QFileDialog.getSaveFileName(
+        filename, selected_filter = QFileDialog.getSaveFileName(
             parent,
-            "Сохранить как CSV",
+            "Сохранить как Excel или CSV" if excel else "Сохранить как CSV",
             default_filename,
-            "CSV Files (*.csv);;All Files (*)"
+            filters
         )
         
+        # Расширение по выбранному формату, если оно не указано
+        if filename and not os.path.splitext(filename)[1]:
+            filename += '.xlsx' if selected_filter.startswith('Excel') else '.csv'
         return filename if filename else None
@@ -0,0 +1,239 @@
+"""
+Прогноз технического обслуживания на несколько лет вперед с оценкой затрат
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.maintenance_rules import RuleResolver
+
+
+NO_CATEGORY = 'Без категории'
+NO_DEPARTMENT = 'Не назначено'
+
+# Номер первого дня каждого месяца в году из 366 дней (порядок дней правил "ММ-ДД")
+_MONTH_OFFSETS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+
+def _day_of_year(dates: np.ndarray) -> np.ndarray:
+    """Номер дня "ММ-ДД" в году из 366 дней для массива datetime64[D]"""
+    months = dates.astype('datetime64[M]')
+    month_index = (months - dates.astype('datetime64[Y]').astype('datetime64[M]')).astype(np.int64)
+    day_index = (dates - months.astype('datetime64[D]')).astype(np.int64)
+    return _MONTH_OFFSETS[month_index] + day_index
+
+
+def _to_dates(values: List[Optional[str]]) -> np.ndarray:
+    """Список дат "ГГГГ-ММ-ДД" (или None) в массив datetime64[D] с NaT вместо пустых"""
+    return np.array([value or 'NaT' for value in values], dtype='datetime64[D]')
+
+
+def _codes(values: List[Optional[str]], empty: str):
+    """Коды значений и их подписи (пустые значения получают подпись empty)"""
+    labels, codes = np.unique(
+        np.array([value or '' for value in values], dtype=object).astype(str),
+        return_inverse=True
+    )
+    return codes.reshape(-1), [str(label) or empty for label in labels]
+
+
+class ForecastResult:
+    """Прогноз: количество и стоимость ТО по месяцам, категориям и отделам.
+    counts и costs - массивы размерности (месяцы, категории, отделы)
+    """
+
+    def __init__(self, months: np.ndarray, categories: List[str], departments: List[str],
+                 counts: np.ndarray, costs: np.ndarray):
+        self.months = months
+        self.categories = categories
+        self.departments = departments
+        self.counts = counts
+        self.costs = costs
+
+    @property
+    def total_count(self) -> int:
+        """Всего обслуживаний за период прогноза"""
+        return int(self.counts.sum())
+
+    @property
+    def total_cost(self) -> float:
+        """Ожидаемые затраты за период прогноза"""
+        return float(self.costs.sum())
+
+    def monthly_totals(self) -> List[Dict]:
+        """Итоги по месяцам"""
+        counts = self.counts.sum(axis=(1, 2))
+        costs = self.costs.sum(axis=(1, 2))
+        return [{'month': str(month), 'count': int(count), 'cost': round(float(cost), 2)}
+                for month, count, cost in zip(self.months, counts, costs)]
+
+    def rows(self) -> List[Dict]:
+        """Непустые ячейки прогноза: месяц, категория, отдел, количество, стоимость"""
+        result = []
+        for month_index, category_index, department_index in zip(*np.nonzero(self.counts)):
+            result.append({
+                'month': str(self.months[month_index]),
+                'category': self.categories[category_index],
+                'department': self.departments[department_index],
+                'count': int(self.counts[month_index, category_index, department_index]),
+                'cost': round(float(self.costs[month_index, category_index, department_index]), 2)
+            })
+        return result
+
+
+class MaintenanceForecast:
+    """Разворачивание графиков ТО всего оборудования на годы вперед.
+
+    Все оборудование обрабатывается массивами datetime64: на каждом шаге ко всем
+    еще не вышедшим за горизонт датам прибавляется их интервал (с учетом сезонных
+    правил), поэтому число шагов равно наибольшему числу ТО одного оборудования,
+    а не числу оборудования
+    """
+
+    # Сколько ТО накапливать перед суммированием по ячейкам
+    FLUSH_SIZE = 2_000_000
+
+    def __init__(self, resolver: RuleResolver, start: str = None, years: int = 1):
+        self.resolver = resolver
+        self.start = np.datetime64(start or date.today().isoformat(), 'D')
+        self.first_month = self.start.astype('datetime64[M]')
+        self.months = np.arange(self.first_month, self.first_month + 12 * years)
+        # Горизонт: до конца последнего месяца включительно
+        self.end = (self.first_month + 12 * years).astype('datetime64[D]')
+
+    def _interval_tables(self, equipment_ids: np.ndarray, category_codes: np.ndarray,
+                         category_labels: List[str]):
+        """Номер сводного правила для каждого оборудования и таблица
+        интервалов (правило x день года)
+        """
+        tables = []
+        table_index = {}
+
+        def add(compiled) -> int:
+            days = tuple(interval or self.resolver.default_interval
+                         for interval in compiled.day_intervals())
+            if days not in table_index:
+                table_index[days] = len(tables)
+                tables.append(days)
+            return table_index[days]
+
+        # Правила категорий применяются ко всем кодам категорий сразу,
+        # переопределения для оборудования - только к их строкам
+        by_category = np.array([
+            add(self.resolver.bind(None, None if label == NO_CATEGORY else label))
+            for label in category_labels
+        ], dtype=np.int64)
+        rule_index = by_category[category_codes]
+        if self.resolver.equipment_rules:
+            positions = {equipment_id: position
+                         for position, equipment_id in enumerate(equipment_ids.tolist())}
+            for equipment_id in self.resolver.equipment_rules:
+                position = positions.get(equipment_id)
+                if position is not None:
+                    label = category_labels[category_codes[position]]
+                    rule_index[position] = add(self.resolver.bind(
+                        equipment_id, None if label == NO_CATEGORY else label))
+        return rule_index, np.array(tables, dtype=np.int64)
+
+    @staticmethod
+    def _expected_costs(category_labels: List[str], category_codes: np.ndarray,
+                        types: List[Optional[str]], averages: List[Dict]) -> np.ndarray:
+        """Ожидаемая стоимость одного ТО для каждого оборудования: средняя по категории
+        и типу последнего ТО, иначе средняя по категории, иначе общая средняя
+        """
+        by_pair = {}
+        by_category: Dict[str, List[float]] = {}
+        total_cost = total_count = 0.0
+        for row in averages:
+            category = row.get('category') or NO_CATEGORY
+            count = row.get('maintenance_count') or 0
+            cost = (row.get('avg_cost') or 0.0) * count
+            by_pair[(category, row.get('type') or '')] = row.get('avg_cost') or 0.0
+            category_total = by_category.setdefault(category, [0.0, 0.0])
+            category_total[0] += cost
+            category_total[1] += count
+            total_cost += cost
+            total_count += count
+        overall = total_cost / total_count if total_count else 0.0
+
+        type_codes, type_labels = _codes(types, '')
+        # Стоимость определяется один раз на пару (категория, тип), а не на оборудование
+        pairs, pair_codes = np.unique(category_codes * len(type_labels) + type_codes,
+                                      return_inverse=True)
+        pair_costs = []
+        for pair in pairs.tolist():
+            category = category_labels[pair // len(type_labels)]
+            type_label = type_labels[pair % len(type_labels)]
+            cost = by_pair.get((category, type_label))
+            if cost is None:
+                category_total = by_category.get(category)
+                cost = (category_total[0] / category_total[1]
+                        if category_total and category_total[1] else overall)
+            pair_costs.append(cost)
+        return np.array(pair_costs, dtype=np.float64)[pair_codes.reshape(-1)]
+
+    def run(self, inputs: Dict[str, List], cost_averages: List[Dict]) -> ForecastResult:
+        """Рассчитать прогноз.
+        inputs - данные по колонкам из Database.get_forecast_inputs(),
+        cost_averages - Database.get_maintenance_cost_averages()
+        """
+        equipment_ids = np.array(inputs['id'], dtype=np.int64)
+        category_codes, category_labels = _codes(inputs['category'], NO_CATEGORY)
+        department_codes, department_labels = _codes(inputs['department'], NO_DEPARTMENT)
+        shape = (len(self.months), len(category_labels), len(department_labels))
+        counts = np.zeros(int(np.prod(shape)), dtype=np.int64)
+        costs = np.zeros(int(np.prod(shape)), dtype=np.float64)
+        if not len(equipment_ids):
+            return ForecastResult(self.months, category_labels, department_labels,
+                                  counts.reshape(shape), costs.reshape(shape))
+
+        rule_index, tables = self._interval_tables(equipment_ids, category_codes, category_labels)
+        unit_costs = self._expected_costs(category_labels, category_codes,
+                                          inputs['last_type'], cost_averages)
+
+        # Первое ТО: через интервал после последнего ТО или после покупки;
+        # просроченное переносится на дату начала прогноза
+        reference = _to_dates(inputs['last_date'])
+        no_maintenance = np.isnat(reference)
+        reference[no_maintenance] = _to_dates(inputs['purchase_date'])[no_maintenance]
+        known = ~np.isnat(reference)
+        current = reference[known]
+        rules = rule_index[known]
+        current = current + tables[rules, _day_of_year(current)]
+        current = np.maximum(current, self.start)
+        groups = (category_codes[known] * shape[2] + department_codes[known])
+        unit_costs = unit_costs[known]
+
+        cells_per_month = shape[1] * shape[2]
+        # Ячейки шагов накапливаются и суммируются пачками, а не на каждом шаге
+        pending_cells, pending_costs, pending_size = [], [], 0
+
+        def flush():
+            if pending_cells:
+                cells = np.concatenate(pending_cells)
+                counts[:] += np.bincount(cells, minlength=len(counts))
+                costs[:] += np.bincount(cells, weights=np.concatenate(pending_costs),
+                                        minlength=len(costs))
+                pending_cells.clear()
+                pending_costs.clear()
+
+        while True:
+            active = current < self.end
+            if not active.all():
+                current, rules = current[active], rules[active]
+                groups, unit_costs = groups[active], unit_costs[active]
+            if not len(current):
+                break
+            month_index = (current.astype('datetime64[M]') - self.first_month).astype(np.int64)
+            pending_cells.append(month_index * cells_per_month + groups)
+            pending_costs.append(unit_costs)
+            pending_size += len(current)
+            if pending_size >= self.FLUSH_SIZE:
+                flush()
+                pending_size = 0
+            current = current + tables[rules, _day_of_year(current)]
+        flush()
+
+        return ForecastResult(self.months, category_labels, department_labels,
+                              counts.reshape(shape), costs.reshape(shape))
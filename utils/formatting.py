@@ -0,0 +1,46 @@
+"""
+Форматирование значений для отображения (без зависимостей от Qt)
+"""
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+
+# Русские названия статусов оборудования
+STATUS_LABELS = {
+    'active': 'Активное',
+    'in_repair': 'В ремонте',
+    'written_off': 'Списано',
+    'reserved': 'Резерв'
+}
+
+
+@lru_cache(maxsize=65536)
+def format_money(value, currency: bool = True) -> str:
+    """Денежная сумма с разделителями тысяч (результат кэшируется по значению)"""
+    value = value or '0'
+    suffix = " ₽" if currency else ""
+    try:
+        return f"{Decimal(str(value)):,.2f}".replace(',', ' ') + suffix
+    except (InvalidOperation, ValueError):
+        if not currency:
+            return str(value)
+        return f"{value}{suffix}" if value != '0' else f"0.00{suffix}"
+
+
+def format_status(status: str) -> str:
+    """Русское название статуса оборудования"""
+    return STATUS_LABELS.get(status, status)
+
+
+def truncate_text(text: str, length: int = 50) -> str:
+    """Обрезать длинный текст для отображения в таблице"""
+    text = text or ''
+    return text[:length] + '...' if len(text) > length else text
+
+
+def money_sort_key(value) -> float:
+    """Ключ сортировки денежной суммы"""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
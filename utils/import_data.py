@@ -1,22 +1,384 @@
 """
-Утилиты для импорта данных из CSV
+Утилиты для импорта данных из CSV.
+
+Qt импортируется только в диалогах: импорт файла (import_equipment_file)
+доступен из командной строки без графической среды. Файл читается потоком,
+а сообщения о строках пишутся на диск (ImportDiagnostics), поэтому расход
+памяти не зависит от размера файла
 """
+import codecs
 import csv
-from typing import List, Dict
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, pairwise
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 from decimal import Decimal, InvalidOperation
-from PyQt6.QtWidgets import QFileDialog, QMessageBox
 from database import Database
 
 
+# Варианты названий колонок CSV для полей оборудования (берется первое непустое значение)
+FIELD_ALIASES = {
+    'inventory_number': ('Инвентарный номер', 'inventory_number', 'Инв. номер'),
+    'name': ('Наименование', 'name', 'Название'),
+    'category': ('Категория', 'category'),
+    'purchase_date': ('Дата покупки', 'purchase_date', 'Дата'),
+    'purchase_price': ('Цена покупки', 'purchase_price', 'Цена'),
+    'current_location': ('Местоположение', 'current_location', 'Место'),
+    'status': ('Статус', 'status')
+}
+
+VALID_STATUSES = ('active', 'in_repair', 'written_off', 'reserved')
+
+# Сообщений каждого вида, сохраняемых в памяти для показа
+SAMPLE_SIZE = 10
+# Строк файла между отчетами о ходе импорта и проверками отмены
+PROGRESS_ROWS = 5000
+# Размер части файла, разбираемой одним процессом, байт
+PARALLEL_CHUNK_BYTES = 4 << 20
+# Файлы меньше этого размера разбираются без пула процессов
+PARALLEL_MIN_BYTES = 16 << 20
+# Размер блока чтения при поиске границ записей, байт
+_SCAN_BLOCK_BYTES = 1 << 20
+# Состояния поиска границ записей: вне кавычек, в значении в кавычках, после кавычки в нем
+_UNQUOTED, _QUOTED, _QUOTE_IN_QUOTED = range(3)
+
+
+class ImportCancelled(Exception):
+    """Импорт отменен пользователем"""
+
+
+class ImportProgress:
+    """Ход импорта: прочитано байт и строк файла, добавлено записей, прошло секунд"""
+    
+    __slots__ = ('bytes_read', 'total_bytes', 'rows', 'imported', 'elapsed')
+    
+    def __init__(self, bytes_read: int, total_bytes: int, rows: int, imported: int,
+                 elapsed: float):
+        self.bytes_read = bytes_read
+        self.total_bytes = total_bytes
+        self.rows = rows
+        self.imported = imported
+        self.elapsed = elapsed
+    
+    @property
+    def fraction(self) -> float:
+        """Доля прочитанного файла (0..1)"""
+        return min(self.bytes_read / self.total_bytes, 1.0) if self.total_bytes else 1.0
+    
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_read / self.elapsed if self.elapsed else 0.0
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+    
+    def text(self) -> str:
+        """Описание хода импорта для окна и командной строки"""
+        megabyte = 1 << 20
+        return (f"Прочитано {self.bytes_read / megabyte:,.1f} из {self.total_bytes / megabyte:,.1f} МБ "
+                f"({self.bytes_per_second / megabyte:,.1f} МБ/с) | "
+                f"строк: {self.rows:,} ({self.rows_per_second:,.0f}/с) | "
+                f"добавлено: {self.imported:,}").replace(',', ' ')
+
+
+class ImportDiagnostics:
+    """Предупреждения и ошибки импорта: счетчики, первые sample_size сообщений
+    каждого вида и полный список в файле на диске (создается при первом сообщении
+    во временном каталоге, если путь не задан)
+    """
+    
+    def __init__(self, spill_path: str = None, sample_size: int = SAMPLE_SIZE):
+        self.path = spill_path
+        self.sample_size = sample_size
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.error_count = 0
+        self.warning_count = 0
+        self._file = None
+    
+    def _spill(self, prefix: str, message: str):
+        if self._file is None:
+            if self.path is None:
+                handle, self.path = tempfile.mkstemp(prefix="import_", suffix=".log")
+                self._file = open(handle, 'w', encoding='utf-8')
+            else:
+                self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write(f"{prefix}: {message}\n")
+    
+    def error(self, message: str):
+        """Ошибка: строка не добавлена"""
+        self.error_count += 1
+        if len(self.errors) < self.sample_size:
+            self.errors.append(message)
+        self._spill("Ошибка", message)
+    
+    def warning(self, message: str):
+        """Предупреждение: строка пропущена или добавлена с исправлениями"""
+        self.warning_count += 1
+        if len(self.warnings) < self.sample_size:
+            self.warnings.append(message)
+        self._spill("Предупреждение", message)
+    
+    def close(self):
+        """Дописать файл сообщений"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class EquipmentRowParser:
+    """Разбор и проверка строк CSV с оборудованием.
+    Позиции колонок каждого поля определяются один раз по заголовку,
+    поэтому строка разбирается без словаря и поиска по вариантам названий
+    """
+    
+    def __init__(self, header: Sequence[str]):
+        # При повторе названия в заголовке берется последняя колонка, как в csv.DictReader
+        positions = {(title or '').strip(): index for index, title in enumerate(header)}
+        self.columns = {
+            field: [positions[alias] for alias in aliases if alias in positions]
+            for field, aliases in FIELD_ALIASES.items()
+        }
+        self.rows_read = 0
+    
+    def value(self, values: Sequence[str], field: str) -> Optional[str]:
+        """Первое непустое значение поля среди его колонок"""
+        for index in self.columns[field]:
+            if index < len(values):
+                value = values[index].strip()
+                if value:
+                    return value
+        return None
+    
+    def parse(self, row_num: int, values: Sequence[str],
+              warn: Callable[[int, str], None]) -> Optional[Tuple]:
+        """Запись для Database.import_equipment или None, если строка пропущена.
+        Замечания по строке передаются в warn(номер строки, текст)
+        """
+        inventory_number = self.value(values, 'inventory_number')
+        name = self.value(values, 'name')
+        if not inventory_number or not name:
+            warn(row_num, "пропущена (нет обязательных полей)")
+            return None
+        
+        purchase_price = None
+        price_str = self.value(values, 'purchase_price')
+        if price_str:
+            try:
+                purchase_price = Decimal(price_str.replace(',', '.'))
+            except (InvalidOperation, ValueError):
+                warn(row_num, f"неверный формат цены '{price_str}'")
+        
+        status = self.value(values, 'status') or 'active'
+        if status not in VALID_STATUSES:
+            status = 'active'
+            warn(row_num, "неверный статус, установлен 'active'")
+        
+        return (row_num, inventory_number, name,
+                self.value(values, 'category'),
+                self.value(values, 'purchase_date'),
+                str(purchase_price) if purchase_price else None,
+                self.value(values, 'current_location'),
+                status)
+    
+    def records(self, rows: Iterable[Sequence[str]], warn: Callable[[int, str], None],
+                first_row: int = 2, tick: Callable[[int], None] = None,
+                tick_rows: int = PROGRESS_ROWS) -> Iterator[Tuple]:
+        """Проверенные записи из строк файла (пустые строки не нумеруются).
+        Прочитанные строки считаются в rows_read; tick(rows_read) вызывается
+        каждые tick_rows строк
+        """
+        for values in rows:
+            if not values:
+                continue
+            record = self.parse(first_row + self.rows_read, values, warn)
+            if record is not None:
+                yield record
+            self.rows_read += 1
+            if tick is not None and self.rows_read % tick_rows == 0:
+                tick(self.rows_read)
+
+
+def sniff_delimiter(filename: str) -> str:
+    """Разделитель CSV по началу файла"""
+    with open(filename, 'r', encoding='utf-8-sig') as csvfile:
+        return csv.Sniffer().sniff(csvfile.read(1024)).delimiter
+
+
+def record_boundaries(filename: str, start: int, chunk_bytes: int, delimiter: str = ';',
+                      quotechar: str = '"') -> Iterator[int]:
+    """Смещения концов частей файла примерно по chunk_bytes байт, начиная со start
+    (начала записи). Часть заканчивается переводом строки вне кавычек, то есть
+    на границе записи CSV, даже если в значениях есть переводы строк.
+    Кавычки разбираются как в модуле csv: значение в кавычках начинается только
+    с кавычки в начале поля, "" внутри него - сама кавычка, а кавычка в середине
+    поля без кавычек (например, 24") - обычный символ.
+    Последнее смещение - размер файла
+    """
+    quote = quotechar.encode()
+    field_starts = (delimiter.encode()[0], ord('\n'), ord('\r'))
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        position = last = start
+        target = start + chunk_bytes
+        # Состояние разбора на начало блока: вне кавычек, в значении в кавычках
+        # или сразу после кавычки в значении (ее смысл зависит от следующего байта)
+        state = _UNQUOTED
+        previous = ord('\n')
+        first = True
+        while True:
+            block = f.read(_SCAN_BLOCK_BYTES)
+            if not block:
+                break
+            if first and start == 0 and block.startswith(codecs.BOM_UTF8):
+                # Метка порядка байтов не входит в первое поле
+                block = block[len(codecs.BOM_UTF8):]
+                position += len(codecs.BOM_UTF8)
+            first = False
+            end = position + len(block)
+            index = 0
+            if state == _QUOTE_IN_QUOTED:
+                if block[:1] == quote:
+                    state, index = _QUOTED, 1
+                else:
+                    state = _UNQUOTED
+            
+            while True:
+                next_quote = block.find(quote, index)
+                segment_end = len(block) if next_quote == -1 else next_quote
+                # Перевод строки вне кавычек до следующей кавычки - граница записи
+                if state == _UNQUOTED:
+                    while target < position + segment_end:
+                        newline = block.find(b'\n', max(index, target - position), segment_end)
+                        if newline == -1:
+                            break
+                        last = position + newline + 1
+                        yield last
+                        target = last + chunk_bytes
+                if next_quote == -1:
+                    break
+                if state == _UNQUOTED:
+                    before = block[next_quote - 1] if next_quote else previous
+                    if before in field_starts:
+                        state = _QUOTED
+                    index = next_quote + 1
+                elif next_quote + 1 == len(block):
+                    state, index = _QUOTE_IN_QUOTED, next_quote + 1
+                elif block[next_quote + 1:next_quote + 2] == quote:
+                    index = next_quote + 2
+                else:
+                    state, index = _UNQUOTED, next_quote + 1
+            if block:
+                previous = block[-1]
+            position = end
+        if position > last:
+            yield position
+
+
+def _parse_range(filename: str, start: int, end: int, header: List[str],
+                 delimiter: str) -> Tuple[int, List[Tuple], List[Tuple[int, str]]]:
+    """Разобрать и проверить записи части файла start..end (в процессе пула).
+    Номера строк в записях и замечаниях - от начала части.
+    Возвращает (прочитано строк, записи, замечания)
+    """
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    parser = EquipmentRowParser(header)
+    warnings = []
+    reader = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter)
+    records = list(parser.records(reader, lambda row_num, message: warnings.append((row_num, message)),
+                                  first_row=0))
+    return parser.rows_read, records, warnings
+
+
+def iter_records(filename: str, warn: Callable[[int, str], None],
+                 tick: Callable[[int, int], None]) -> Iterator[Tuple]:
+    """Проверенные записи файла, разобранные в текущем процессе.
+    tick(прочитано строк, прочитано байт) вызывается каждые PROGRESS_ROWS строк
+    """
+    delimiter = sniff_delimiter(filename)
+    # newline='': переводы строк в значениях в кавычках сохраняются как есть, как и при
+    # параллельном разборе частей файла
+    with open(filename, 'rb') as raw, \
+            io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as csvfile:
+        reader = csv.reader(csvfile, delimiter=delimiter)
+        parser = EquipmentRowParser(next(reader, []))
+        yield from parser.records(reader, warn, tick=lambda rows: tick(rows, raw.tell()))
+        tick(parser.rows_read, raw.tell())
+
+
+def iter_records_parallel(filename: str, workers: int, warn: Callable[[int, str], None],
+                          tick: Callable[[int, int], None],
+                          chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> Iterator[Tuple]:
+    """Проверенные записи файла, разобранные пулом из workers процессов.
+    Файл делится на части по границам записей; в работе не больше двух частей
+    на процесс, а результаты выдаются в порядке частей, поэтому запись в базу
+    остается одним упорядоченным потоком, а память не зависит от размера файла.
+    tick(прочитано строк, прочитано байт) вызывается после каждой части
+    """
+    delimiter = sniff_delimiter(filename)
+    header_end = next(record_boundaries(filename, 0, 1, delimiter), 0)
+    with open(filename, 'rb') as f:
+        header_text = f.read(header_end).decode('utf-8-sig')
+    header = next(csv.reader(io.StringIO(header_text, newline=''), delimiter=delimiter), [])
+    ranges = pairwise(chain([header_end], record_boundaries(filename, header_end, chunk_bytes, delimiter)))
+    
+    # spawn: пул может запускаться из фонового потока приложения Qt, fork там небезопасен
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pending = deque()
+        
+        def submit():
+            bounds = next(ranges, None)
+            if bounds is not None:
+                pending.append((bounds[1], pool.submit(_parse_range, filename, *bounds,
+                                                       header, delimiter)))
+        
+        for _ in range(workers * 2):
+            submit()
+        rows = 0
+        while pending:
+            end, future = pending.popleft()
+            count, records, warnings = future.result()
+            submit()
+            first_row = 2 + rows
+            for row_num, message in warnings:
+                warn(first_row + row_num, message)
+            for record in records:
+                yield (first_row + record[0],) + record[1:]
+            rows += count
+            tick(rows, end)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_workers(total_bytes: int, workers: int = None) -> int:
+    """Число процессов разбора: по числу ядер (workers=None), но один для небольших файлов"""
+    if total_bytes < PARALLEL_MIN_BYTES:
+        return 1
+    return max(workers or os.cpu_count() or 1, 1)
+
+
 class ImportManager:
     """Менеджер для импорта данных"""
     
     @staticmethod
-    def import_equipment_from_csv(db: Database, parent=None) -> tuple:
+    def import_equipment_from_csv(db: Database, parent=None, atomic: bool = False) -> tuple:
         """
-        Импорт оборудования из CSV файла
-        Возвращает (успешно, ошибки, предупреждения)
+        Импорт оборудования из CSV файла, выбранного в диалоге, в фоновом потоке
+        с окном хода выполнения и отменой
+        Возвращает (успешно, ImportDiagnostics или None, если файл не выбран)
         """
+        from PyQt6.QtWidgets import QFileDialog, QProgressDialog
+        from PyQt6.QtCore import QEventLoop, QTimer, Qt
         filename, _ = QFileDialog.getOpenFileName(
             parent,
             "Выберите CSV файл для импорта",
@@ -25,118 +387,156 @@ class ImportManager:
         )
         
         if not filename:
-            return 0, [], []
+            return 0, None
+        
+        # Доля файла в тысячных: размер в байтах не помещается в int окна
+        dialog = QProgressDialog("Импорт данных...", "Отмена", 0, 1000, parent)
+        dialog.setWindowTitle("Импорт")
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(500)
+        dialog.setAutoReset(False)
+        dialog.setValue(0)
+        cancel_event = threading.Event()
+        dialog.canceled.connect(cancel_event.set)
         
+        # Фоновый поток только сохраняет последний отчет, окно опрашивает его по таймеру
+        state = {}
+        
+        def run():
+            try:
+                state['result'] = ImportManager.import_equipment_file(
+                    db, filename, atomic, progress=lambda progress: state.update(progress=progress),
+                    cancel_event=cancel_event, notify=False
+                )
+            except Exception as e:
+                state['error'] = e
+        
+        def update():
+            progress = state.get('progress')
+            if progress is not None:
+                dialog.setValue(int(progress.fraction * 1000))
+                dialog.setLabelText(progress.text())
+            if not thread.is_alive():
+                loop.quit()
+        
+        thread = threading.Thread(target=run, daemon=True)
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(update)
+        thread.start()
+        timer.start(100)
+        loop.exec()
+        timer.stop()
+        thread.join()
+        dialog.canceled.disconnect(cancel_event.set)
+        dialog.close()
+        
+        if 'error' in state:
+            raise state['error']
+        imported, diagnostics = state['result']
+        if imported:
+            db.notify_equipment_imported()
+        return imported, diagnostics
+    
+    @staticmethod
+    def import_equipment_file(db: Database, filename: str, atomic: bool = False,
+                              diagnostics: ImportDiagnostics = None,
+                              progress: Callable[[ImportProgress], None] = None,
+                              cancel_event: Optional[threading.Event] = None,
+                              notify: bool = True, workers: int = None) -> tuple:
+        """
+        Импорт оборудования из CSV файла (без Qt): разбор и проверка строк
+        потоком, вставка пачками в транзакциях (Database.import_equipment).
+        Большие файлы разбираются пулом процессов (workers, по умолчанию по числу ядер),
+        в базу записи пишет один поток в порядке файла.
+        С atomic при любой ошибке в базу не добавляется ничего.
+        progress(ImportProgress) вызывается по ходу чтения файла; при установке
+        cancel_event импорт прерывается (зафиксированные пачки остаются, с atomic - нет).
+        Без notify подписчики базы не оповещаются (см. Database.import_equipment).
+        Возвращает (успешно, ImportDiagnostics)
+        """
+        diagnostics = diagnostics or ImportDiagnostics()
         imported = 0
-        errors = []
-        warnings = []
+        rows_read = 0
+        records = None
+        started = time.monotonic()
+        
+        def on_warning(row_num: int, message: str):
+            diagnostics.warning(f"Строка {row_num}: {message}")
+        
+        def on_error(row_num: int, message: str):
+            diagnostics.error(f"Строка {row_num}: {message}")
+        
+        def on_chunk(count: int):
+            # Зафиксированные записи на случай сбоя или отмены посреди файла
+            nonlocal imported
+            imported = count
+        
+        def on_rows(rows: int, bytes_read: int):
+            nonlocal rows_read
+            rows_read = rows
+            if progress:
+                progress(ImportProgress(bytes_read, total_bytes, rows, imported,
+                                        time.monotonic() - started))
+            if cancel_event is not None and cancel_event.is_set():
+                raise ImportCancelled()
         
         try:
-            with open(filename, 'r', encoding='utf-8-sig') as csvfile:
-                # Пытаемся определить разделитель
-                sample = csvfile.read(1024)
-                csvfile.seek(0)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
-                
-                reader = csv.DictReader(csvfile, delimiter=delimiter)
-                
-                for row_num, row in enumerate(reader, start=2):  # Начинаем с 2, т.к. 1 - заголовок
-                    try:
-                        # Очищаем значения от пробелов
-                        row = {k.strip(): v.strip() if v else None for k, v in row.items()}
-                        
-                        # Маппинг полей (поддерживаем разные варианты названий)
-                        inventory_number = (row.get('Инвентарный номер') or 
-                                          row.get('inventory_number') or 
-                                          row.get('Инв. номер') or '').strip()
-                        
-                        name = (row.get('Наименование') or 
-                               row.get('name') or 
-                               row.get('Название') or '').strip()
-                        
-                        if not inventory_number or not name:
-                            warnings.append(f"Строка {row_num}: пропущена (нет обязательных полей)")
-                            continue
-                        
-                        category = (row.get('Категория') or 
-                                  row.get('category') or None)
-                        
-                        purchase_date = (row.get('Дата покупки') or 
-                                      row.get('purchase_date') or 
-                                      row.get('Дата') or None)
-                        
-                        purchase_price = None
-                        price_str = (row.get('Цена покупки') or 
-                                    row.get('purchase_price') or 
-                                    row.get('Цена') or None)
-                        if price_str:
-                            try:
-                                purchase_price = Decimal(str(price_str).replace(',', '.'))
-                            except (InvalidOperation, ValueError):
-                                warnings.append(f"Строка {row_num}: неверный формат цены '{price_str}'")
-                        
-                        current_location = (row.get('Местоположение') or 
-                                          row.get('current_location') or 
-                                          row.get('Место') or None)
-                        
-                        status = (row.get('Статус') or 
-                                row.get('status') or 
-                                'active')
-                        
-                        # Проверяем валидность статуса
-                        valid_statuses = ['active', 'in_repair', 'written_off', 'reserved']
-                        if status not in valid_statuses:
-                            status = 'active'
-                            warnings.append(f"Строка {row_num}: неверный статус, установлен 'active'")
-                        
-                        # Добавляем оборудование
-                        try:
-                            db.add_equipment(
-                                inventory_number=inventory_number,
-                                name=name,
-                                category=category,
-                                purchase_date=purchase_date,
-                                purchase_price=purchase_price,
-                                current_location=current_location,
-                                status=status
-                            )
-                            imported += 1
-                        except ValueError as e:
-                            errors.append(f"Строка {row_num}: {str(e)}")
-                        except Exception as e:
-                            errors.append(f"Строка {row_num}: неожиданная ошибка - {str(e)}")
-                    
-                    except Exception as e:
-                        errors.append(f"Строка {row_num}: ошибка обработки - {str(e)}")
-            
-            return imported, errors, warnings
-            
+            total_bytes = os.path.getsize(filename)
+            workers = parse_workers(total_bytes, workers)
+            if workers > 1:
+                records = iter_records_parallel(filename, workers, on_warning, on_rows)
+            else:
+                records = iter_records(filename, on_warning, on_rows)
+            imported = db.import_equipment(records, atomic=atomic, on_error=on_error,
+                                           progress=on_chunk, notify=notify)
+            if progress:
+                progress(ImportProgress(total_bytes, total_bytes, rows_read, imported,
+                                        time.monotonic() - started))
+        except ImportCancelled:
+            if atomic:
+                imported = 0
+            diagnostics.error(f"Импорт прерван пользователем, добавлено записей: {imported}")
         except Exception as e:
-            errors.append(f"Ошибка чтения файла: {str(e)}")
-            return imported, errors, warnings
+            diagnostics.error(f"Ошибка чтения файла: {str(e)}")
+            if atomic:
+                imported = 0
+        finally:
+            # Закрыть файл и пул процессов, если импорт остановлен до конца файла
+            if records is not None:
+                records.close()
+            if atomic and diagnostics.error_count:
+                diagnostics.error("Импорт отменен: изменения не сохранены")
+            diagnostics.close()
+        
+        return imported, diagnostics
     
     @staticmethod
-    def show_import_results(parent, imported: int, errors: List[str], warnings: List[str]):
+    def show_import_results(parent, imported: int, diagnostics: ImportDiagnostics):
         """Показать результаты импорта"""
+        from PyQt6.QtWidgets import QMessageBox
         message = f"Импорт завершен!\n\n"
         message += f"Успешно импортировано: {imported}\n"
         
-        if warnings:
-            message += f"\nПредупреждения ({len(warnings)}):\n"
-            message += "\n".join(warnings[:10])  # Показываем первые 10
-            if len(warnings) > 10:
-                message += f"\n... и еще {len(warnings) - 10} предупреждений"
+        if diagnostics.warning_count:
+            message += f"\nПредупреждения ({diagnostics.warning_count}):\n"
+            message += "\n".join(diagnostics.warnings)  # Показываем первые SAMPLE_SIZE
+            if diagnostics.warning_count > len(diagnostics.warnings):
+                message += (f"\n... и еще {diagnostics.warning_count - len(diagnostics.warnings)} "
+                            f"предупреждений")
+        
+        if diagnostics.error_count:
+            message += f"\n\nОшибки ({diagnostics.error_count}):\n"
+            message += "\n".join(diagnostics.errors)
+            if diagnostics.error_count > len(diagnostics.errors):
+                message += f"\n... и еще {diagnostics.error_count - len(diagnostics.errors)} ошибок"
         
-        if errors:
-            message += f"\n\nОшибки ({len(errors)}):\n"
-            message += "\n".join(errors[:10])  # Показываем первые 10
-            if len(errors) > 10:
-                message += f"\n... и еще {len(errors) - 10} ошибок"
+        if diagnostics.path:
+            message += f"\n\nВсе сообщения: {diagnostics.path}"
         
-        if errors:
+        if diagnostics.error_count:
             QMessageBox.warning(parent, "Результаты импорта", message)
-        elif warnings:
+        elif diagnostics.warning_count:
             QMessageBox.information(parent, "Результаты импорта", message)
         else:
             QMessageBox.information(parent, "Успех", f"Успешно импортировано {imported} записей!")
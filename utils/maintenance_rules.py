@@ -0,0 +1,260 @@
+"""
+Правила интервалов технического обслуживания и их разрешение в памяти
+"""
+import math
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import app_logger
+
+
+# Типы правил
+RULE_CALENDAR = 'calendar'
+RULE_USAGE = 'usage'
+RULE_SEASONAL = 'seasonal'
+RULE_TYPES = (RULE_CALENDAR, RULE_USAGE, RULE_SEASONAL)
+
+YEAR_START = '01-01'
+YEAR_END = '12-31'
+
+
+def rule_interval(rule: Dict) -> Optional[int]:
+    """Интервал правила в днях.
+    Для правила по наработке интервал равен ресурсу, деленному на среднюю наработку в день
+    """
+    if rule.get('rule_type') == RULE_USAGE:
+        usage_limit = rule.get('usage_limit')
+        daily_usage = rule.get('daily_usage')
+        if not usage_limit or not daily_usage:
+            return None
+        return max(1, math.ceil(usage_limit / daily_usage))
+    return rule.get('interval_days')
+
+
+def validate_rule(rule: Dict):
+    """Проверить правило перед сохранением: интервал календарного и сезонного
+    правила - не меньше дня, ресурс и наработка правила по наработке - больше нуля,
+    границы сезона - существующие дни "ММ-ДД", заданные обе или ни одной
+    """
+    rule_type = rule.get('rule_type') or RULE_CALENDAR
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Неизвестный тип правила: {rule_type}")
+    if rule_type == RULE_USAGE:
+        if any(rule.get(key) is None or rule[key] <= 0 for key in ('usage_limit', 'daily_usage')):
+            raise ValueError("Ресурс и наработка в день правила по наработке должны быть больше нуля")
+    elif rule.get('interval_days') is None or rule['interval_days'] < 1:
+        raise ValueError("Интервал ТО должен быть не меньше одного дня")
+    for key in ('season_start', 'season_end'):
+        if rule.get(key) and rule[key] not in _DAY_INDEX:
+            raise ValueError(f"Граница сезона должна быть днем года в формате ММ-ДД: {rule[key]}")
+    if rule_type == RULE_SEASONAL and bool(rule.get('season_start')) != bool(rule.get('season_end')):
+        raise ValueError("Для сезонного правила задаются обе границы сезона")
+
+
+def _season_ranges(start: str, end: str) -> List[Tuple[str, str]]:
+    """Диапазоны дат сезона "ММ-ДД"; сезон через Новый год делится на два"""
+    if start <= end:
+        return [(start, end)]
+    return [(start, YEAR_END), (YEAR_START, end)]
+
+
+class CompiledRule:
+    """Правила одной области (категории или оборудования), сведенные
+    в непересекающиеся сезонные отрезки года "ММ-ДД" с интервалом на каждом.
+    Вне отрезков действует правило следующего уровня
+    """
+
+    __slots__ = ('starts', 'ends', 'intervals')
+
+    def __init__(self, segments: List[Tuple[str, str, int]]):
+        segments = sorted(segments)
+        self.starts = [start for start, _, _ in segments]
+        self.ends = [end for _, end, _ in segments]
+        self.intervals = [interval for _, _, interval in segments]
+
+    def segments(self) -> List[Tuple[str, str, int]]:
+        """Отрезки (начало, конец, интервал)"""
+        return list(zip(self.starts, self.ends, self.intervals))
+
+    def interval(self, day: str) -> Optional[int]:
+        """Интервал для дня "ММ-ДД" (None, если день не покрыт правилами)"""
+        position = bisect_right(self.starts, day) - 1
+        if position >= 0 and day <= self.ends[position]:
+            return self.intervals[position]
+        return None
+
+    def day_intervals(self) -> List[Optional[int]]:
+        """Интервалы для каждого из 366 дней года "ММ-ДД" (с 29 февраля) по порядку"""
+        result = [None] * len(_DAYS)
+        for start, end, interval in self.segments():
+            for index in range(_DAY_INDEX[start], _DAY_INDEX[end] + 1):
+                result[index] = interval
+        return result
+
+    @classmethod
+    def compile(cls, rules: Iterable[Dict]) -> Optional['CompiledRule']:
+        """Свести правила области в отрезки.
+        Базовый интервал (календарный или по наработке, из них меньший) действует весь год,
+        сезонные правила заменяют его на время сезона; при пересечении сезонов
+        действует меньший интервал
+        """
+        base = None
+        seasons = []
+        for rule in rules:
+            interval = rule_interval(rule)
+            if not interval:
+                continue
+            if rule.get('rule_type') == RULE_SEASONAL:
+                if rule.get('season_start') and rule.get('season_end'):
+                    # Сохраненное до проверки правило с неверным сезоном пропускается
+                    if rule['season_start'] not in _DAY_INDEX or rule['season_end'] not in _DAY_INDEX:
+                        app_logger.logger.warning(
+                            f"Правило ТО {rule.get('id')} пропущено: неверный сезон "
+                            f"{rule['season_start']} - {rule['season_end']}")
+                        continue
+                    for start, end in _season_ranges(rule['season_start'], rule['season_end']):
+                        seasons.append((start, end, interval))
+            else:
+                base = interval if base is None else min(base, interval)
+
+        if not seasons:
+            return cls([(YEAR_START, YEAR_END, base)]) if base else None
+
+        # Границы отрезков: начала сезонов и дни после их окончания
+        boundaries = {YEAR_START}
+        for start, end, _ in seasons:
+            boundaries.add(start)
+            boundaries.add(_next_day(end))
+        boundaries.discard(None)
+        points = sorted(boundaries)
+
+        segments = []
+        for index, start in enumerate(points):
+            end = _previous_day(points[index + 1]) if index + 1 < len(points) else YEAR_END
+            matching = [interval for s, e, interval in seasons if s <= start and end <= e]
+            interval = min(matching) if matching else base
+            if interval is None:
+                continue
+            # Соседние отрезки с одинаковым интервалом объединяются
+            if segments and segments[-1][2] == interval and segments[-1][1] == _previous_day(start):
+                segments[-1] = (segments[-1][0], end, interval)
+            else:
+                segments.append((start, end, interval))
+        return cls(segments) if segments else None
+
+
+# Дни года "ММ-ДД" (с 29 февраля), чтобы сдвигать границы сезонов без работы с датами
+_DAYS = [f"{month:02d}-{day:02d}"
+         for month, days in enumerate((31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31), 1)
+         for day in range(1, days + 1)]
+_DAY_INDEX = {day: index for index, day in enumerate(_DAYS)}
+
+
+def _next_day(day: str) -> Optional[str]:
+    """Следующий день "ММ-ДД" (None для 31 декабря)"""
+    index = _DAY_INDEX[day] + 1
+    return _DAYS[index] if index < len(_DAYS) else None
+
+
+def _previous_day(day: str) -> str:
+    """Предыдущий день "ММ-ДД\""""
+    return _DAYS[_DAY_INDEX[day] - 1]
+
+
+class RuleResolver:
+    """Разрешение интервалов ТО: правило оборудования, затем правило категории,
+    затем интервал по умолчанию.
+
+    Правила компилируются один раз при создании; для массовых расчетов по одному
+    и тому же оборудованию цепочка уровней сводится заранее методом bind()
+    """
+
+    def __init__(self, rules: Iterable[Dict], default_interval: int = 90):
+        self.default_interval = default_interval
+        by_category: Dict[str, List[Dict]] = {}
+        by_equipment: Dict[int, List[Dict]] = {}
+        for rule in rules:
+            if rule.get('equipment_id') is not None:
+                by_equipment.setdefault(rule['equipment_id'], []).append(rule)
+            elif rule.get('category'):
+                by_category.setdefault(rule['category'], []).append(rule)
+
+        self.category_rules: Dict[str, CompiledRule] = {}
+        for category, category_rules in by_category.items():
+            compiled = CompiledRule.compile(category_rules)
+            if compiled:
+                self.category_rules[category] = compiled
+        self.equipment_rules: Dict[int, CompiledRule] = {}
+        for equipment_id, equipment_rules in by_equipment.items():
+            compiled = CompiledRule.compile(equipment_rules)
+            if compiled:
+                self.equipment_rules[equipment_id] = compiled
+
+    def interval(self, equipment_id: int, category: Optional[str], reference_date: str) -> int:
+        """Интервал ТО для оборудования; сезон определяется по дате reference_date "ГГГГ-ММ-ДД\""""
+        day = reference_date[5:10] if reference_date else YEAR_START
+        for compiled in (self.equipment_rules.get(equipment_id),
+                         self.category_rules.get(category)):
+            if compiled is not None:
+                interval = compiled.interval(day)
+                if interval is not None:
+                    return interval
+        return self.default_interval
+
+    def bind(self, equipment_id: int, category: Optional[str]) -> CompiledRule:
+        """Свести правила оборудования, категории и интервал по умолчанию в одно
+        правило, покрывающее весь год
+        """
+        levels = [compiled for compiled in (self.equipment_rules.get(equipment_id),
+                                            self.category_rules.get(category))
+                  if compiled is not None]
+        if not levels:
+            return CompiledRule([(YEAR_START, YEAR_END, self.default_interval)])
+        if len(levels) == 1 and levels[0].starts == [YEAR_START] and levels[0].ends == [YEAR_END]:
+            return levels[0]
+
+        boundaries = {YEAR_START}
+        for compiled in levels:
+            for start, end, _ in compiled.segments():
+                boundaries.add(start)
+                boundaries.add(_next_day(end))
+        boundaries.discard(None)
+        points = sorted(boundaries)
+        segments = []
+        for index, start in enumerate(points):
+            end = _previous_day(points[index + 1]) if index + 1 < len(points) else YEAR_END
+            interval = self.default_interval
+            for compiled in levels:
+                level_interval = compiled.interval(start)
+                if level_interval is not None:
+                    interval = level_interval
+                    break
+            segments.append((start, end, interval))
+        return CompiledRule(segments)
+
+    def intervals(self, equipment_ids: List[int], categories: List[Optional[str]],
+                  reference_dates: List[Optional[str]]) -> List[int]:
+        """Интервалы ТО для списков оборудования (массовое применение)"""
+        bound: Dict[Tuple[int, Optional[str]], CompiledRule] = {}
+        result = []
+        for equipment_id, category, reference_date in zip(equipment_ids, categories, reference_dates):
+            # Без правил оборудования цепочка зависит только от категории
+            key = (equipment_id if equipment_id in self.equipment_rules else None, category)
+            compiled = bound.get(key)
+            if compiled is None:
+                compiled = bound[key] = self.bind(equipment_id, category)
+            day = reference_date[5:10] if reference_date else YEAR_START
+            result.append(compiled.interval(day) or self.default_interval)
+        return result
+
+    def segments_by_category(self) -> List[List]:
+        """Отрезки правил категорий [категория, начало, конец, интервал] для передачи в SQL"""
+        return [[category, start, end, interval]
+                for category, compiled in self.category_rules.items()
+                for start, end, interval in compiled.segments()]
+
+    def segments_by_equipment(self) -> List[List]:
+        """Отрезки правил оборудования [ID, начало, конец, интервал] для передачи в SQL"""
+        return [[equipment_id, start, end, interval]
+                for equipment_id, compiled in self.equipment_rules.items()
+                for start, end, interval in compiled.segments()]
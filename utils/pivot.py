@@ -0,0 +1,238 @@
+"""
+Сводные отчеты: группировка оборудования и обслуживания по измерениям
+(категория, отдел, статус, месяц, тип ТО) с разворотом в таблицу
+"""
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.formatting import format_status
+from utils.forecast import NO_CATEGORY, NO_DEPARTMENT
+
+
+# Таблицы фактов: оборудование или записи обслуживания
+FACT_EQUIPMENT = 'equipment'
+FACT_MAINTENANCE = 'maintenance'
+
+# Ключ колонки итога строки и подпись строки итогов
+TOTAL_KEY = 'total'
+TOTAL_LABEL = 'Итого'
+
+
+class Dimension:
+    """Измерение сводного отчета: выражение группировки по записям
+    и (если есть) по месячным итогам maintenance_monthly
+    """
+
+    __slots__ = ('key', 'title', 'expression', 'fact', 'rollup', 'empty', 'label')
+
+    def __init__(self, key: str, title: str, expression: str, fact: str = None,
+                 rollup: str = None, empty: str = '', label=None):
+        self.key = key
+        self.title = title
+        self.expression = expression
+        # Измерение только для этой таблицы фактов (None - для любой)
+        self.fact = fact
+        self.rollup = rollup
+        self.empty = empty
+        self.label = label
+
+
+class Measure:
+    """Показатель сводного отчета: агрегат по записям и по месячным итогам"""
+
+    __slots__ = ('key', 'title', 'kind', 'fact', 'expression', 'rollup', 'additive')
+
+    def __init__(self, key: str, title: str, kind: str, fact: str, expression: str,
+                 rollup: str = None, additive: bool = True):
+        self.key = key
+        self.title = title
+        self.kind = kind
+        self.fact = fact
+        self.expression = expression
+        self.rollup = rollup
+        # Итог по строке или колонке равен сумме ячеек
+        self.additive = additive
+
+
+DIMENSIONS = {dimension.key: dimension for dimension in [
+    Dimension('category', "Категория", "COALESCE(e.category, '')",
+              rollup='category', empty=NO_CATEGORY),
+    Dimension('department', "Отдел", "COALESCE(d.department, '')", empty=NO_DEPARTMENT),
+    Dimension('status', "Статус", "COALESCE(e.status, '')", label=format_status),
+    Dimension('purchase_year', "Год покупки", "COALESCE(substr(e.purchase_date, 1, 4), '')",
+              empty="Не указан"),
+    Dimension('year', "Год ТО", "substr(m.maintenance_date, 1, 4)", FACT_MAINTENANCE,
+              rollup='substr(month, 1, 4)'),
+    Dimension('month', "Месяц ТО", "substr(m.maintenance_date, 1, 7)", FACT_MAINTENANCE,
+              rollup='month'),
+    Dimension('type', "Тип ТО", "m.type", FACT_MAINTENANCE, rollup='type')
+]}
+
+MEASURES = {measure.key: measure for measure in [
+    Measure('equipment_count', "Количество оборудования", 'int', FACT_EQUIPMENT, "COUNT(*)"),
+    Measure('purchase_price', "Стоимость покупки", 'money', FACT_EQUIPMENT,
+            "SUM(e.purchase_price)"),
+    Measure('maintenance_count', "Количество ТО", 'int', FACT_MAINTENANCE, "COUNT(*)",
+            "COALESCE(SUM(maintenance_count), 0)"),
+    Measure('maintenance_cost', "Стоимость ТО", 'money', FACT_MAINTENANCE, "TOTAL(m.cost)",
+            "TOTAL(total_cost)"),
+    Measure('avg_cost', "Средняя стоимость ТО", 'money', FACT_MAINTENANCE, "AVG(m.cost)",
+            "SUM(total_cost) / NULLIF(SUM(cost_count), 0)", additive=False),
+    Measure('min_cost', "Минимальная стоимость ТО", 'money', FACT_MAINTENANCE, "MIN(m.cost)",
+            "MIN(min_cost)", additive=False),
+    Measure('max_cost', "Максимальная стоимость ТО", 'money', FACT_MAINTENANCE, "MAX(m.cost)",
+            "MAX(max_cost)", additive=False),
+    Measure('serviced_equipment', "Оборудования с ТО", 'int', FACT_MAINTENANCE,
+            "COUNT(DISTINCT m.equipment_id)", additive=False)
+]}
+
+# Отдел оборудования - из текущего (незавершенного) назначения с последней датой начала
+_CURRENT_DEPARTMENTS = """
+    LEFT JOIN (
+        SELECT equipment_id, department, MAX(start_date)
+        FROM assignments
+        WHERE end_date IS NULL
+        GROUP BY equipment_id
+    ) d ON d.equipment_id = e.id"""
+
+
+def _next_month(month: str) -> str:
+    """Первый день месяца, следующего за "ГГГГ-ММ" """
+    year, number = int(month[:4]), int(month[5:7])
+    return date(year + number // 12, number % 12 + 1, 1).isoformat()
+
+
+class PivotQuery:
+    """Выборка измерений и показателей, собранная в один запрос GROUP BY.
+
+    Показатели оборудования и обслуживания считаются по разным таблицам фактов
+    и в одном отчете не сочетаются. Если все измерения и показатели есть
+    в месячных итогах maintenance_monthly, запрос читает их вместо записей ТО.
+    Период ("ГГГГ-ММ") ограничивает записи обслуживания
+    """
+
+    def __init__(self, dimensions: Sequence[str], measures: Sequence[str],
+                 start_month: str = None, end_month: str = None):
+        unknown = [key for key in dimensions if key not in DIMENSIONS]
+        unknown += [key for key in measures if key not in MEASURES]
+        if unknown:
+            raise ValueError(f"Неизвестные измерения или показатели: {', '.join(unknown)}")
+        if not measures:
+            raise ValueError("Не выбран ни один показатель")
+        self.dimensions = [DIMENSIONS[key] for key in dict.fromkeys(dimensions)]
+        self.measures = [MEASURES[key] for key in dict.fromkeys(measures)]
+        facts = {measure.fact for measure in self.measures}
+        if len(facts) > 1:
+            raise ValueError("Показатели оборудования и обслуживания нельзя сочетать в одном отчете")
+        self.fact = facts.pop()
+        if self.fact == FACT_EQUIPMENT and any(dimension.fact == FACT_MAINTENANCE
+                                               for dimension in self.dimensions):
+            raise ValueError("Измерения обслуживания доступны только для показателей обслуживания")
+        self.start_month = start_month
+        self.end_month = end_month
+
+    @property
+    def uses_rollup(self) -> bool:
+        """Отчет считается по месячным итогам"""
+        return (self.fact == FACT_MAINTENANCE
+                and all(dimension.rollup for dimension in self.dimensions)
+                and all(measure.rollup for measure in self.measures))
+
+    def sql(self) -> Tuple[str, Dict]:
+        """Текст запроса и параметры"""
+        rollup = self.uses_rollup
+        select = [f"{dimension.rollup if rollup else dimension.expression} AS {dimension.key}"
+                  for dimension in self.dimensions]
+        select += [f"{measure.rollup if rollup else measure.expression} AS {measure.key}"
+                   for measure in self.measures]
+        conditions, params = [], {}
+
+        if rollup:
+            source = "maintenance_monthly"
+            if self.start_month:
+                conditions.append("month >= :start_month")
+                params['start_month'] = self.start_month
+            if self.end_month:
+                conditions.append("month <= :end_month")
+                params['end_month'] = self.end_month
+        else:
+            if self.fact == FACT_MAINTENANCE:
+                source = "maintenance m"
+                # Данные оборудования читаются, только если по ним есть группировка
+                if any(dimension.fact is None for dimension in self.dimensions):
+                    source += " JOIN equipment e ON e.id = m.equipment_id"
+                if self.start_month:
+                    conditions.append("m.maintenance_date >= :start_date")
+                    params['start_date'] = f"{self.start_month}-01"
+                if self.end_month:
+                    conditions.append("m.maintenance_date < :end_date")
+                    params['end_date'] = _next_month(self.end_month)
+            else:
+                source = "equipment e"
+            if any(dimension.key == 'department' for dimension in self.dimensions):
+                source += _CURRENT_DEPARTMENTS
+
+        query = f"SELECT {', '.join(select)}\nFROM {source}"
+        if conditions:
+            query += f"\nWHERE {' AND '.join(conditions)}"
+        if self.dimensions:
+            positions = ', '.join(str(index + 1) for index in range(len(self.dimensions)))
+            query += f"\nGROUP BY {positions}\nORDER BY {positions}"
+        return query, params
+
+    def records(self, rows) -> List[Dict]:
+        """Записи результата с подписями значений измерений"""
+        records = []
+        for row in rows:
+            record = dict(row)
+            for dimension in self.dimensions:
+                value = record[dimension.key]
+                if dimension.label:
+                    value = dimension.label(value)
+                record[dimension.key] = value or dimension.empty
+            records.append(record)
+        return records
+
+
+def pivot_table(records: List[Dict], row_dimensions: Sequence[str],
+                column_dimension: Optional[str],
+                measure: str) -> Tuple[List[Tuple[str, str, str]], List[Dict]]:
+    """Развернуть записи сводного отчета: строки - значения row_dimensions,
+    колонки - значения column_dimension (без него - одна колонка показателя),
+    ячейки - показатель measure. Для суммируемых показателей добавляются
+    итог строки и строка итогов.
+    Возвращает колонки (заголовок, ключ, тип значения) и строки
+    """
+    measure_info = MEASURES[measure]
+    columns = [(DIMENSIONS[key].title, key, 'text') for key in row_dimensions]
+    if column_dimension is None:
+        columns.append((measure_info.title, measure, measure_info.kind))
+        rows = [{key: record[key] for key in (*row_dimensions, measure)} for record in records]
+        value_keys = [measure]
+    else:
+        values = sorted({record[column_dimension] for record in records})
+        value_keys = [f"c{index}" for index in range(len(values))]
+        key_of = dict(zip(values, value_keys))
+        columns += [(value, key, measure_info.kind) for value, key in zip(values, value_keys)]
+        by_row: Dict[Tuple, Dict] = {}
+        for record in records:
+            row_key = tuple(record[key] for key in row_dimensions)
+            row = by_row.get(row_key)
+            if row is None:
+                row = by_row[row_key] = dict(zip(row_dimensions, row_key))
+                row.update(dict.fromkeys(value_keys))
+            row[key_of[record[column_dimension]]] = record[measure]
+        rows = list(by_row.values())
+        if measure_info.additive:
+            columns.append((TOTAL_LABEL, TOTAL_KEY, measure_info.kind))
+            for row in rows:
+                row[TOTAL_KEY] = sum(row.get(key) or 0 for key in value_keys)
+            value_keys.append(TOTAL_KEY)
+
+    if measure_info.additive and rows and row_dimensions:
+        total = dict.fromkeys(row_dimensions, '')
+        total[row_dimensions[0]] = TOTAL_LABEL
+        for key in value_keys:
+            total[key] = sum(row.get(key) or 0 for row in rows)
+        rows.append(total)
+    return columns, rows
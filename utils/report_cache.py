@@ -0,0 +1,64 @@
+"""
+Кэш результатов отчетов по параметрам и версиям данных
+"""
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class ReportCache:
+    """LRU-кэш отчетов в памяти.
+
+    Запись кэша определяется отчетом и его параметрами (период, фильтры) и хранит
+    версии таблиц, по которым рассчитана. Если версии изменились (в таблицы были
+    записи), запись устарела и удаляется при обращении. Объем ограничен числом
+    записей и суммарным числом строк результатов; кэш можно использовать из разных потоков
+    """
+
+    def __init__(self, max_entries: int = 16, max_rows: int = 1_000_000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries: OrderedDict = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(value) -> int:
+        """Число строк результата"""
+        return len(value) if isinstance(value, list) else 1
+
+    def get(self, report: str, params: Hashable, versions: Tuple) -> Optional[object]:
+        """Результат отчета, рассчитанный по тем же версиям таблиц (None - нет в кэше)"""
+        key = (report, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != versions:
+                self._rows -= self._size(entry[1])
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, report: str, params: Hashable, versions: Tuple, value):
+        """Сохранить результат; давно не использованные результаты вытесняются"""
+        size = self._size(value)
+        if size > self.max_rows:
+            return
+        key = (report, params)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._rows -= self._size(previous[1])
+            self._entries[key] = (versions, value)
+            self._rows += size
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._rows -= self._size(evicted)
+
+    def clear(self):
+        """Очистить кэш (например, после восстановления базы данных из копии)"""
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
@@ -0,0 +1,46 @@
+"""
+Параллельное формирование независимых отчетов
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+
+# Потоков по умолчанию: не больше числа процессоров (на одном ядре
+# потоки только мешают друг другу при разборе результатов)
+MAX_WORKERS = 4
+
+
+class ReportOrchestrator:
+    """Выполнение набора запросов отчетов в пуле потоков.
+
+    Одинаковые запросы (та же функция с теми же аргументами) выполняются один раз,
+    результат получают все отчеты, которым он нужен. Каждый метод Database
+    открывает собственное соединение, а SQLite отпускает GIL на время выполнения
+    запроса, поэтому потоки читают базу параллельно и общее время близко
+    ко времени самого долгого запроса
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or min(MAX_WORKERS, os.cpu_count() or 1)
+
+    def run(self, requests: Dict[str, Tuple[Callable, tuple]]) -> Dict[str, object]:
+        """Выполнить запросы {имя: (функция, аргументы)} и вернуть {имя: результат}.
+        Ошибка любого запроса пробрасывается после завершения остальных
+        """
+        unique: Dict[Tuple[Callable, tuple], list] = {}
+        for name, (function, args) in requests.items():
+            unique.setdefault((function, tuple(args)), []).append(name)
+        if not unique:
+            return {}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique)),
+                                thread_name_prefix='report') as pool:
+            futures = {pool.submit(function, *args): names
+                       for (function, args), names in unique.items()}
+            for future, names in futures.items():
+                value = future.result()
+                for name in names:
+                    results[name] = value
+        return results
@@ -0,0 +1,137 @@
+"""
+Префиксный индекс для быстрого поиска оборудования по мере ввода
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+
+class PrefixIndex:
+    """Отсортированный массив ключей с двоичным поиском по префиксу.
+    Ключи хранятся в нижнем регистре, одному ключу может соответствовать несколько ID
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._ids: List[int] = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def build(self, entries: Iterable[Tuple[str, int]]):
+        """Построить индекс по парам (ключ, ID)"""
+        pairs = sorted((key.lower(), record_id) for key, record_id in entries if key)
+        self._keys = [key for key, _ in pairs]
+        self._ids = [record_id for _, record_id in pairs]
+
+    def add(self, key: str, record_id: int):
+        """Добавить ключ"""
+        if not key:
+            return
+        key = key.lower()
+        position = bisect_left(self._keys, key)
+        # Среди одинаковых ключей сохраняем порядок по ID
+        while (position < len(self._keys) and self._keys[position] == key
+               and self._ids[position] < record_id):
+            position += 1
+        self._keys.insert(position, key)
+        self._ids.insert(position, record_id)
+
+    def remove(self, key: str, record_id: int):
+        """Удалить ключ"""
+        if not key:
+            return
+        key = key.lower()
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            if self._ids[position] == record_id:
+                del self._keys[position]
+                del self._ids[position]
+                return
+            position += 1
+
+    def search(self, prefix: str, limit: int, exclude: set = None) -> List[int]:
+        """Первые limit ID, ключи которых начинаются с prefix"""
+        prefix = prefix.lower()
+        result = []
+        seen = set(exclude) if exclude else set()
+        position = bisect_left(self._keys, prefix)
+        while len(result) < limit and position < len(self._keys):
+            if not self._keys[position].startswith(prefix):
+                break
+            record_id = self._ids[position]
+            if record_id not in seen:
+                seen.add(record_id)
+                result.append(record_id)
+            position += 1
+        return result
+
+
+class EquipmentSearchIndex:
+    """Индекс оборудования по инвентарным номерам и словам наименования"""
+
+    def __init__(self):
+        self.inventory_index = PrefixIndex()
+        self.name_index = PrefixIndex()
+        self._entries: Dict[int, Tuple[str, str]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _name_keys(name: str) -> List[str]:
+        """Ключи наименования: хвосты строки, начиная с каждого слова"""
+        if not name:
+            return []
+        keys = []
+        start = 0
+        for word in name.split():
+            start = name.index(word, start)
+            keys.append(name[start:])
+            start += len(word)
+        return keys
+
+    def build(self, equipment_list: Iterable[Dict]):
+        """Построить индекс по списку оборудования (id, inventory_number, name)"""
+        self._entries = {
+            eq['id']: (eq['inventory_number'], eq['name']) for eq in equipment_list
+        }
+        self.inventory_index.build(
+            (inventory_number, equipment_id)
+            for equipment_id, (inventory_number, _) in self._entries.items()
+        )
+        self.name_index.build(
+            (key, equipment_id)
+            for equipment_id, (_, name) in self._entries.items()
+            for key in self._name_keys(name)
+        )
+
+    def add(self, equipment_id: int, inventory_number: str, name: str):
+        """Добавить оборудование в индекс"""
+        if equipment_id in self._entries:
+            self.remove(equipment_id)
+        self._entries[equipment_id] = (inventory_number, name)
+        self.inventory_index.add(inventory_number, equipment_id)
+        for key in self._name_keys(name):
+            self.name_index.add(key, equipment_id)
+
+    def remove(self, equipment_id: int):
+        """Удалить оборудование из индекса"""
+        entry = self._entries.pop(equipment_id, None)
+        if entry is None:
+            return
+        inventory_number, name = entry
+        self.inventory_index.remove(inventory_number, equipment_id)
+        for key in self._name_keys(name):
+            self.name_index.remove(key, equipment_id)
+
+    def search(self, text: str, limit: int = 20) -> List[int]:
+        """Найти оборудование по началу инвентарного номера или слова в наименовании.
+        Совпадения по инвентарному номеру идут первыми
+        """
+        text = text.strip()
+        if not text:
+            return []
+        result = self.inventory_index.search(text, limit)
+        if len(result) < limit:
+            result += self.name_index.search(text, limit - len(result), exclude=set(result))
+        return result
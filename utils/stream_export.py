@@ -0,0 +1,128 @@
+"""
+Потоковый экспорт записей в файлы без загрузки всех данных в память.
+
+Модуль не зависит от Qt: записи читаются из итераторов Database.iter_*
+и пишутся на диск блоками, поэтому экспорт можно выполнять в отдельном потоке
+"""
+import csv
+import os
+import threading
+from itertools import islice
+from operator import itemgetter
+from typing import Callable, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+
+# Строк в блоке записи (между проверками отмены и отчетами о ходе экспорта)
+CHUNK_ROWS = 10_000
+# Размер буфера файла, байт
+BUFFER_SIZE = 1 << 20
+
+# Колонки выгрузок: (заголовок, ключ записи, тип значения).
+# Общие для экспорта из интерфейса и из командной строки
+EQUIPMENT_EXPORT_COLUMNS = [
+    ("ID", 'id', 'int'),
+    ("Инвентарный номер", 'inventory_number', 'text'),
+    ("Наименование", 'name', 'text'),
+    ("Категория", 'category', 'text'),
+    ("Дата покупки", 'purchase_date', 'date'),
+    ("Цена", 'purchase_price', 'money'),
+    ("Статус", 'status', 'text')
+]
+
+MAINTENANCE_EXPORT_COLUMNS = [
+    ("ID", 'id', 'int'),
+    ("Инвентарный номер", 'inventory_number', 'text'),
+    ("Наименование", 'name', 'text'),
+    ("Категория", 'category', 'text'),
+    ("Дата", 'maintenance_date', 'date'),
+    ("Тип", 'type', 'text'),
+    ("Стоимость", 'cost', 'money'),
+    ("Описание", 'description', 'text')
+]
+
+DEPRECIATION_EXPORT_COLUMNS = [
+    ("ID", 'id', 'int'),
+    ("Инвентарный номер", 'inventory_number', 'text'),
+    ("Наименование", 'name', 'text'),
+    ("Категория", 'category', 'text'),
+    ("Дата покупки", 'purchase_date', 'date'),
+    ("Цена покупки", 'purchase_price', 'money'),
+    ("Способ", 'method', 'text'),
+    ("Срок, мес.", 'useful_life_months', 'int'),
+    ("Накопленная амортизация", 'accumulated_depreciation', 'money'),
+    ("Остаточная стоимость", 'book_value', 'money'),
+    ("Амортизация за месяц", 'monthly_depreciation', 'money'),
+    ("Осталось, мес.", 'remaining_months', 'int'),
+    ("Стоимость ТО", 'total_maintenance_cost', 'money')
+]
+
+
+class ExportCancelled(Exception):
+    """Экспорт отменен пользователем"""
+
+
+def _row_getter(keys: Sequence[str]) -> Callable:
+    """Функция, возвращающая значения колонок записи в виде кортежа"""
+    getter = itemgetter(*keys)
+    if len(keys) == 1:
+        return lambda row: (getter(row),)
+    return getter
+
+
+def iter_chunks(rows: Iterable, size: int = CHUNK_ROWS) -> Iterable[List]:
+    """Разбить поток записей на списки по size записей"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_csv_stream(rows: Iterable, columns: Sequence[Tuple], stream: TextIO,
+                     progress: Callable[[int], None] = None,
+                     cancel_event: Optional[threading.Event] = None, delimiter: str = ';') -> int:
+    """Записать записи в открытый текстовый поток (файл или стандартный вывод).
+    Возвращает количество записанных строк
+    """
+    getter = _row_getter([column[1] for column in columns])
+    writer = csv.writer(stream, delimiter=delimiter)
+    writer.writerow([column[0] for column in columns])
+    written = 0
+    for chunk in iter_chunks(rows):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled()
+        writer.writerows(map(getter, chunk))
+        written += len(chunk)
+        if progress:
+            progress(written)
+    return written
+
+
+def write_csv(rows: Iterable, columns: Sequence[Tuple], filename: str,
+              progress: Callable[[int], None] = None,
+              cancel_event: Optional[threading.Event] = None, delimiter: str = ';') -> int:
+    """Записать записи (sqlite3.Row или словари) в CSV.
+    columns - (заголовок, ключ записи[, тип]); значения пишутся без форматирования.
+    progress(записано строк) вызывается после каждого блока; при установке cancel_event
+    экспорт прерывается с ExportCancelled. Недописанный файл удаляется.
+    Возвращает количество записанных строк
+    """
+    try:
+        with open(filename, 'w', newline='', encoding='utf-8-sig',
+                  buffering=BUFFER_SIZE) as csvfile:
+            return write_csv_stream(rows, columns, csvfile, progress, cancel_event, delimiter)
+    except BaseException:
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+
+
+def write_file(rows: Iterable, columns: Sequence[Tuple], filename: str,
+               progress: Callable[[int], None] = None,
+               cancel_event: Optional[threading.Event] = None) -> int:
+    """Записать записи в CSV или XLSX в зависимости от расширения файла"""
+    if filename.lower().endswith('.xlsx'):
+        from utils.xlsx_writer import write_xlsx
+        return write_xlsx(rows, columns, filename, progress, cancel_event)
+    return write_csv(rows, columns, filename, progress, cancel_event)
@@ -50,6 +50,7 @@ class ModernStyles:
     CARD_GREEN = "#E8F5E9"
     CARD_ORANGE = "#FFF3E0"
     CARD_PURPLE = "#F3E5F5"
+    CARD_RED = "#FFEBEE"
     
     # Цвета для статусов
     STATUS_ACTIVE = "#4CAF50"
@@ -315,6 +316,13 @@ class ModernStyles:
                 stop:1 {ModernStyles.CARD_PURPLE});
         }}
         
+        QGroupBox[class="stat-card-due"] {{
+            border: 2px solid {ModernStyles.ERROR_LIGHT};
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                stop:0 {ModernStyles.BACKGROUND_WHITE},
+                stop:1 {ModernStyles.CARD_RED});
+        }}
+        
         /* Поля ввода с улучшенными эффектами */
         QLineEdit, QTextEdit, QComboBox, QDateEdit {{
             border: 2px solid {ModernStyles.BORDER_COLOR};
@@ -416,6 +424,12 @@ class ModernStyles:
             color: {ModernStyles.WARNING_COLOR};
         }}
         
+        QLabel[class="stat-value-due"] {{
+            font-size: 32px;
+            font-weight: 800;
+            color: {ModernStyles.ERROR_COLOR};
+        }}
+        
         /* Статусная строка */
         QStatusBar {{
             background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
@@ -0,0 +1,134 @@
+"""
+Совокупная стоимость владения оборудованием (TCO): цена покупки, амортизация,
+затраты на ТО по типам и дни назначений по отделам
+"""
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from utils.depreciation import DepreciationEngine
+from utils.stream_export import CHUNK_ROWS, iter_chunks
+
+
+# Назначения без отдела: оборудование выдано, но отдел у назначения не указан
+WITHOUT_DEPARTMENT = 'Без отдела'
+
+# Колонки оборудования в начале отчета: (заголовок, ключ записи, тип значения)
+_ASSET_COLUMNS = [
+    ("ID", 'id', 'int'),
+    ("Инвентарный номер", 'inventory_number', 'text'),
+    ("Наименование", 'name', 'text'),
+    ("Категория", 'category', 'text'),
+    ("Статус", 'status', 'status'),
+    ("Дата покупки", 'purchase_date', 'date'),
+    ("Цена покупки", 'purchase_price', 'money'),
+    ("Накопленная амортизация", 'accumulated_depreciation', 'money'),
+    ("Остаточная стоимость", 'book_value', 'money'),
+    ("Количество ТО", 'maintenance_count', 'int'),
+    ("Стоимость ТО", 'maintenance_cost', 'money'),
+    ("Стоимость владения", 'total_cost_of_ownership', 'money'),
+    ("Затраты на дату", 'consumed_cost', 'money')
+]
+
+
+def _groups(rows: Iterable[Tuple]) -> Iterator[Tuple[str, List[Tuple]]]:
+    """Строки курсора, сгруппированные по первому значению (инвентарному номеру)"""
+    for key, group in groupby(rows, key=itemgetter(0)):
+        yield key, list(group)
+
+
+class TcoReport:
+    """Отчет о стоимости владения всем оборудованием за один проход.
+
+    Входные данные - три курсора, упорядоченные по инвентарному номеру:
+    оборудование, итоги ТО по (оборудование, тип ТО) и дни назначений
+    по (оборудование, отдел). Курсоры сливаются как при merge join, без запросов
+    по отдельному оборудованию; амортизация считается DepreciationEngine
+    блоками по chunk_rows строк, поэтому память не зависит от размера парка.
+    Типы ТО и отделы задают колонки отчета и передаются заранее
+    """
+
+    def __init__(self, engine: DepreciationEngine, maintenance_types: List[str],
+                 departments: List[str], period: str = None, chunk_rows: int = CHUNK_ROWS):
+        self.engine = engine
+        self.period = period
+        self.chunk_rows = chunk_rows
+        self.maintenance_types = list(maintenance_types)
+        self.departments = [department or WITHOUT_DEPARTMENT for department in departments]
+        self._type_keys = {value: f"type_{index}"
+                           for index, value in enumerate(self.maintenance_types)}
+        self._department_keys = {value: f"department_{index}"
+                                 for index, value in enumerate(self.departments)}
+
+    def columns(self) -> List[Tuple[str, str, str]]:
+        """Колонки отчета: (заголовок, ключ записи, тип значения)"""
+        columns = list(_ASSET_COLUMNS)
+        columns += [(f"ТО: {value}", key, 'money') for value, key in self._type_keys.items()]
+        columns += [(f"Дней: {value}", key, 'int') for value, key in self._department_keys.items()]
+        columns.append(("Дней в назначениях", 'assignment_days', 'int'))
+        return columns
+
+    def _assets(self, assets: Iterable[Dict]) -> Iterator[Dict]:
+        """Оборудование с амортизацией на конец периода (расчет блоками)"""
+        for chunk in iter_chunks(assets, self.chunk_rows):
+            inputs = {column: [row[column] for row in chunk] for column in chunk[0].keys()}
+            yield from self.engine.run(inputs, self.period).iter_rows()
+
+    def iter_rows(self, assets: Iterable[Dict], maintenance: Iterable[Tuple],
+                  assignments: Iterable[Tuple]) -> Iterator[Dict]:
+        """Строки отчета.
+        assets - записи оборудования (id, inventory_number, name, category, status,
+        purchase_date, purchase_price); maintenance - (инвентарный номер, тип ТО,
+        количество, стоимость); assignments - (инвентарный номер, отдел, дней)
+        """
+        empty = dict.fromkeys([*self._type_keys.values(), *self._department_keys.values()])
+        maintenance_groups = _groups(maintenance)
+        assignment_groups = _groups(assignments)
+        next_maintenance = next(maintenance_groups, None)
+        next_assignments = next(assignment_groups, None)
+
+        for asset in self._assets(assets):
+            key = asset['inventory_number']
+            row = dict(asset, **empty)
+            count = cost = days = 0
+
+            # Курсоры отстают от оборудования только на записи, удаленные во время чтения
+            while next_maintenance is not None and next_maintenance[0] < key:
+                next_maintenance = next(maintenance_groups, None)
+            if next_maintenance is not None and next_maintenance[0] == key:
+                for _, maintenance_type, type_count, type_cost in next_maintenance[1]:
+                    count += type_count
+                    cost += type_cost or 0
+                    type_key = self._type_keys.get(maintenance_type)
+                    if type_key:
+                        row[type_key] = type_cost
+                next_maintenance = next(maintenance_groups, None)
+
+            while next_assignments is not None and next_assignments[0] < key:
+                next_assignments = next(assignment_groups, None)
+            if next_assignments is not None and next_assignments[0] == key:
+                for _, department, department_days in next_assignments[1]:
+                    days += department_days or 0
+                    department_key = self._department_keys.get(department or WITHOUT_DEPARTMENT)
+                    if department_key:
+                        row[department_key] = department_days
+                next_assignments = next(assignment_groups, None)
+
+            purchase_price = asset['purchase_price'] or 0
+            row['maintenance_count'] = count
+            row['maintenance_cost'] = round(cost, 2)
+            row['total_cost_of_ownership'] = round(purchase_price + cost, 2)
+            row['consumed_cost'] = round((asset['accumulated_depreciation'] or 0) + cost, 2)
+            row['assignment_days'] = days
+            yield row
+
+    def totals(self, rows: Iterable[Dict]) -> Dict:
+        """Итоги по строкам отчета"""
+        totals = dict.fromkeys(('equipment_count', 'purchase_price', 'maintenance_cost',
+                                'total_cost_of_ownership', 'consumed_cost'), 0)
+        for row in rows:
+            totals['equipment_count'] += 1
+            for key in ('purchase_price', 'maintenance_cost', 'total_cost_of_ownership',
+                        'consumed_cost'):
+                totals[key] += row[key] or 0
+        return totals
@@ -0,0 +1,267 @@
+"""
+Потоковая запись книги Excel (XLSX) без построения книги в памяти.
+
+XML листа пишется в zip-архив блоками строк по мере чтения записей.
+Повторяющиеся строки (категории, типы ТО, статусы) попадают в таблицу общих
+строк один раз; таблица ограничена MAX_SHARED_STRINGS значениями, остальные
+строки пишутся в ячейки непосредственно, поэтому память не зависит от числа строк.
+Модуль не зависит от Qt
+"""
+import os
+import re
+import threading
+import zipfile
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from utils.stream_export import CHUNK_ROWS, ExportCancelled, iter_chunks
+
+
+# Наибольшее число строк листа Excel (включая заголовок)
+MAX_SHEET_ROWS = 1_048_576
+MAX_SHARED_STRINGS = 50_000
+
+# Стили ячеек (индексы cellXfs в styles.xml)
+STYLE_DEFAULT = 0
+STYLE_HEADER = 1
+STYLE_DATE = 2
+STYLE_MONEY = 3
+
+_EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{index}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+
+def column_letter(index: int) -> str:
+    """Буквенное обозначение колонки по номеру с нуля (0 - A, 26 - AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _xml_text(value: str) -> str:
+    """Текст, допустимый в XML"""
+    return escape(_ILLEGAL_XML.sub('', value))
+
+
+class XlsxWriter:
+    """Запись записей в книгу XLSX по колонкам (заголовок, ключ записи, тип).
+    Тип колонки: 'text' (по умолчанию), 'int', 'number', 'money' (формат с
+    разделителями и двумя знаками) или 'date' (значение "ГГГГ-ММ-ДД" - дата Excel).
+    Если строк больше, чем помещается на лист, они продолжаются на следующих листах
+    """
+
+    def __init__(self, columns: Sequence[Tuple], sheet_name: str = "Лист"):
+        self.columns = [(column[0], column[1], column[2] if len(column) > 2 else 'text')
+                        for column in columns]
+        self.sheet_name = sheet_name[:28]
+        self._shared: Dict[str, int] = {}
+        self._shared_uses = 0
+        self._letters = [column_letter(index) for index in range(len(self.columns))]
+
+    def _string_cell(self, reference: str, value: str) -> str:
+        """Ячейка строки: из таблицы общих строк, пока в ней есть место"""
+        index = self._shared.get(value)
+        if index is None:
+            if len(self._shared) >= MAX_SHARED_STRINGS:
+                return f'<c r="{reference}" t="inlineStr"><is><t>{_xml_text(value)}</t></is></c>'
+            index = self._shared[value] = len(self._shared)
+        self._shared_uses += 1
+        return f'<c r="{reference}" t="s"><v>{index}</v></c>'
+
+    def _cell(self, reference: str, value, kind: str) -> str:
+        """XML ячейки со значением колонки типа kind (пустое значение - без ячейки)"""
+        if value is None or value == '':
+            return ''
+        if kind in ('int', 'number', 'money'):
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                return self._string_cell(reference, str(value))
+            style = f' s="{STYLE_MONEY}"' if kind == 'money' else ''
+            text = repr(int(number)) if number.is_integer() else repr(number)
+            return f'<c r="{reference}"{style}><v>{text}</v></c>'
+        if kind == 'date':
+            try:
+                serial = date.fromisoformat(str(value)[:10]).toordinal() - _EXCEL_EPOCH
+            except ValueError:
+                return self._string_cell(reference, str(value))
+            return f'<c r="{reference}" s="{STYLE_DATE}"><v>{serial}</v></c>'
+        return self._string_cell(reference, str(value))
+
+    def _header(self) -> str:
+        """Строка заголовков, закрепленная при прокрутке"""
+        cells = ''.join(
+            f'<c r="{letter}1" t="inlineStr" s="{STYLE_HEADER}"><is><t>{_xml_text(title)}</t></is></c>'
+            for letter, (title, _, _) in zip(self._letters, self.columns)
+        )
+        widths = ''.join(
+            f'<col min="{index}" max="{index}" width="{max(10, min(50, len(title) + 4))}" customWidth="1"/>'
+            for index, (title, _, _) in enumerate(self.columns, start=1)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<sheetViews><sheetView workbookViewId="0">'
+            '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+            '</sheetView></sheetViews>'
+            f'<cols>{widths}</cols><sheetData><row r="1">{cells}</row>'
+        )
+
+    def write(self, rows: Iterable, filename: str, progress: Callable[[int], None] = None,
+              cancel_event: Optional[threading.Event] = None) -> int:
+        """Записать записи (sqlite3.Row или словари) в файл filename.
+        progress(записано строк) вызывается после каждого блока; при установке cancel_event
+        запись прерывается с ExportCancelled. Недописанный файл удаляется.
+        Возвращает количество записанных строк
+        """
+        keys = [key for _, key, _ in self.columns]
+        kinds = [kind for _, _, kind in self.columns]
+        letters = self._letters
+        written = 0
+        sheet_count = 0
+        sheet = None
+        sheet_row = MAX_SHEET_ROWS
+        try:
+            with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+                for chunk in iter_chunks(rows, CHUNK_ROWS):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ExportCancelled()
+                    parts = []
+                    for row in chunk:
+                        if sheet_row >= MAX_SHEET_ROWS:
+                            # Лист заполнен - продолжение на следующем
+                            if sheet is not None:
+                                sheet.write(''.join(parts).encode('utf-8'))
+                                parts = []
+                                self._close_sheet(sheet)
+                            sheet_count += 1
+                            sheet = archive.open(f'xl/worksheets/sheet{sheet_count}.xml', 'w',
+                                                 force_zip64=True)
+                            sheet.write(self._header().encode('utf-8'))
+                            sheet_row = 1
+                        sheet_row += 1
+                        cells = ''.join(
+                            self._cell(f'{letter}{sheet_row}', row[key], kind)
+                            for letter, key, kind in zip(letters, keys, kinds)
+                        )
+                        parts.append(f'<row r="{sheet_row}">{cells}</row>')
+                    sheet.write(''.join(parts).encode('utf-8'))
+                    written += len(chunk)
+                    if progress:
+                        progress(written)
+                if sheet is None:
+                    # Пустой отчет - лист только с заголовком
+                    sheet_count = 1
+                    sheet = archive.open('xl/worksheets/sheet1.xml', 'w')
+                    sheet.write(self._header().encode('utf-8'))
+                self._close_sheet(sheet)
+                self._write_workbook(archive, sheet_count)
+        except BaseException:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        return written
+
+    @staticmethod
+    def _close_sheet(sheet):
+        """Завершить XML листа"""
+        sheet.write(b'</sheetData></worksheet>')
+        sheet.close()
+
+    def _write_workbook(self, archive: zipfile.ZipFile, sheet_count: int):
+        """Служебные части книги и таблица общих строк"""
+        names = [self.sheet_name if sheet_count == 1 else f"{self.sheet_name} {index}"
+                 for index in range(1, sheet_count + 1)]
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES.format(sheets=''.join(
+            _SHEET_CONTENT_TYPE.format(index=index) for index in range(1, sheet_count + 1))))
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + ''.join(f'<sheet name="{_xml_text(name)}" sheetId="{index}" r:id="rId{index}"/>'
+                      for index, name in enumerate(names, start=1))
+            + '</sheets></workbook>'
+        ))
+        archive.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(
+                f'<Relationship Id="rId{index}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{index}.xml"/>'
+                for index in range(1, sheet_count + 1))
+            + f'<Relationship Id="rId{sheet_count + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/>'
+            f'<Relationship Id="rId{sheet_count + 2}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+            'Target="sharedStrings.xml"/>'
+            '</Relationships>'
+        ))
+        archive.writestr('xl/styles.xml', _STYLES)
+        with archive.open('xl/sharedStrings.xml', 'w') as strings:
+            strings.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                f'count="{self._shared_uses}" uniqueCount="{len(self._shared)}">'
+            ).encode('utf-8'))
+            # Словарь хранит строки в порядке добавления, то есть по возрастанию индекса
+            for value in self._shared:
+                strings.write(f'<si><t xml:space="preserve">{_xml_text(value)}</t></si>'.encode('utf-8'))
+            strings.write(b'</sst>')
+
+
+def write_xlsx(rows: Iterable, columns: Sequence[Tuple], filename: str,
+               progress: Callable[[int], None] = None,
+               cancel_event: Optional[threading.Event] = None, sheet_name: str = "Лист") -> int:
+    """Записать записи в книгу XLSX (см. XlsxWriter). Возвращает количество строк"""
+    return XlsxWriter(columns, sheet_name).write(rows, filename, progress, cancel_event)
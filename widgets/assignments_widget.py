@@ -1,23 +1,27 @@
 """
 Виджет для работы с историей перемещений оборудования
 """
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QComboBox, QLabel,
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                             QPushButton, QLabel,
                              QDialog, QFormLayout, QDateEdit, QLineEdit,
                              QMessageBox, QHeaderView, QGroupBox, QMenu)
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QAction
 from database import Database
 from utils.logger import app_logger
+from models.equipment_list_model import EquipmentListModel
+from models.record_table_model import Column, RecordTableModel, equipment_label
+from widgets.equipment_combo import EquipmentComboBox
 
 
 class AssignmentDialog(QDialog):
     """Диалог для добавления назначения оборудования"""
     
-    def __init__(self, parent=None, db=None, assignment_data=None):
+    def __init__(self, parent=None, db=None, assignment_data=None, equipment_model=None):
         super().__init__(parent)
         self.db = db
         self.assignment_data = assignment_data
+        self.equipment_model = equipment_model or EquipmentListModel(db, self)
         self.init_ui()
     
     def init_ui(self):
@@ -45,19 +49,12 @@ class AssignmentDialog(QDialog):
         form.setSpacing(16)
         
         # Оборудование
-        self.equipment_combo = QComboBox()
+        self.equipment_combo = EquipmentComboBox(self.equipment_model)
         self.equipment_combo.setMinimumHeight(38)
         self.equipment_combo.setStyleSheet("font-size: 14px; padding: 10px 14px;")
-        equipment_list = self.db.get_all_equipment()
-        if not equipment_list:
+        if self.equipment_model.rowCount() == 0:
             QMessageBox.warning(self, "Предупреждение", 
                               "Нет доступного оборудования. Сначала добавьте оборудование в реестр.")
-        else:
-            for eq in equipment_list:
-                self.equipment_combo.addItem(
-                    f"{eq['inventory_number']} - {eq['name']}",
-                    eq['id']
-                )
         form.addRow("Оборудование *:", self.equipment_combo)
         
         # Назначено кому
@@ -119,11 +116,7 @@ class AssignmentDialog(QDialog):
         
         # Заполняем данные, если редактируем
         if self.assignment_data:
-            equipment_id = self.assignment_data.get('equipment_id')
-            for i in range(self.equipment_combo.count()):
-                if self.equipment_combo.itemData(i) == equipment_id:
-                    self.equipment_combo.setCurrentIndex(i)
-                    break
+            self.equipment_combo.set_current_equipment(self.assignment_data.get('equipment_id'))
             
             self.assigned_to_edit.setText(self.assignment_data.get('assigned_to', ''))
             self.department_edit.setText(self.assignment_data.get('department', ''))
@@ -147,7 +140,7 @@ class AssignmentDialog(QDialog):
             end_date = self.end_date_edit.date().toString(Qt.DateFormat.ISODate)
         
         data = {
-            'equipment_id': self.equipment_combo.currentData(),
+            'equipment_id': self.equipment_combo.current_equipment_id(),
             'assigned_to': self.assigned_to_edit.text().strip(),
             'department': self.department_edit.text().strip() or None,
             'start_date': self.start_date_edit.date().toString(Qt.DateFormat.ISODate),
@@ -162,9 +155,10 @@ class AssignmentsWidget(QWidget):
     
     assignment_updated = pyqtSignal()
     
-    def __init__(self, db):
+    def __init__(self, db, equipment_model=None):
         super().__init__()
         self.db = db
+        self.equipment_model = equipment_model or EquipmentListModel(db, self)
         self.init_ui()
         self.refresh_data()
     
@@ -178,8 +172,7 @@ class AssignmentsWidget(QWidget):
         filter_layout = QHBoxLayout()
         
         filter_layout.addWidget(QLabel("Оборудование:"))
-        self.equipment_filter = QComboBox()
-        self.equipment_filter.addItem("Все", None)
+        self.equipment_filter = EquipmentComboBox(self.equipment_model, "Все")
         self.equipment_filter.currentIndexChanged.connect(self.refresh_data)
         filter_layout.addWidget(self.equipment_filter)
         
@@ -218,87 +211,59 @@ class AssignmentsWidget(QWidget):
         layout.addLayout(buttons_layout)
         
         # Таблица назначений
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Оборудование", "Назначено", "Отдел", "Дата начала", "Дата окончания"
-        ])
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = RecordTableModel([
+            Column("ID", 'id', 'int'),
+            Column("Оборудование", value=equipment_label),
+            Column("Назначено", 'assigned_to'),
+            Column("Отдел", 'department'),
+            Column("Дата начала", 'start_date'),
+            Column("Дата окончания", value=lambda record: record.get('end_date') or 'Текущее')
+        ], self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.setAlternatingRowColors(True)
         self.table.setSortingEnabled(True)
+        # Новые назначения встают на место по дате начала, а не в конец таблицы
+        self.table.sortByColumn(4, Qt.SortOrder.DescendingOrder)
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
         layout.addWidget(self.table)
     
-    def refresh_equipment_list(self):
-        """Обновить список оборудования в фильтре"""
-        current_id = self.equipment_filter.currentData()
-        # Отключаем сигнал, чтобы избежать рекурсии
-        self.equipment_filter.blockSignals(True)
-        self.equipment_filter.clear()
-        self.equipment_filter.addItem("Все", None)
-        
-        equipment_list = self.db.get_all_equipment()
-        for eq in equipment_list:
-            self.equipment_filter.addItem(
-                f"{eq['inventory_number']} - {eq['name']}",
-                eq['id']
-            )
-        
-        # Восстанавливаем выбор
-        if current_id:
-            for i in range(self.equipment_filter.count()):
-                if self.equipment_filter.itemData(i) == current_id:
-                    self.equipment_filter.setCurrentIndex(i)
-                    break
-        
-        # Включаем сигнал обратно
-        self.equipment_filter.blockSignals(False)
-    
     def refresh_data(self):
         """Обновить данные в таблице"""
-        self.refresh_equipment_list()
-        
-        equipment_id = self.equipment_filter.currentData()
-        
-        # Получаем все назначения или фильтруем по оборудованию
-        all_equipment = self.db.get_all_equipment()
-        all_assignments = []
+        equipment_id = self.equipment_filter.current_equipment_id()
         
-        for eq in all_equipment:
-            if equipment_id is None or eq['id'] == equipment_id:
-                assignments = self.db.get_assignments_by_equipment(eq['id'])
-                for assignment in assignments:
-                    assignment['equipment_name'] = f"{eq['inventory_number']} - {eq['name']}"
-                    all_assignments.append(assignment)
+        # Назначения вместе с данными оборудования одним запросом, по убыванию даты начала
+        self.model.set_records(self.db.get_assignments_report(equipment_id))
         
-        # Сортируем по дате начала
-        all_assignments.sort(key=lambda x: x['start_date'] or '', reverse=True)
-        
-        self.table.setRowCount(len(all_assignments))
-        
-        for row, assignment in enumerate(all_assignments):
-            self.table.setItem(row, 0, QTableWidgetItem(str(assignment['id'])))
-            self.table.setItem(row, 1, QTableWidgetItem(assignment.get('equipment_name', '')))
-            self.table.setItem(row, 2, QTableWidgetItem(assignment['assigned_to']))
-            self.table.setItem(row, 3, QTableWidgetItem(assignment.get('department', '') or ''))
-            self.table.setItem(row, 4, QTableWidgetItem(assignment['start_date']))
-            end_date = assignment.get('end_date') or 'Текущее'
-            self.table.setItem(row, 5, QTableWidgetItem(end_date))
+        self.assignment_updated.emit()
+    
+    def sync_assignment_rows(self, assignments):
+        """Обновить в таблице строки переданных назначений, не перезагружая всю историю"""
+        equipment_id = self.equipment_filter.current_equipment_id()
+        for assignment in assignments:
+            if equipment_id and assignment['equipment_id'] != equipment_id:
+                self.model.remove_record(assignment['id'])
+            elif self.model.update_record(assignment) < 0:
+                self.model.insert_record(assignment)
         
         self.assignment_updated.emit()
     
+    def current_assignment(self):
+        """Запись выбранного назначения"""
+        return self.model.record(self.table.currentIndex().row())
+    
     def add_assignment(self):
         """Добавить новое назначение"""
-        equipment_list = self.db.get_all_equipment()
-        if not equipment_list:
+        if self.equipment_model.rowCount() == 0:
             QMessageBox.warning(self, "Ошибка", 
                               "Нет доступного оборудования. Сначала добавьте оборудование в реестр.")
             return
         
-        dialog = AssignmentDialog(self, self.db)
+        dialog = AssignmentDialog(self, self.db, equipment_model=self.equipment_model)
         if dialog.exec():
             data = dialog.get_data()
             if not data['assigned_to']:
@@ -317,7 +282,8 @@ class AssignmentsWidget(QWidget):
                     equipment_id=data['equipment_id'],
                     details=f"Назначено: {data['assigned_to']}, Отдел: {data.get('department', 'N/A')}"
                 )
-                self.refresh_data()
+                # Новое назначение закрывает текущее, поэтому обновляем всю историю оборудования
+                self.sync_assignment_rows(self.db.get_assignments_report(data['equipment_id']))
                 QMessageBox.information(self, "Успех", "Назначение добавлено")
             except Exception as e:
                 app_logger.log_error("Добавление назначения", str(e))
@@ -325,19 +291,19 @@ class AssignmentsWidget(QWidget):
     
     def edit_assignment(self):
         """Редактировать назначение"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_assignment()
+        if selected is None:
             QMessageBox.warning(self, "Ошибка", "Выберите запись для редактирования")
             return
         
-        assignment_id = int(self.table.item(current_row, 0).text())
+        assignment_id = selected['id']
         assignment_data = self.db.get_assignment_by_id(assignment_id)
         
         if not assignment_data:
             QMessageBox.warning(self, "Ошибка", "Запись не найдена")
             return
         
-        dialog = AssignmentDialog(self, self.db, assignment_data)
+        dialog = AssignmentDialog(self, self.db, assignment_data, self.equipment_model)
         if dialog.exec():
             data = dialog.get_data()
             if not data['assigned_to']:
@@ -351,7 +317,8 @@ class AssignmentsWidget(QWidget):
                     assignment_id=assignment_id,
                     equipment_id=data.get('equipment_id')
                 )
-                self.refresh_data()
+                assignment = self.db.get_assignment_report_row(assignment_id)
+                self.sync_assignment_rows([assignment] if assignment else [])
                 QMessageBox.information(self, "Успех", "Назначение обновлено")
             except Exception as e:
                 app_logger.log_error("Обновление назначения", str(e), f"ID: {assignment_id}")
@@ -359,14 +326,14 @@ class AssignmentsWidget(QWidget):
     
     def delete_assignment(self):
         """Удалить назначение"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_assignment()
+        if selected is None:
             QMessageBox.warning(self, "Ошибка", "Выберите запись для удаления")
             return
         
-        assignment_id = int(self.table.item(current_row, 0).text())
-        equipment_text = self.table.item(current_row, 1).text()
-        assigned_to = self.table.item(current_row, 2).text()
+        assignment_id = selected['id']
+        equipment_text = equipment_label(selected)
+        assigned_to = selected['assigned_to']
         
         reply = QMessageBox.question(
             self, 'Подтверждение',
@@ -384,7 +351,8 @@ class AssignmentsWidget(QWidget):
                     "Удалено",
                     assignment_id=assignment_id
                 )
-                self.refresh_data()
+                self.model.remove_record(assignment_id, self.table.currentIndex().row())
+                self.assignment_updated.emit()
                 QMessageBox.information(self, "Успех", "Назначение удалено")
             except Exception as e:
                 app_logger.log_error("Удаление назначения", str(e), f"ID: {assignment_id}")
@@ -392,18 +360,13 @@ class AssignmentsWidget(QWidget):
     
     def view_history(self):
         """Просмотр истории назначений для выбранного оборудования"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_assignment()
+        if selected is None:
             QMessageBox.warning(self, "Ошибка", "Выберите запись для просмотра")
             return
         
-        equipment_name = self.table.item(current_row, 1).text()
-        # Получаем ID оборудования из названия
-        equipment_id = None
-        for eq in self.db.get_all_equipment():
-            if f"{eq['inventory_number']} - {eq['name']}" == equipment_name:
-                equipment_id = eq['id']
-                break
+        equipment_name = equipment_label(selected)
+        equipment_id = selected['equipment_id']
         
         if equipment_id:
             assignments = self.db.get_assignments_by_equipment(equipment_id)
@@ -423,7 +386,7 @@ class AssignmentsWidget(QWidget):
     
     def show_context_menu(self, position):
         """Показать контекстное меню для таблицы"""
-        if self.table.itemAt(position) is None:
+        if not self.table.indexAt(position).isValid():
             return
         
         menu = QMenu(self)
@@ -156,6 +156,46 @@ class DashboardWidget(QWidget):
         finance_group.setLayout(finance_layout)
         stats_grid.addWidget(finance_group, 1, 1)
         
+        # Карточка "Сроки ТО" - из списка, предрассчитанного фоновым заданием
+        due_group = QGroupBox("⏰ Сроки ТО")
+        due_group.setProperty("class", "stat-card-due")
+        due_layout = QVBoxLayout()
+        due_layout.setSpacing(12)
+        due_layout.setContentsMargins(20, 30, 20, 20)
+        
+        self.overdue_label = QLabel("0")
+        self.overdue_label.setProperty("class", "stat-value-due")
+        due_layout.addWidget(self.overdue_label)
+        
+        overdue_text_label = QLabel("Требуют обслуживания")
+        overdue_text_label.setProperty("class", "stat-label")
+        due_layout.addWidget(overdue_text_label)
+        
+        due_layout.addSpacing(16)
+        
+        self.overdue_details_label = QLabel("⚠ Просрочено: 0")
+        self.overdue_details_label.setStyleSheet("font-size: 13px; font-weight: 600; color: #F44336; padding: 4px;")
+        due_layout.addWidget(self.overdue_details_label)
+        
+        self.first_due_label = QLabel("🆕 Требуется первое ТО: 0")
+        self.first_due_label.setStyleSheet("font-size: 13px; font-weight: 600; color: #FF9800; padding: 4px;")
+        due_layout.addWidget(self.first_due_label)
+        
+        self.upcoming_due_label = QLabel("📅 В ближайшие 30 дней: 0")
+        self.upcoming_due_label.setStyleSheet("font-size: 13px; font-weight: 600; color: #2196F3; padding: 4px;")
+        due_layout.addWidget(self.upcoming_due_label)
+        
+        self.next_due_label = QLabel("📌 Ближайшие ТО: -")
+        self.next_due_label.setStyleSheet("font-size: 13px; color: #212121; padding: 4px;")
+        due_layout.addWidget(self.next_due_label)
+        
+        self.due_computed_label = QLabel("Расчет еще не выполнялся")
+        self.due_computed_label.setStyleSheet("font-size: 12px; color: #757575; padding: 4px;")
+        due_layout.addWidget(self.due_computed_label)
+        
+        due_group.setLayout(due_layout)
+        stats_grid.addWidget(due_group, 2, 0, 1, 2)
+        
         layout.addLayout(stats_grid)
         
         # Кнопка обновления с улучшенным дизайном
@@ -224,4 +264,26 @@ class DashboardWidget(QWidget):
         
         # Финансы
         self.total_purchase_cost_label.setText(f"{total_purchase_cost:,.2f} ₽".replace(',', ' '))
-        self.total_maintenance_finance_label.setText(f"🔧 Стоимость ТО: {total_maintenance_cost:,.2f} ₽".replace(',', ' '))
\ No newline at end of file
+        self.total_maintenance_finance_label.setText(f"🔧 Стоимость ТО: {total_maintenance_cost:,.2f} ₽".replace(',', ' '))
+        
+        self.refresh_due_counts()
+    
+    def refresh_due_counts(self):
+        """Обновить сводку сроков ТО (чтение готовых итогов, без пересчета)"""
+        counts = self.db.get_due_counts()
+        self.overdue_label.setText(str(counts['overdue'] + counts['first']))
+        self.overdue_details_label.setText(f"⚠ Просрочено: {counts['overdue']}")
+        self.first_due_label.setText(f"🆕 Требуется первое ТО: {counts['first']}")
+        self.upcoming_due_label.setText(f"📅 В ближайшие 30 дней: {counts['upcoming']}")
+        next_due = self.db.get_next_due(limit=3)
+        if next_due:
+            self.next_due_label.setText("📌 Ближайшие ТО: " + "; ".join(
+                f"{item['inventory_number']} - {item['next_date']}" for item in next_due))
+        else:
+            self.next_due_label.setText("📌 Ближайшие ТО: -")
+        if counts['computed_at'] is None:
+            self.due_computed_label.setText("Расчет еще не выполнялся")
+        elif counts['current']:
+            self.due_computed_label.setText(f"🕒 Рассчитано: {counts['computed_at']}")
+        else:
+            self.due_computed_label.setText(f"🕒 Рассчитано: {counts['computed_at']} (обновляется)")
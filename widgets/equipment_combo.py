@@ -0,0 +1,65 @@
+"""
+Выпадающий список оборудования на общей модели
+"""
+from typing import Optional
+from PyQt6.QtWidgets import QComboBox, QListView
+from PyQt6.QtCore import QConcatenateTablesProxyModel
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+from models.equipment_list_model import EquipmentListModel
+from widgets.equipment_completer import EquipmentCompleter
+
+
+class EquipmentComboBox(QComboBox):
+    """Выпадающий список оборудования с поиском по мере ввода.
+    Не загружает данные сам, а привязывается к общей EquipmentListModel
+    """
+
+    def __init__(self, equipment_model: EquipmentListModel, all_text: str = None, parent=None):
+        super().__init__(parent)
+        self.equipment_model = equipment_model
+        # Смещение строк модели оборудования относительно строк списка
+        self._row_offset = 0
+
+        if all_text is not None:
+            # Элемент "Все" добавляется перед общей моделью, не изменяя ее
+            all_model = QStandardItemModel(self)
+            all_model.appendRow(QStandardItem(all_text))
+            combined = QConcatenateTablesProxyModel(self)
+            combined.addSourceModel(all_model)
+            combined.addSourceModel(equipment_model)
+            self.setModel(combined)
+            self._row_offset = 1
+        else:
+            self.setModel(equipment_model)
+
+        # Не перебираем все элементы для расчета ширины и высоты строк
+        self.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToMinimumContentsLengthWithIcon)
+        self.setMinimumContentsLength(30)
+        if isinstance(self.view(), QListView):
+            self.view().setUniformItemSizes(True)
+
+        # Поиск по мере ввода через префиксный индекс общей модели.
+        # Подсказки ставятся прямо в поле ввода, чтобы QComboBox не перебирал
+        # всю модель при каждом нажатии клавиши
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.equipment_completer = EquipmentCompleter(equipment_model, self)
+        self.equipment_completer.attach(self.lineEdit())
+        self.equipment_completer.equipment_selected.connect(self.set_current_equipment)
+
+    def current_equipment_id(self) -> Optional[int]:
+        """ID выбранного оборудования (None для элемента "Все")"""
+        return self.equipment_model.equipment_id(self.currentIndex() - self._row_offset)
+
+    def set_current_equipment(self, equipment_id: Optional[int]) -> bool:
+        """Выбрать оборудование по ID"""
+        if equipment_id is None:
+            if self._row_offset:
+                self.setCurrentIndex(0)
+                return True
+            return False
+        row = self.equipment_model.row_of(equipment_id)
+        if row < 0:
+            return False
+        self.setCurrentIndex(row + self._row_offset)
+        return True
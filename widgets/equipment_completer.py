@@ -0,0 +1,55 @@
+"""
+Подсказки оборудования по мере ввода на основе префиксного индекса
+"""
+from PyQt6.QtWidgets import QCompleter, QLineEdit
+from PyQt6.QtCore import Qt, QModelIndex, QTimer, pyqtSignal
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+from models.equipment_list_model import EquipmentListModel
+
+
+class EquipmentCompleter(QCompleter):
+    """Подсказки первых N совпадений из EquipmentSearchIndex.
+    Модель подсказок содержит только найденные элементы, поэтому не зависит от размера реестра
+    """
+
+    equipment_selected = pyqtSignal(int)
+
+    IdRole = Qt.ItemDataRole.UserRole
+    InventoryRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, equipment_model: EquipmentListModel, parent=None,
+                 limit: int = 20, insert_inventory_number: bool = False):
+        super().__init__(parent)
+        self.equipment_model = equipment_model
+        self.limit = limit
+        self.matches_model = QStandardItemModel(self)
+        self.setModel(self.matches_model)
+        # Модель уже отфильтрована индексом
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setMaxVisibleItems(min(limit, 15))
+        if insert_inventory_number:
+            self.setCompletionRole(self.InventoryRole)
+        self.activated[QModelIndex].connect(self.on_activated)
+
+    def attach(self, line_edit: QLineEdit):
+        """Подключить подсказки к полю ввода"""
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.update_matches)
+
+    def update_matches(self, text: str):
+        """Обновить список подсказок для введенного текста"""
+        self.matches_model.clear()
+        for equipment_id in self.equipment_model.search_index.search(text, self.limit):
+            item = QStandardItem(self.equipment_model.label_of(equipment_id))
+            item.setData(equipment_id, self.IdRole)
+            item.setData(self.equipment_model.inventory_number_of(equipment_id), self.InventoryRole)
+            self.matches_model.appendRow(item)
+        if self.matches_model.rowCount() and self.widget() and self.widget().hasFocus():
+            self.complete()
+
+    def on_activated(self, index: QModelIndex):
+        """Выбор подсказки"""
+        equipment_id = index.data(self.IdRole)
+        if equipment_id is not None:
+            # Сообщаем после того, как поле ввода вставит текст подсказки
+            QTimer.singleShot(0, lambda: self.equipment_selected.emit(equipment_id))
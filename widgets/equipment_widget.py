@@ -1,18 +1,23 @@
 """
 Виджет для работы с реестром оборудования
 """
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QLineEdit, QLabel,
+import sqlite3
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                             QPushButton, QLineEdit, QLabel,
                              QDialog, QFormLayout, QDateEdit, QComboBox,
-                             QMessageBox, QHeaderView, QGroupBox, QMenu)
+                             QMessageBox, QHeaderView, QGroupBox, QMenu, QCheckBox)
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
-from PyQt6.QtGui import QAction, QColor, QFont
+from PyQt6.QtGui import QAction
 from PyQt6.QtGui import QDoubleValidator
 from decimal import Decimal
 from datetime import datetime
 from utils.export import ExportManager
 from utils.import_data import ImportManager
+from utils.stream_export import EQUIPMENT_EXPORT_COLUMNS
 from utils.logger import app_logger
+from models.equipment_list_model import EquipmentListModel
+from models.record_table_model import Column, RecordTableModel
+from widgets.equipment_completer import EquipmentCompleter
 
 
 class EquipmentDialog(QDialog):
@@ -232,9 +237,10 @@ class EquipmentWidget(QWidget):
     
     equipment_updated = pyqtSignal()
     
-    def __init__(self, db):
+    def __init__(self, db, equipment_model=None):
         super().__init__()
         self.db = db
+        self.equipment_model = equipment_model or EquipmentListModel(db, self)
         self.init_ui()
         self.refresh_data()
     
@@ -252,6 +258,12 @@ class EquipmentWidget(QWidget):
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("Поиск по инвентарному номеру или названию...")
         self.search_edit.textChanged.connect(self.apply_filters)
+        # Подсказки по инвентарному номеру и наименованию из префиксного индекса
+        self.search_completer = EquipmentCompleter(
+            self.equipment_model, self, insert_inventory_number=True
+        )
+        self.search_completer.attach(self.search_edit)
+        self.search_completer.equipment_selected.connect(self.select_equipment)
         search_row.addWidget(QLabel("Поиск:"))
         search_row.addWidget(self.search_edit)
         self.search_btn = QPushButton("🔍 Найти")
@@ -320,14 +332,19 @@ class EquipmentWidget(QWidget):
         layout.addLayout(buttons_layout)
         
         # Таблица оборудования
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Инвентарный номер", "Наименование", "Категория",
-            "Дата покупки", "Цена", "Статус"
-        ])
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = RecordTableModel([
+            Column("ID", 'id', 'int'),
+            Column("Инвентарный номер", 'inventory_number'),
+            Column("Наименование", 'name'),
+            Column("Категория", 'category'),
+            Column("Дата покупки", 'purchase_date', 'date'),
+            Column("Цена", 'purchase_price', 'money_plain'),
+            Column("Статус", 'status', 'status')
+        ], self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.setAlternatingRowColors(True)
         self.table.setSortingEnabled(True)  # Включаем сортировку
@@ -366,70 +383,64 @@ class EquipmentWidget(QWidget):
         self.apply_filters()
         self.equipment_updated.emit()
     
-    def apply_filters(self):
-        """Применить фильтры к таблице"""
-        equipment_list = self.db.get_all_equipment()
-        
-        # Фильтрация
+    def current_filter(self):
+        """Функция-фильтр по текущим условиям поиска и фильтрам"""
         search_text = self.search_edit.text().strip().lower()
         category_filter = self.category_filter.currentData()
         status_filter = self.status_filter.currentData()
         
-        filtered_list = []
-        for equipment in equipment_list:
+        def matches(equipment):
             # Поиск по тексту
             if search_text:
                 if (search_text not in equipment['inventory_number'].lower() and
                     search_text not in equipment['name'].lower()):
-                    continue
+                    return False
             
             # Фильтр по категории
             if category_filter and equipment.get('category') != category_filter:
-                continue
+                return False
             
             # Фильтр по статусу
             if status_filter and equipment.get('status') != status_filter:
-                continue
+                return False
             
-            filtered_list.append(equipment)
+            return True
         
-        # Отображаем отфильтрованные данные
-        self.table.setRowCount(len(filtered_list))
+        return matches
+    
+    def apply_filters(self):
+        """Применить фильтры к таблице"""
+        equipment_list = self.db.get_all_equipment()
         
-        for row, equipment in enumerate(filtered_list):
-            self.table.setItem(row, 0, QTableWidgetItem(str(equipment['id'])))
-            self.table.setItem(row, 1, QTableWidgetItem(equipment['inventory_number']))
-            self.table.setItem(row, 2, QTableWidgetItem(equipment['name']))
-            self.table.setItem(row, 3, QTableWidgetItem(equipment['category'] or ''))
-            
-            # Форматирование даты
-            date_text = equipment['purchase_date'] or ''
-            self.table.setItem(row, 4, QTableWidgetItem(date_text))
-            
-            # Форматирование цены
-            price = equipment['purchase_price'] or '0'
-            try:
-                price_decimal = Decimal(str(price))
-                price_text = f"{price_decimal:,.2f}".replace(',', ' ')
-            except:
-                price_text = str(price)
-            price_item = QTableWidgetItem(price_text)
-            price_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table.setItem(row, 5, price_item)
-            
-            # Форматирование статуса с цветовой индикацией
-            status = equipment['status']
-            status_map = {
-                'active': ('Активное', '#4CAF50'),
-                'in_repair': ('В ремонте', '#FF9800'),
-                'written_off': ('Списано', '#9E9E9E'),
-                'reserved': ('Резерв', '#2196F3')
-            }
-            status_text, status_color = status_map.get(status, (status, '#757575'))
-            status_item = QTableWidgetItem(status_text)
-            status_item.setForeground(QColor(status_color))
-            status_item.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-            self.table.setItem(row, 6, status_item)
+        # Фильтрация
+        matches = self.current_filter()
+        filtered_list = [equipment for equipment in equipment_list if matches(equipment)]
+        
+        # Отображаем отфильтрованные данные (ячейки форматируются моделью при отрисовке)
+        self.model.set_records(filtered_list)
+    
+    def sync_equipment_row(self, equipment_id: int, hint: int = -1):
+        """Обновить в таблице одну строку после добавления, изменения или удаления
+        оборудования, не перезагружая весь реестр
+        """
+        equipment = self.db.get_equipment_by_id(equipment_id)
+        if equipment is None or not self.current_filter()(equipment):
+            self.model.remove_record(equipment_id, hint)
+        elif self.model.update_record(equipment, hint) < 0:
+            self.model.insert_record(equipment)
+        
+        # Новая категория появляется в фильтре сразу
+        category = equipment.get('category') if equipment else None
+        if category and self.category_filter.findData(category) < 0:
+            position = 1
+            while (position < self.category_filter.count() and
+                   self.category_filter.itemData(position) < category):
+                position += 1
+            self.category_filter.blockSignals(True)
+            self.category_filter.insertItem(position, category, category)
+            self.category_filter.blockSignals(False)
+        
+        self.equipment_updated.emit()
     
     def search_equipment(self):
         """Поиск оборудования по инвентарному номеру"""
@@ -441,15 +452,23 @@ class EquipmentWidget(QWidget):
         equipment = self.db.get_equipment_by_inventory(inventory_number)
         if equipment:
             # Находим строку в таблице
-            for row in range(self.table.rowCount()):
-                if self.table.item(row, 1).text() == inventory_number:
-                    self.table.selectRow(row)
-                    self.table.scrollToItem(self.table.item(row, 0))
-                    break
+            self.select_equipment(equipment['id'])
         else:
             QMessageBox.information(self, "Результат поиска", 
                                   f"Оборудование с инвентарным номером '{inventory_number}' не найдено")
     
+    def select_equipment(self, equipment_id: int):
+        """Выделить оборудование в таблице по ID"""
+        for row, equipment in enumerate(self.model.records()):
+            if equipment['id'] == equipment_id:
+                self.table.selectRow(row)
+                self.table.scrollTo(self.model.index(row, 0))
+                break
+    
+    def current_equipment(self):
+        """Запись выбранного в таблице оборудования"""
+        return self.model.record(self.table.currentIndex().row())
+    
     def clear_search(self):
         """Очистить поиск и фильтры"""
         self.search_edit.clear()
@@ -474,7 +493,7 @@ class EquipmentWidget(QWidget):
                     inventory_number=data['inventory_number'],
                     details=f"Категория: {data.get('category', 'N/A')}"
                 )
-                self.refresh_data()
+                self.sync_equipment_row(equipment_id)
                 QMessageBox.information(self, "Успех", "Оборудование добавлено")
             except ValueError as e:
                 app_logger.log_error("Добавление оборудования", str(e))
@@ -482,15 +501,13 @@ class EquipmentWidget(QWidget):
     
     def edit_equipment(self):
         """Редактировать оборудование"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_equipment()
+        if selected is None:
             QMessageBox.warning(self, "Ошибка", "Выберите оборудование для редактирования")
             return
         
-        equipment_id = int(self.table.item(current_row, 0).text())
-        equipment = self.db.get_equipment_by_inventory(
-            self.table.item(current_row, 1).text()
-        )
+        equipment_id = selected['id']
+        equipment = self.db.get_equipment_by_id(equipment_id)
         
         if equipment:
             dialog = EquipmentDialog(self, equipment)
@@ -507,7 +524,7 @@ class EquipmentWidget(QWidget):
                         equipment_id=equipment_id,
                         inventory_number=data.get('inventory_number', 'N/A')
                     )
-                    self.refresh_data()
+                    self.sync_equipment_row(equipment_id, self.table.currentIndex().row())
                     QMessageBox.information(self, "Успех", "Оборудование обновлено")
                 except Exception as e:
                     app_logger.log_error("Обновление оборудования", str(e), f"ID: {equipment_id}")
@@ -515,13 +532,13 @@ class EquipmentWidget(QWidget):
     
     def delete_equipment(self):
         """Удалить оборудование"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_equipment()
+        if selected is None:
             QMessageBox.warning(self, "Ошибка", "Выберите оборудование для удаления")
             return
         
-        equipment_id = int(self.table.item(current_row, 0).text())
-        inventory_number = self.table.item(current_row, 1).text()
+        equipment_id = selected['id']
+        inventory_number = selected['inventory_number']
         
         reply = QMessageBox.question(
             self, 'Подтверждение',
@@ -538,7 +555,7 @@ class EquipmentWidget(QWidget):
                     equipment_id=equipment_id,
                     inventory_number=inventory_number
                 )
-                self.refresh_data()
+                self.sync_equipment_row(equipment_id, self.table.currentIndex().row())
                 QMessageBox.information(self, "Успех", "Оборудование удалено")
             except Exception as e:
                 app_logger.log_error("Удаление оборудования", str(e), f"ID: {equipment_id}")
@@ -546,7 +563,7 @@ class EquipmentWidget(QWidget):
     
     def show_context_menu(self, position):
         """Показать контекстное меню для таблицы"""
-        if self.table.itemAt(position) is None:
+        if not self.table.indexAt(position).isValid():
             return
         
         menu = QMenu(self)
@@ -569,42 +586,63 @@ class EquipmentWidget(QWidget):
     
     def copy_inventory_number(self):
         """Копировать инвентарный номер в буфер обмена"""
-        current_row = self.table.currentRow()
-        if current_row >= 0:
-            inventory_number = self.table.item(current_row, 1).text()
+        selected = self.current_equipment()
+        if selected is not None:
+            inventory_number = selected['inventory_number']
             from PyQt6.QtWidgets import QApplication
             QApplication.clipboard().setText(inventory_number)
             self.parent().statusBar().showMessage(f"Инвентарный номер '{inventory_number}' скопирован", 2000)
     
     def export_data(self):
         """Экспорт данных оборудования в CSV"""
-        if self.table.rowCount() == 0:
+        if self.model.rowCount() == 0:
             QMessageBox.warning(self, "Предупреждение", "Нет данных для экспорта")
             return
         
         filename = ExportManager.get_export_filename(self, "equipment")
         if filename:
-            if ExportManager.export_table_to_csv(self.table, filename):
+            # Записи читаются из базы в фоновом потоке и фильтруются теми же условиями
+            matches = self.current_filter()
+            try:
+                count = ExportManager.stream_to_file(
+                    self, lambda: filter(matches, map(dict, self.db.iter_equipment())),
+                    EQUIPMENT_EXPORT_COLUMNS, filename, self.model.rowCount()
+                )
+            except (OSError, sqlite3.Error) as e:
+                app_logger.log_error("Экспорт оборудования", str(e))
+                QMessageBox.warning(self, "Ошибка", "Не удалось экспортировать данные")
+                return
+            if count is not None:
                 app_logger.log_report_action("Экспорт оборудования", f"Файл: {filename}")
                 QMessageBox.information(self, "Успех", f"Данные экспортированы в {filename}")
-            else:
-                app_logger.log_error("Экспорт оборудования", "Не удалось экспортировать данные")
-                QMessageBox.warning(self, "Ошибка", "Не удалось экспортировать данные")
     
     def import_data(self):
         """Импорт данных оборудования из CSV"""
-        reply = QMessageBox.question(
-            self, 'Подтверждение',
+        box = QMessageBox(
+            QMessageBox.Icon.Question, 'Подтверждение',
             'Импорт данных добавит новое оборудование в базу.\n'
             'Оборудование с существующими инвентарными номерами будет пропущено.\n\n'
             'Продолжить?',
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-            QMessageBox.StandardButton.No
+            self
         )
+        box.setDefaultButton(QMessageBox.StandardButton.No)
+        atomic_check = QCheckBox("Отменить весь импорт при любой ошибке")
+        box.setCheckBox(atomic_check)
+        reply = box.exec()
         
         if reply == QMessageBox.StandardButton.Yes:
-            imported, errors, warnings = ImportManager.import_equipment_from_csv(self.db, self)
-            ImportManager.show_import_results(self, imported, errors, warnings)
+            try:
+                imported, diagnostics = ImportManager.import_equipment_from_csv(
+                    self.db, self, atomic=atomic_check.isChecked()
+                )
+            except sqlite3.Error as e:
+                app_logger.log_error("Импорт оборудования", str(e))
+                QMessageBox.warning(self, "Ошибка", f"Не удалось импортировать данные: {e}")
+                return
+            if diagnostics is None:
+                return
+            ImportManager.show_import_results(self, imported, diagnostics)
             
             if imported > 0:
                 app_logger.log_equipment_action(
@@ -0,0 +1,59 @@
+"""
+Контейнер вкладки с отложенным созданием виджета
+"""
+from typing import Callable, Optional
+from PyQt6.QtWidgets import QWidget, QVBoxLayout
+
+
+class LazyTab(QWidget):
+    """Вкладка, которая создает свой виджет при первом показе
+    и обновляет его данные только когда вкладка видна"""
+
+    def __init__(self, factory: Callable[[], QWidget],
+                 on_created: Callable[[QWidget], None] = None):
+        super().__init__()
+        self._factory = factory
+        self._on_created = on_created
+        self._content = None
+        self._dirty = False
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+    @property
+    def content(self) -> Optional[QWidget]:
+        """Виджет вкладки (None, если вкладка еще не открывалась)"""
+        return self._content
+
+    def ensure_created(self) -> QWidget:
+        """Создать виджет вкладки, если он еще не создан"""
+        if self._content is None:
+            # Виджет загружает данные в конструкторе, поэтому сразу актуален
+            self._content = self._factory()
+            self._dirty = False
+            self.layout().addWidget(self._content)
+            if self._on_created:
+                self._on_created(self._content)
+        return self._content
+
+    def mark_dirty(self):
+        """Отметить данные вкладки устаревшими.
+        Видимая вкладка обновляется сразу, скрытая - при следующем показе
+        """
+        if self._content is None:
+            return
+        if self.isVisible():
+            self._dirty = False
+            self._content.refresh_data()
+        else:
+            self._dirty = True
+
+    def showEvent(self, event):
+        """Создание или обновление виджета при показе вкладки"""
+        super().showEvent(event)
+        if self._content is None:
+            self.ensure_created()
+        elif self._dirty:
+            self._dirty = False
+            self._content.refresh_data()
@@ -0,0 +1,144 @@
+"""
+Календарь нагрузки технического обслуживания (тепловая карта по дням)
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from PyQt6.QtWidgets import QWidget, QToolTip
+from PyQt6.QtCore import Qt, QEvent, QRect, QSize
+from PyQt6.QtGui import QPainter, QColor, QFont
+from utils.styles import ModernStyles
+
+
+class MaintenanceHeatmapWidget(QWidget):
+    """Годы по строкам, недели по колонкам, дни недели сверху вниз.
+    Рисуется из дневных итогов {дата: (количество, стоимость)}, поэтому объем
+    данных не зависит от числа записей обслуживания
+    """
+
+    CELL = 12
+    GAP = 2
+    LEFT = 36
+    YEAR_HEADER = 22
+    YEAR_GAP = 12
+    MONTHS = ["Янв", "Фев", "Мар", "Апр", "Май", "Июн",
+              "Июл", "Авг", "Сен", "Окт", "Ноя", "Дек"]
+    WEEKDAYS = {0: "Пн", 2: "Ср", 4: "Пт"}
+    # Цвета уровней: нет ТО, затем четыре уровня по квартилям непустых дней
+    COLORS = ["#EBEDF0", "#BBDEFB", "#64B5F6", "#1E88E5", "#0D47A1"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._years: List[int] = []
+        self._values: Dict[str, Tuple[int, float]] = {}
+        self._use_cost = False
+        self._thresholds: List[float] = []
+        self._colors = [QColor(color) for color in self.COLORS]
+        self._label_font = QFont("Arial", 8)
+
+    def set_data(self, years: List[int], daily: List[Dict], use_cost: bool = False):
+        """Задать годы и дневные итоги (записи day, maintenance_count, total_cost)"""
+        self._years = list(years)
+        self._values = {
+            row['day']: (row['maintenance_count'], row['total_cost'] or 0.0) for row in daily
+        }
+        self.set_metric(use_cost)
+        self.updateGeometry()
+
+    def set_metric(self, use_cost: bool):
+        """Показывать стоимость (use_cost) или количество ТО"""
+        self._use_cost = use_cost
+        values = sorted(value for value in map(self._metric, self._values.values()) if value > 0)
+        # Границы уровней - квартили: выбросы не делают остальные дни бледными
+        self._thresholds = [values[len(values) * quarter // 4] for quarter in (1, 2, 3)] if values else []
+        self.update()
+
+    def _metric(self, value: Tuple[int, float]) -> float:
+        """Отображаемое значение дня"""
+        return value[1] if self._use_cost else value[0]
+
+    def _level(self, value: float) -> int:
+        """Уровень цвета для значения дня"""
+        if value <= 0:
+            return 0
+        level = 1
+        for threshold in self._thresholds:
+            if value > threshold:
+                level += 1
+        return level
+
+    def _year_height(self) -> int:
+        """Высота полосы одного года"""
+        return self.YEAR_HEADER + 7 * (self.CELL + self.GAP) + self.YEAR_GAP
+
+    def sizeHint(self) -> QSize:
+        width = self.LEFT + 54 * (self.CELL + self.GAP)
+        return QSize(width, max(1, len(self._years)) * self._year_height())
+
+    def minimumSizeHint(self) -> QSize:
+        return self.sizeHint()
+
+    def _cell_rect(self, year_index: int, day: date) -> QRect:
+        """Прямоугольник клетки дня"""
+        first = date(day.year, 1, 1)
+        week = (day.timetuple().tm_yday - 1 + first.weekday()) // 7
+        x = self.LEFT + week * (self.CELL + self.GAP)
+        y = year_index * self._year_height() + self.YEAR_HEADER + day.weekday() * (self.CELL + self.GAP)
+        return QRect(x, y, self.CELL, self.CELL)
+
+    def _day_at(self, x: int, y: int) -> Optional[date]:
+        """День под точкой виджета"""
+        if x < self.LEFT or not self._years:
+            return None
+        year_index = y // self._year_height()
+        if year_index >= len(self._years):
+            return None
+        row_y = y - year_index * self._year_height() - self.YEAR_HEADER
+        weekday = row_y // (self.CELL + self.GAP)
+        week = (x - self.LEFT) // (self.CELL + self.GAP)
+        if row_y < 0 or weekday > 6:
+            return None
+        first = date(self._years[year_index], 1, 1)
+        day = first + timedelta(days=week * 7 + weekday - first.weekday())
+        return day if day.year == first.year else None
+
+    def paintEvent(self, event):
+        """Отрисовка подписей и клеток всех лет"""
+        painter = QPainter(self)
+        painter.setFont(self._label_font)
+
+        for year_index, year in enumerate(self._years):
+            top = year_index * self._year_height()
+            painter.setPen(QColor(ModernStyles.TEXT_PRIMARY))
+            painter.drawText(0, top + 14, str(year))
+            painter.setPen(QColor(ModernStyles.TEXT_SECONDARY))
+            # Подпись месяца - над неделей, в которую попадает его первое число
+            for month in range(12):
+                x = self._cell_rect(year_index, date(year, month + 1, 1)).x()
+                painter.drawText(x, top + 14, self.MONTHS[month])
+            for weekday, label in self.WEEKDAYS.items():
+                y = top + self.YEAR_HEADER + weekday * (self.CELL + self.GAP) + self.CELL - 2
+                painter.drawText(0, y, label)
+
+            painter.setPen(Qt.PenStyle.NoPen)
+            day = date(year, 1, 1)
+            end = date(year + 1, 1, 1)
+            while day < end:
+                value = self._values.get(day.isoformat())
+                level = self._level(self._metric(value)) if value else 0
+                painter.fillRect(self._cell_rect(year_index, day), self._colors[level])
+                day += timedelta(days=1)
+        painter.end()
+
+    def event(self, event):
+        """Подсказка с количеством и стоимостью ТО дня под курсором"""
+        if event.type() == QEvent.Type.ToolTip:
+            day = self._day_at(event.pos().x(), event.pos().y())
+            if day is None:
+                QToolTip.hideText()
+            else:
+                count, cost = self._values.get(day.isoformat(), (0, 0.0))
+                QToolTip.showText(event.globalPos(),
+                                  f"{day.strftime('%d.%m.%Y')}: ТО - {count}, "
+                                  f"стоимость {cost:,.2f} ₽".replace(',', ' '), self)
+            return True
+        return super().event(event)
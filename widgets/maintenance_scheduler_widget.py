@@ -1,13 +1,15 @@
 """
 Виджет планировщика технического обслуживания
 """
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QLabel, QGroupBox,
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                             QPushButton, QLabel, QGroupBox, QTabWidget, QScrollArea,
                              QDateEdit, QHeaderView, QMessageBox, QSpinBox, QComboBox)
+from functools import partial
 from PyQt6.QtCore import Qt, QDate
 from database import Database
-from datetime import datetime, timedelta
-from decimal import Decimal
+from models.record_table_model import Column, RecordTableModel, equipment_label
+from utils.capacity_planner import CapacityPlanner, team_of
+from widgets.maintenance_heatmap_widget import MaintenanceHeatmapWidget
 
 
 class MaintenanceSchedulerWidget(QWidget):
@@ -18,6 +20,10 @@ class MaintenanceSchedulerWidget(QWidget):
         self.db = db
         self.init_ui()
         self.refresh_data()
+        
+        # Изменения сроков отдельного оборудования применяются к таблице построчно
+        db.add_change_listener(self.on_data_changed)
+        self.destroyed.connect(partial(db.remove_change_listener, self.on_data_changed))
     
     def init_ui(self):
         """Инициализация интерфейса"""
@@ -62,6 +68,26 @@ class MaintenanceSchedulerWidget(QWidget):
         row2.addStretch()
         settings_layout.addLayout(row2)
         
+        # Третья строка - мощность бригад для распределения ТО по дням
+        row3 = QHBoxLayout()
+        row3.addWidget(QLabel("ТО в день на бригаду:"))
+        self.capacity_spinbox = QSpinBox()
+        self.capacity_spinbox.setMinimum(1)
+        self.capacity_spinbox.setMaximum(10000)
+        self.capacity_spinbox.setValue(20)
+        row3.addWidget(self.capacity_spinbox)
+        
+        row3.addWidget(QLabel("Выполнять раньше срока до:"))
+        self.lead_days_spinbox = QSpinBox()
+        self.lead_days_spinbox.setMinimum(0)
+        self.lead_days_spinbox.setMaximum(90)
+        self.lead_days_spinbox.setValue(7)
+        self.lead_days_spinbox.setSuffix(" дней")
+        row3.addWidget(self.lead_days_spinbox)
+        
+        row3.addStretch()
+        settings_layout.addLayout(row3)
+        
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
         
@@ -73,154 +99,197 @@ class MaintenanceSchedulerWidget(QWidget):
         self.refresh_btn.clicked.connect(self.refresh_data)
         buttons_layout.addWidget(self.refresh_btn)
         
+        self.plan_btn = QPushButton("📅 Распределить по дням")
+        self.plan_btn.setProperty("class", "action-button")
+        self.plan_btn.clicked.connect(self.plan_maintenance)
+        buttons_layout.addWidget(self.plan_btn)
+        
         buttons_layout.addStretch()
         layout.addLayout(buttons_layout)
         
         # Таблица предстоящего обслуживания
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "Оборудование", "Последнее ТО", "Дней назад", "Тип", "Следующее ТО", "Статус"
-        ])
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = RecordTableModel([
+            Column("Оборудование", value=equipment_label),
+            Column("Последнее ТО", value=lambda item: item['last_date'] or "Не проводилось"),
+            Column("Дней назад", 'days_since', 'int'),
+            Column("Тип", value=lambda item: item['last_type'] or "-"),
+            Column("Следующее ТО", 'next_date'),
+            Column("Плановая дата", value=lambda item: item.get('planned_date') or "-"),
+            Column("Статус", 'status', 'due')
+        ], self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.setAlternatingRowColors(True)
         self.table.setSortingEnabled(True)
-        layout.addWidget(self.table)
+        # Сортировка по сроку: обновленные строки встают на свое место
+        self.table.sortByColumn(4, Qt.SortOrder.AscendingOrder)
+        
+        # Таблица и календарь нагрузки на отдельных вкладках;
+        # календарь загружается только когда его вкладка открыта
+        self.view_tabs = QTabWidget()
+        self.view_tabs.addTab(self.table, "Предстоящее ТО")
+        self.view_tabs.addTab(self.create_heatmap_tab(), "Календарь нагрузки")
+        self.view_tabs.currentChanged.connect(self.on_view_tab_changed)
+        layout.addWidget(self.view_tabs)
+    
+    def create_heatmap_tab(self) -> QWidget:
+        """Вкладка календаря нагрузки ТО по дням"""
+        tab = QWidget()
+        tab_layout = QVBoxLayout()
+        tab.setLayout(tab_layout)
+        
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Лет:"))
+        self.heatmap_years_spinbox = QSpinBox()
+        self.heatmap_years_spinbox.setMinimum(1)
+        self.heatmap_years_spinbox.setMaximum(20)
+        self.heatmap_years_spinbox.setValue(3)
+        self.heatmap_years_spinbox.valueChanged.connect(self.refresh_heatmap)
+        controls.addWidget(self.heatmap_years_spinbox)
+        
+        controls.addWidget(QLabel("Показатель:"))
+        self.heatmap_metric_combo = QComboBox()
+        self.heatmap_metric_combo.addItem("Количество ТО", False)
+        self.heatmap_metric_combo.addItem("Стоимость ТО", True)
+        self.heatmap_metric_combo.currentIndexChanged.connect(
+            lambda: self.heatmap.set_metric(self.heatmap_metric_combo.currentData())
+        )
+        controls.addWidget(self.heatmap_metric_combo)
+        
+        self.heatmap_summary_label = QLabel()
+        controls.addWidget(self.heatmap_summary_label)
+        controls.addStretch()
+        tab_layout.addLayout(controls)
+        
+        self.heatmap = MaintenanceHeatmapWidget()
+        scroll = QScrollArea()
+        scroll.setWidget(self.heatmap)
+        scroll.setWidgetResizable(True)
+        tab_layout.addWidget(scroll)
+        return tab
+    
+    def on_view_tab_changed(self, index: int):
+        """Загрузка календаря при переключении на его вкладку"""
+        if index == 1:
+            self.refresh_heatmap()
+    
+    def refresh_heatmap(self, *args):
+        """Обновить календарь нагрузки из дневных итогов за выбранное число лет
+        с учетом фильтра по категории
+        """
+        last_year = QDate.currentDate().year()
+        years = list(range(last_year, last_year - self.heatmap_years_spinbox.value(), -1))
+        daily = self.db.get_maintenance_daily(f"{years[-1]}-01-01", f"{last_year}-12-31",
+                                              self.category_filter.currentData())
+        self.heatmap.set_data(years, daily, self.heatmap_metric_combo.currentData())
+        total_count = sum(row['maintenance_count'] for row in daily)
+        total_cost = sum(row['total_cost'] or 0 for row in daily)
+        cost_text = f"{total_cost:,.2f}".replace(',', ' ')
+        self.heatmap_summary_label.setText(
+            f"Дней с ТО: {len(daily)}, всего ТО: {total_count}, стоимость: {cost_text} ₽"
+        )
     
     def refresh_data(self, *args):
         """Обновить данные о предстоящем обслуживании
         *args используется для игнорирования аргументов от сигналов QSpinBox.valueChanged
         """
-        days_ahead = self.days_spinbox.value()
-        default_interval = self.interval_spinbox.value()
-        today = datetime.now().date()
-        end_date = today + timedelta(days=days_ahead)
-        
         # Обновляем список категорий
-        equipment_list = self.db.get_all_equipment()
-        categories = set()
-        for eq in equipment_list:
-            if eq.get('category'):
-                categories.add(eq['category'])
-        
         current_category = self.category_filter.currentData()
         # Отключаем сигнал, чтобы избежать рекурсии
         self.category_filter.blockSignals(True)
         self.category_filter.clear()
         self.category_filter.addItem("Все категории", None)
-        for cat in sorted(categories):
+        for cat in self.db.get_equipment_categories():
             self.category_filter.addItem(cat, cat)
         
         # Восстанавливаем выбор
         if current_category:
-            for i in range(self.category_filter.count()):
-                if self.category_filter.itemData(i) == current_category:
-                    self.category_filter.setCurrentIndex(i)
-                    break
+            index = self.category_filter.findData(current_category)
+            if index >= 0:
+                self.category_filter.setCurrentIndex(index)
         
         # Включаем сигнал обратно
         self.category_filter.blockSignals(False)
         
-        selected_category = self.category_filter.currentData()
-        upcoming_maintenance = []
-        
-        # Интервалы ТО по категориям (можно расширить)
-        category_intervals = {
-            'Компьютерная техника': 180,
-            'Офисная мебель': 365,
-            'Оргтехника': 90,
-            'Производственное оборудование': 30,
-            'Транспорт': 60
-        }
-        
-        for eq in equipment_list:
-            # Фильтр по категории
-            if selected_category and eq.get('category') != selected_category:
-                continue
-            # Получаем последнее обслуживание
-            maintenance_list = self.db.get_maintenance_by_equipment(eq['id'])
-            
-            if maintenance_list:
-                # Берем последнее обслуживание
-                last_maintenance = maintenance_list[0]  # Уже отсортировано по дате DESC
-                last_date_str = last_maintenance['maintenance_date']
-                
-                try:
-                    last_date = datetime.strptime(last_date_str, '%Y-%m-%d').date()
-                    days_since = (today - last_date).days
-                    
-                    # Определяем интервал ТО для категории
-                    category = eq.get('category', '')
-                    interval = category_intervals.get(category, default_interval)
-                    
-                    # Следующее ТО через интервал после последнего
-                    next_maintenance_date = last_date + timedelta(days=interval)
-                    
-                    # Проверяем, попадает ли в диапазон
-                    if next_maintenance_date <= end_date:
-                        status = "Требуется ТО" if next_maintenance_date <= today else "Запланировано"
-                        upcoming_maintenance.append({
-                            'equipment': eq,
-                            'last_maintenance': last_maintenance,
-                            'last_date': last_date,
-                            'days_since': days_since,
-                            'next_date': next_maintenance_date,
-                            'status': status
-                        })
-                except:
-                    pass
-            else:
-                # Если обслуживания не было, считаем что нужно провести первое
-                purchase_date_str = eq.get('purchase_date')
-                if purchase_date_str:
-                    try:
-                        purchase_date = datetime.strptime(purchase_date_str, '%Y-%m-%d').date()
-                        days_since = (today - purchase_date).days
-                        
-                        # Определяем интервал для категории
-                        category = eq.get('category', '')
-                        interval = category_intervals.get(category, default_interval)
-                        
-                        # Если прошло больше интервала с покупки, требуется первое ТО
-                        if days_since >= interval:
-                            upcoming_maintenance.append({
-                                'equipment': eq,
-                                'last_maintenance': None,
-                                'last_date': None,
-                                'days_since': days_since,
-                                'next_date': today,
-                                'status': "Требуется первое ТО"
-                            })
-                    except:
-                        pass
-        
-        # Сортируем по дате следующего ТО
-        upcoming_maintenance.sort(key=lambda x: x['next_date'])
-        
-        self.table.setRowCount(len(upcoming_maintenance))
-        
-        for row, item in enumerate(upcoming_maintenance):
-            eq = item['equipment']
-            equipment_text = f"{eq['inventory_number']} - {eq['name']}"
-            self.table.setItem(row, 0, QTableWidgetItem(equipment_text))
-            
-            if item['last_maintenance']:
-                self.table.setItem(row, 1, QTableWidgetItem(item['last_maintenance']['maintenance_date']))
-                self.table.setItem(row, 2, QTableWidgetItem(str(item['days_since'])))
-                self.table.setItem(row, 3, QTableWidgetItem(item['last_maintenance']['type']))
-            else:
-                self.table.setItem(row, 1, QTableWidgetItem("Не проводилось"))
-                self.table.setItem(row, 2, QTableWidgetItem(str(item['days_since'])))
-                self.table.setItem(row, 3, QTableWidgetItem("-"))
-            
-            next_date_text = item['next_date'].strftime('%Y-%m-%d')
-            self.table.setItem(row, 4, QTableWidgetItem(next_date_text))
-            
-            status_item = QTableWidgetItem(item['status'])
-            if "Требуется" in item['status']:
-                status_item.setForeground(Qt.GlobalColor.red)
-            else:
-                status_item.setForeground(Qt.GlobalColor.blue)
-            self.table.setItem(row, 5, status_item)
+        upcoming_maintenance = self.load_schedule(self.category_filter.currentData())
+        self.model.set_records(upcoming_maintenance)
+        if self.view_tabs.currentIndex() == 1:
+            self.refresh_heatmap()
+    
+    def load_schedule(self, category: str = None, equipment_id: int = None):
+        """Предстоящее обслуживание, отсортированное по дате следующего ТО
+        (equipment_id - только указанного оборудования).
+        Берется из списка, предрассчитанного фоновым заданием; если он устарел
+        или рассчитан с другими параметрами - считается в БД одним запросом
+        """
+        schedule = self.db.get_maintenance_due(
+            days_ahead=self.days_spinbox.value(),
+            default_interval=self.interval_spinbox.value(),
+            category=category,
+            equipment_id=equipment_id
+        )
+        if schedule is None:
+            schedule = self.db.get_maintenance_schedule(
+                days_ahead=self.days_spinbox.value(),
+                default_interval=self.interval_spinbox.value(),
+                category=category,
+                equipment_ids=None if equipment_id is None else [equipment_id]
+            )
+        return schedule
+    
+    def on_data_changed(self, table: str, action: str, record_id):
+        """Обновить строку оборудования, срок ТО которого пересчитан
+        (без record_id - массовое изменение, например импорт: весь список)
+        """
+        if table != 'maintenance_due':
+            return
+        if record_id is None:
+            self.refresh_data()
+            return
+        if action == 'delete':
+            self.model.remove_record(record_id)
+            return
+        records = self.load_schedule(self.category_filter.currentData(), record_id)
+        if not records:
+            self.model.remove_record(record_id)
+        elif self.model.update_record(records[0]) < 0:
+            self.model.insert_record(records[0])
+    
+    def plan_maintenance(self):
+        """Распределить предстоящее ТО по рабочим дням с учетом мощности бригад
+        и сохранить план. Бригада определяется категорией оборудования
+        """
+        # План строится по всем категориям, чтобы не затереть планы других бригад
+        schedule = self.load_schedule()
+        if not schedule:
+            QMessageBox.information(self, "План ТО", "Нет обслуживания для планирования")
+            return
+        
+        planner = CapacityPlanner(
+            capacity_per_day=self.capacity_spinbox.value(),
+            lead_days=self.lead_days_spinbox.value()
+        )
+        plan = planner.plan(
+            {'equipment_id': item['id'], 'due_date': item['next_date'], 'team': team_of(item['category'])}
+            for item in schedule
+        )
+        
+        try:
+            self.db.save_maintenance_plan(plan)
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить план: {str(e)}")
+            return
+        
+        self.refresh_data()
+        load = CapacityPlanner.daily_load(plan)
+        late_count = sum(1 for item in plan if item['late_days'] > 0)
+        QMessageBox.information(
+            self, "План ТО",
+            f"Запланировано обслуживаний: {len(plan)}\n"
+            f"Рабочих дней: {len(load)} (с {min(load)} по {max(load)})\n"
+            f"Наибольшая загрузка за день: {max(load.values())}\n"
+            f"Позже срока: {late_count}"
+        )
@@ -1,8 +1,8 @@
 """
 Виджет для работы с техническим обслуживанием
 """
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QComboBox, QLabel,
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                             QPushButton, QComboBox, QLabel,
                              QDialog, QFormLayout, QDateEdit, QLineEdit,
                              QMessageBox, QHeaderView, QGroupBox, QTextEdit, QMenu)
 from PyQt6.QtCore import Qt, QDate
@@ -10,15 +10,19 @@ from PyQt6.QtGui import QDoubleValidator, QAction
 from decimal import Decimal
 from database import Database
 from utils.logger import app_logger
+from models.equipment_list_model import EquipmentListModel
+from models.record_table_model import RecordTableModel, maintenance_columns, equipment_label
+from widgets.equipment_combo import EquipmentComboBox
 
 
 class MaintenanceDialog(QDialog):
     """Диалог для добавления записи о техническом обслуживании"""
     
-    def __init__(self, parent=None, db=None, maintenance_data=None):
+    def __init__(self, parent=None, db=None, maintenance_data=None, equipment_model=None):
         super().__init__(parent)
         self.db = db
         self.maintenance_data = maintenance_data
+        self.equipment_model = equipment_model or EquipmentListModel(db, self)
         self.init_ui()
     
     def init_ui(self):
@@ -46,19 +50,12 @@ class MaintenanceDialog(QDialog):
         form.setSpacing(16)
         
         # Оборудование
-        self.equipment_combo = QComboBox()
+        self.equipment_combo = EquipmentComboBox(self.equipment_model)
         self.equipment_combo.setMinimumHeight(38)
         self.equipment_combo.setStyleSheet("font-size: 14px; padding: 10px 14px;")
-        equipment_list = self.db.get_all_equipment()
-        if not equipment_list:
+        if self.equipment_model.rowCount() == 0:
             QMessageBox.warning(self, "Предупреждение", 
                               "Нет доступного оборудования. Сначала добавьте оборудование в реестр.")
-        else:
-            for eq in equipment_list:
-                self.equipment_combo.addItem(
-                    f"{eq['inventory_number']} - {eq['name']}",
-                    eq['id']
-                )
         form.addRow("Оборудование *:", self.equipment_combo)
         
         # Дата обслуживания
@@ -128,11 +125,7 @@ class MaintenanceDialog(QDialog):
         
         # Заполняем данные, если редактируем
         if self.maintenance_data:
-            equipment_id = self.maintenance_data.get('equipment_id')
-            for i in range(self.equipment_combo.count()):
-                if self.equipment_combo.itemData(i) == equipment_id:
-                    self.equipment_combo.setCurrentIndex(i)
-                    break
+            self.equipment_combo.set_current_equipment(self.maintenance_data.get('equipment_id'))
             
             date = self.maintenance_data.get('maintenance_date')
             if date:
@@ -156,7 +149,7 @@ class MaintenanceDialog(QDialog):
     def get_data(self):
         """Получить данные из формы"""
         data = {
-            'equipment_id': self.equipment_combo.currentData(),
+            'equipment_id': self.equipment_combo.current_equipment_id(),
             'maintenance_date': self.date_edit.date().toString(Qt.DateFormat.ISODate),
             'type': self.type_combo.currentText().strip(),
             'cost': None,
@@ -176,9 +169,10 @@ class MaintenanceDialog(QDialog):
 class MaintenanceWidget(QWidget):
     """Виджет для управления техническим обслуживанием"""
     
-    def __init__(self, db):
+    def __init__(self, db, equipment_model=None):
         super().__init__()
         self.db = db
+        self.equipment_model = equipment_model or EquipmentListModel(db, self)
         self.init_ui()
         self.refresh_data()
     
@@ -192,8 +186,7 @@ class MaintenanceWidget(QWidget):
         filter_layout = QHBoxLayout()
         
         filter_layout.addWidget(QLabel("Оборудование:"))
-        self.equipment_filter = QComboBox()
-        self.equipment_filter.addItem("Все", None)
+        self.equipment_filter = EquipmentComboBox(self.equipment_model, "Все")
         self.equipment_filter.currentIndexChanged.connect(self.on_equipment_filter_changed)
         filter_layout.addWidget(self.equipment_filter)
         
@@ -227,13 +220,11 @@ class MaintenanceWidget(QWidget):
         layout.addLayout(buttons_layout)
         
         # Таблица обслуживания
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Оборудование", "Дата", "Тип", "Стоимость", "Описание"
-        ])
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = RecordTableModel(maintenance_columns(), self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.setAlternatingRowColors(True)
         self.table.setSortingEnabled(True)
@@ -241,92 +232,50 @@ class MaintenanceWidget(QWidget):
         self.table.customContextMenuRequested.connect(self.show_context_menu)
         layout.addWidget(self.table)
     
-    def refresh_equipment_list(self):
-        """Обновить список оборудования в фильтре"""
-        current_id = self.equipment_filter.currentData()
-        # Отключаем сигнал, чтобы избежать рекурсии
-        self.equipment_filter.blockSignals(True)
-        self.equipment_filter.clear()
-        self.equipment_filter.addItem("Все", None)
-        
-        equipment_list = self.db.get_all_equipment()
-        for eq in equipment_list:
-            self.equipment_filter.addItem(
-                f"{eq['inventory_number']} - {eq['name']}",
-                eq['id']
-            )
-        
-        # Восстанавливаем выбор
-        if current_id:
-            for i in range(self.equipment_filter.count()):
-                if self.equipment_filter.itemData(i) == current_id:
-                    self.equipment_filter.setCurrentIndex(i)
-                    break
-        
-        # Включаем сигнал обратно
-        self.equipment_filter.blockSignals(False)
-    
     def on_equipment_filter_changed(self):
         """Обработчик изменения фильтра оборудования"""
         self.refresh_data()
     
     def refresh_data(self):
         """Обновить данные в таблице"""
-        self.refresh_equipment_list()
-        
-        equipment_id = self.equipment_filter.currentData()
+        equipment_id = self.equipment_filter.current_equipment_id()
         
         if equipment_id:
             maintenance_list = self.db.get_maintenance_by_equipment(equipment_id)
+            # Данные оборудования одинаковы для всех строк
+            equipment = self.db.get_equipment_by_id(equipment_id) or {}
+            for maintenance in maintenance_list:
+                maintenance['inventory_number'] = equipment.get('inventory_number', '')
+                maintenance['name'] = equipment.get('name', '')
         else:
             # Получаем все обслуживания
             maintenance_list = self.db.get_maintenance_report()
         
-        self.table.setRowCount(len(maintenance_list))
-        
-        for row, maintenance in enumerate(maintenance_list):
-            self.table.setItem(row, 0, QTableWidgetItem(str(maintenance['id'])))
-            
-            # Название оборудования
-            if 'name' in maintenance:
-                equipment_text = f"{maintenance.get('inventory_number', '')} - {maintenance.get('name', '')}"
-            else:
-                # Получаем оборудование по ID
-                eq = self.db.get_all_equipment()
-                eq_dict = {e['id']: e for e in eq}
-                if maintenance['equipment_id'] in eq_dict:
-                    e = eq_dict[maintenance['equipment_id']]
-                    equipment_text = f"{e['inventory_number']} - {e['name']}"
-                else:
-                    equipment_text = f"ID: {maintenance['equipment_id']}"
-            
-            self.table.setItem(row, 1, QTableWidgetItem(equipment_text))
-            self.table.setItem(row, 2, QTableWidgetItem(maintenance['maintenance_date']))
-            self.table.setItem(row, 3, QTableWidgetItem(maintenance['type']))
-            
-            # Форматирование цены
-            cost = maintenance.get('cost', '0') or '0'
-            try:
-                cost_decimal = Decimal(str(cost))
-                cost_text = f"{cost_decimal:,.2f} ₽".replace(',', ' ')
-            except:
-                cost_text = f"{cost} ₽" if cost != '0' else "0.00 ₽"
-            cost_item = QTableWidgetItem(cost_text)
-            cost_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table.setItem(row, 4, cost_item)
-            
-            description = maintenance.get('description', '') or ''
-            self.table.setItem(row, 5, QTableWidgetItem(description[:50] + '...' if len(description) > 50 else description))
+        self.model.set_records(maintenance_list)
+    
+    def sync_maintenance_row(self, maintenance_id: int, hint: int = -1):
+        """Обновить в таблице одну строку после добавления, изменения или удаления
+        обслуживания, не перезагружая весь журнал
+        """
+        maintenance = self.db.get_maintenance_report_row(maintenance_id)
+        equipment_id = self.equipment_filter.current_equipment_id()
+        if maintenance is None or (equipment_id and maintenance['equipment_id'] != equipment_id):
+            self.model.remove_record(maintenance_id, hint)
+        elif self.model.update_record(maintenance, hint) < 0:
+            self.model.insert_record(maintenance)
+    
+    def current_maintenance(self):
+        """Запись выбранного обслуживания"""
+        return self.model.record(self.table.currentIndex().row())
     
     def add_maintenance(self):
         """Добавить новое обслуживание"""
-        equipment_list = self.db.get_all_equipment()
-        if not equipment_list:
+        if self.equipment_model.rowCount() == 0:
             QMessageBox.warning(self, "Ошибка", 
                               "Нет доступного оборудования. Сначала добавьте оборудование в реестр.")
             return
         
-        dialog = MaintenanceDialog(self, self.db)
+        dialog = MaintenanceDialog(self, self.db, equipment_model=self.equipment_model)
         if dialog.exec():
             data = dialog.get_data()
             if not data['type']:
@@ -345,7 +294,7 @@ class MaintenanceWidget(QWidget):
                     equipment_id=data['equipment_id'],
                     details=f"Тип: {data['type']}, Дата: {data['maintenance_date']}"
                 )
-                self.refresh_data()
+                self.sync_maintenance_row(maintenance_id)
                 QMessageBox.information(self, "Успех", "Обслуживание добавлено")
             except Exception as e:
                 app_logger.log_error("Добавление обслуживания", str(e))
@@ -353,19 +302,19 @@ class MaintenanceWidget(QWidget):
     
     def edit_maintenance(self):
         """Редактировать обслуживание"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_maintenance()
+        if selected is None:
             QMessageBox.warning(self, "Ошибка", "Выберите запись для редактирования")
             return
         
-        maintenance_id = int(self.table.item(current_row, 0).text())
+        maintenance_id = selected['id']
         maintenance_data = self.db.get_maintenance_by_id(maintenance_id)
         
         if not maintenance_data:
             QMessageBox.warning(self, "Ошибка", "Запись не найдена")
             return
         
-        dialog = MaintenanceDialog(self, self.db, maintenance_data)
+        dialog = MaintenanceDialog(self, self.db, maintenance_data, self.equipment_model)
         if dialog.exec():
             data = dialog.get_data()
             if not data['type']:
@@ -379,7 +328,7 @@ class MaintenanceWidget(QWidget):
                     maintenance_id=maintenance_id,
                     equipment_id=data.get('equipment_id')
                 )
-                self.refresh_data()
+                self.sync_maintenance_row(maintenance_id, self.table.currentIndex().row())
                 QMessageBox.information(self, "Успех", "Обслуживание обновлено")
             except Exception as e:
                 app_logger.log_error("Обновление обслуживания", str(e), f"ID: {maintenance_id}")
@@ -387,14 +336,14 @@ class MaintenanceWidget(QWidget):
     
     def delete_maintenance(self):
         """Удалить обслуживание"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_maintenance()
+        if selected is None:
             QMessageBox.warning(self, "Ошибка", "Выберите запись для удаления")
             return
         
-        maintenance_id = int(self.table.item(current_row, 0).text())
-        equipment_text = self.table.item(current_row, 1).text()
-        date_text = self.table.item(current_row, 2).text()
+        maintenance_id = selected['id']
+        equipment_text = equipment_label(selected)
+        date_text = selected['maintenance_date']
         
         reply = QMessageBox.question(
             self, 'Подтверждение',
@@ -412,7 +361,7 @@ class MaintenanceWidget(QWidget):
                     "Удалено",
                     maintenance_id=maintenance_id
                 )
-                self.refresh_data()
+                self.sync_maintenance_row(maintenance_id, self.table.currentIndex().row())
                 QMessageBox.information(self, "Успех", "Обслуживание удалено")
             except Exception as e:
                 app_logger.log_error("Удаление обслуживания", str(e), f"ID: {maintenance_id}")
@@ -420,7 +369,7 @@ class MaintenanceWidget(QWidget):
     
     def show_context_menu(self, position):
         """Показать контекстное меню для таблицы"""
-        if self.table.itemAt(position) is None:
+        if not self.table.indexAt(position).isValid():
             return
         
         menu = QMenu(self)
@@ -443,11 +392,11 @@ class MaintenanceWidget(QWidget):
     
     def view_full_description(self):
         """Просмотр полного описания обслуживания"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        selected = self.current_maintenance()
+        if selected is None:
             return
         
-        maintenance_id = int(self.table.item(current_row, 0).text())
+        maintenance_id = selected['id']
         maintenance_data = self.db.get_maintenance_by_id(maintenance_id)
         
         if maintenance_data:
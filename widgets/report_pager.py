@@ -0,0 +1,71 @@
+"""
+Переключатель страниц постраничных отчетов
+"""
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QPushButton
+from PyQt6.QtCore import pyqtSignal
+
+
+class ReportPager(QWidget):
+    """Кнопки перехода по страницам и номера показанных строк.
+    Сигнал page_requested передает смещение запрошенной страницы
+    """
+
+    page_requested = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.offset = 0
+        self.limit = 0
+        self.total = 0
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.first_btn = QPushButton("⏮")
+        self.prev_btn = QPushButton("◀ Назад")
+        self.next_btn = QPushButton("Вперед ▶")
+        self.last_btn = QPushButton("⏭")
+        self.label = QLabel()
+        for button in (self.first_btn, self.prev_btn, self.next_btn, self.last_btn):
+            button.setProperty("class", "secondary-button")
+        self.first_btn.clicked.connect(lambda: self.page_requested.emit(0))
+        self.prev_btn.clicked.connect(
+            lambda: self.page_requested.emit(max(self.offset - self.limit, 0)))
+        self.next_btn.clicked.connect(lambda: self.page_requested.emit(self.offset + self.limit))
+        self.last_btn.clicked.connect(lambda: self.page_requested.emit(self.last_offset()))
+
+        layout.addWidget(self.first_btn)
+        layout.addWidget(self.prev_btn)
+        layout.addStretch()
+        layout.addWidget(self.label)
+        layout.addStretch()
+        layout.addWidget(self.next_btn)
+        layout.addWidget(self.last_btn)
+        self.setLayout(layout)
+        self.set_page(0, 0, 0)
+
+    @staticmethod
+    def last_page_offset(total: int, limit: int) -> int:
+        """Смещение последней страницы отчета из total строк (0, если отчет пуст)"""
+        if not limit or not total:
+            return 0
+        return (total - 1) // limit * limit
+
+    def last_offset(self) -> int:
+        """Смещение последней страницы показанного отчета"""
+        return self.last_page_offset(self.total, self.limit)
+
+    def set_page(self, offset: int, limit: int, total: int):
+        """Показать положение страницы: смещение, размер страницы и число строк отчета"""
+        self.offset, self.limit, self.total = offset, limit, total
+        has_previous = offset > 0
+        has_next = bool(limit) and offset + limit < total
+        self.first_btn.setEnabled(has_previous)
+        self.prev_btn.setEnabled(has_previous)
+        self.next_btn.setEnabled(has_next)
+        self.last_btn.setEnabled(has_next)
+        if total:
+            page, pages = offset // limit + 1, self.last_offset() // limit + 1
+            shown = f"{offset + 1:,}–{min(offset + limit, total):,} из {total:,}".replace(',', ' ')
+            self.label.setText(f"Страница {page} из {pages} | Строки {shown}")
+        else:
+            self.label.setText("Нет записей")
@@ -1,21 +1,42 @@
 """
 Виджет для генерации отчетов
 """
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QLabel, QGroupBox,
-                             QDateEdit, QHeaderView, QMessageBox, QTabWidget)
-from PyQt6.QtCore import Qt, QDate
+import sqlite3
+import threading
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                             QPushButton, QLabel, QGroupBox,
+                             QDateEdit, QHeaderView, QMessageBox, QTabWidget, QSpinBox,
+                             QComboBox, QCheckBox, QLineEdit)
+from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from database import Database
-from decimal import Decimal
 from utils.export import ExportManager
+from utils.formatting import format_money
+from utils.forecast import MaintenanceForecast
+from utils.depreciation import METHOD_LABELS
+from utils.pivot import DIMENSIONS, MEASURES, pivot_table
+from utils.report_orchestrator import ReportOrchestrator
+from utils.stream_export import DEPRECIATION_EXPORT_COLUMNS, MAINTENANCE_EXPORT_COLUMNS
+from models.record_table_model import Column, RecordTableModel, maintenance_report_columns
+from widgets.report_pager import ReportPager
 
 
 class ReportsWidget(QWidget):
     """Виджет для генерации отчетов"""
     
+    # Результаты фонового формирования отчетов: (номер запуска, результаты или текст ошибки)
+    reports_loaded = pyqtSignal(int, object)
+    reports_failed = pyqtSignal(int, str)
+    
     def __init__(self, db):
         super().__init__()
         self.db = db
+        self.orchestrator = ReportOrchestrator()
+        self._refresh_generation = 0
+        # Смещения показанных страниц отчетов по стоимости содержания и по ТО
+        self.cost_offset = 0
+        self.report_offset = 0
+        self.reports_loaded.connect(self.on_reports_loaded)
+        self.reports_failed.connect(self.on_reports_failed)
         self.init_ui()
         self.refresh_data()
     
@@ -34,25 +55,54 @@ class ReportsWidget(QWidget):
         depreciation_widget.setLayout(depreciation_layout)
         
         buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(QLabel("Период:"))
+        self.depreciation_period_edit = QDateEdit()
+        self.depreciation_period_edit.setCalendarPopup(True)
+        self.depreciation_period_edit.setDisplayFormat("MM.yyyy")
+        self.depreciation_period_edit.setDate(QDate.currentDate())
+        buttons_layout.addWidget(self.depreciation_period_edit)
+        
         self.depreciation_refresh_btn = QPushButton("🔄 Обновить отчет")
         self.depreciation_refresh_btn.setProperty("class", "secondary-button")
         self.depreciation_refresh_btn.clicked.connect(self.refresh_depreciation)
         buttons_layout.addWidget(self.depreciation_refresh_btn)
         
-        self.depreciation_export_btn = QPushButton("📤 Экспорт в CSV")
+        self.depreciation_export_btn = QPushButton("📤 Экспорт")
         self.depreciation_export_btn.setProperty("class", "secondary-button")
         self.depreciation_export_btn.clicked.connect(self.export_depreciation)
         buttons_layout.addWidget(self.depreciation_export_btn)
         
+        self.depreciation_close_btn = QPushButton("🔒 Закрыть период")
+        self.depreciation_close_btn.setProperty("class", "secondary-button")
+        self.depreciation_close_btn.clicked.connect(self.close_depreciation_period)
+        buttons_layout.addWidget(self.depreciation_close_btn)
+        
         buttons_layout.addStretch()
         depreciation_layout.addLayout(buttons_layout)
         
-        self.depreciation_table = QTableWidget()
-        self.depreciation_table.setColumnCount(8)
-        self.depreciation_table.setHorizontalHeaderLabels([
-            "ID", "Инвентарный номер", "Наименование", "Категория",
-            "Дата покупки", "Цена покупки", "Дней в эксплуатации", "Стоимость ТО"
-        ])
+        self.depreciation_summary_label = QLabel()
+        self.depreciation_summary_label.setProperty("class", "stat-label")
+        self.depreciation_summary_label.setStyleSheet("font-size: 14px; font-weight: 600; padding: 8px; color: #2196F3;")
+        depreciation_layout.addWidget(self.depreciation_summary_label)
+        
+        self.depreciation_model = RecordTableModel([
+            Column("ID", 'id', 'int'),
+            Column("Инвентарный номер", 'inventory_number'),
+            Column("Наименование", 'name'),
+            Column("Категория", 'category'),
+            Column("Дата покупки", 'purchase_date', 'date'),
+            Column("Цена покупки", 'purchase_price', 'money'),
+            Column("Способ", 'method',
+                   value=lambda record: METHOD_LABELS.get(record['method'], record['method'])),
+            Column("Срок, мес.", 'useful_life_months', 'int'),
+            Column("Накопленная амортизация", 'accumulated_depreciation', 'money'),
+            Column("Остаточная стоимость", 'book_value', 'money'),
+            Column("Амортизация за месяц", 'monthly_depreciation', 'money'),
+            Column("Осталось, мес.", 'remaining_months', 'int'),
+            Column("Стоимость ТО", 'total_maintenance_cost', 'money')
+        ], self)
+        self.depreciation_table = QTableView()
+        self.depreciation_table.setModel(self.depreciation_model)
         self.depreciation_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.depreciation_table.setAlternatingRowColors(True)
         self.depreciation_table.setSortingEnabled(True)
@@ -104,16 +154,19 @@ class ReportsWidget(QWidget):
         summary_group.setLayout(summary_layout)
         maintenance_cost_layout.addWidget(summary_group)
         
-        self.maintenance_cost_table = QTableWidget()
-        self.maintenance_cost_table.setColumnCount(6)
-        self.maintenance_cost_table.setHorizontalHeaderLabels([
-            "ID", "Оборудование", "Дата", "Тип", "Стоимость", "Описание"
-        ])
+        self.maintenance_cost_model = RecordTableModel(maintenance_report_columns(), self)
+        self.maintenance_cost_table = QTableView()
+        self.maintenance_cost_table.setModel(self.maintenance_cost_model)
         self.maintenance_cost_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.maintenance_cost_table.setAlternatingRowColors(True)
-        self.maintenance_cost_table.setSortingEnabled(True)
+        # Строки страницы идут в порядке отчета (по дате), как и нарастающий итог
+        self.maintenance_cost_table.setSortingEnabled(False)
         maintenance_cost_layout.addWidget(self.maintenance_cost_table)
         
+        self.cost_pager = ReportPager()
+        self.cost_pager.page_requested.connect(self.load_cost_page)
+        maintenance_cost_layout.addWidget(self.cost_pager)
+        
         self.tabs.addTab(maintenance_cost_widget, "Стоимость содержания")
         
         # Вкладка "Отчет по ТО"
@@ -142,7 +195,7 @@ class ReportsWidget(QWidget):
         self.maintenance_report_refresh_btn.clicked.connect(self.refresh_maintenance_report)
         report_filter_layout.addWidget(self.maintenance_report_refresh_btn)
         
-        self.maintenance_report_export_btn = QPushButton("📤 Экспорт в CSV")
+        self.maintenance_report_export_btn = QPushButton("📤 Экспорт")
         self.maintenance_report_export_btn.setProperty("class", "secondary-button")
         self.maintenance_report_export_btn.clicked.connect(self.export_maintenance_report)
         report_filter_layout.addWidget(self.maintenance_report_export_btn)
@@ -150,153 +203,476 @@ class ReportsWidget(QWidget):
         report_filter_group.setLayout(report_filter_layout)
         maintenance_report_layout.addWidget(report_filter_group)
         
-        self.maintenance_report_table = QTableWidget()
-        self.maintenance_report_table.setColumnCount(6)
-        self.maintenance_report_table.setHorizontalHeaderLabels([
-            "ID", "Оборудование", "Дата", "Тип", "Стоимость", "Описание"
-        ])
+        self.report_summary_label = QLabel()
+        self.report_summary_label.setProperty("class", "stat-label")
+        maintenance_report_layout.addWidget(self.report_summary_label)
+        
+        self.maintenance_report_model = RecordTableModel(maintenance_report_columns(), self)
+        self.maintenance_report_table = QTableView()
+        self.maintenance_report_table.setModel(self.maintenance_report_model)
         self.maintenance_report_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.maintenance_report_table.setAlternatingRowColors(True)
-        self.maintenance_report_table.setSortingEnabled(True)
+        # Строки страницы идут в порядке отчета (по дате), как и нарастающий итог
+        self.maintenance_report_table.setSortingEnabled(False)
         maintenance_report_layout.addWidget(self.maintenance_report_table)
         
+        self.report_pager = ReportPager()
+        self.report_pager.page_requested.connect(self.load_report_page)
+        maintenance_report_layout.addWidget(self.report_pager)
+        
         self.tabs.addTab(maintenance_report_widget, "Отчет по ТО")
+        
+        # Вкладка "Прогноз ТО"
+        forecast_widget = QWidget()
+        forecast_layout = QVBoxLayout()
+        forecast_widget.setLayout(forecast_layout)
+        
+        forecast_filter_group = QGroupBox("Период прогноза")
+        forecast_filter_layout = QHBoxLayout()
+        
+        forecast_filter_layout.addWidget(QLabel("Лет вперед:"))
+        self.forecast_years_spinbox = QSpinBox()
+        self.forecast_years_spinbox.setMinimum(1)
+        self.forecast_years_spinbox.setMaximum(5)
+        self.forecast_years_spinbox.setValue(1)
+        forecast_filter_layout.addWidget(self.forecast_years_spinbox)
+        
+        self.forecast_refresh_btn = QPushButton("📊 Рассчитать прогноз")
+        self.forecast_refresh_btn.setProperty("class", "action-button")
+        self.forecast_refresh_btn.clicked.connect(self.refresh_forecast)
+        forecast_filter_layout.addWidget(self.forecast_refresh_btn)
+        
+        self.forecast_export_btn = QPushButton("📤 Экспорт в CSV")
+        self.forecast_export_btn.setProperty("class", "secondary-button")
+        self.forecast_export_btn.clicked.connect(self.export_forecast)
+        forecast_filter_layout.addWidget(self.forecast_export_btn)
+        
+        forecast_filter_layout.addStretch()
+        forecast_filter_group.setLayout(forecast_filter_layout)
+        forecast_layout.addWidget(forecast_filter_group)
+        
+        self.forecast_summary_label = QLabel()
+        self.forecast_summary_label.setProperty("class", "stat-label")
+        self.forecast_summary_label.setStyleSheet("font-size: 14px; font-weight: 600; padding: 8px; color: #2196F3;")
+        forecast_layout.addWidget(self.forecast_summary_label)
+        
+        self.forecast_model = RecordTableModel([
+            Column("Месяц", 'month'),
+            Column("Категория", 'category'),
+            Column("Отдел", 'department'),
+            Column("Количество ТО", 'count', 'int'),
+            Column("Ожидаемая стоимость", 'cost', 'money')
+        ], self)
+        self.forecast_table = QTableView()
+        self.forecast_table.setModel(self.forecast_model)
+        self.forecast_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.forecast_table.setAlternatingRowColors(True)
+        self.forecast_table.setSortingEnabled(True)
+        forecast_layout.addWidget(self.forecast_table)
+        
+        self.tabs.addTab(forecast_widget, "Прогноз ТО")
+        
+        # Вкладка "Сводный отчет"
+        pivot_widget = QWidget()
+        pivot_layout = QVBoxLayout()
+        pivot_widget.setLayout(pivot_layout)
+        
+        pivot_filter_group = QGroupBox("Группировка")
+        pivot_filter_layout = QHBoxLayout()
+        
+        pivot_filter_layout.addWidget(QLabel("Строки:"))
+        self.pivot_rows_combo = QComboBox()
+        pivot_filter_layout.addWidget(self.pivot_rows_combo)
+        
+        pivot_filter_layout.addWidget(QLabel("Колонки:"))
+        self.pivot_columns_combo = QComboBox()
+        self.pivot_columns_combo.addItem("—", None)
+        pivot_filter_layout.addWidget(self.pivot_columns_combo)
+        for key, dimension in DIMENSIONS.items():
+            self.pivot_rows_combo.addItem(dimension.title, key)
+            self.pivot_columns_combo.addItem(dimension.title, key)
+        
+        pivot_filter_layout.addWidget(QLabel("Показатель:"))
+        self.pivot_measure_combo = QComboBox()
+        for key, measure in MEASURES.items():
+            self.pivot_measure_combo.addItem(measure.title, key)
+        pivot_filter_layout.addWidget(self.pivot_measure_combo)
+        
+        self.pivot_period_check = QCheckBox("ТО за период:")
+        pivot_filter_layout.addWidget(self.pivot_period_check)
+        self.pivot_start_edit = QDateEdit()
+        self.pivot_start_edit.setDisplayFormat("MM.yyyy")
+        self.pivot_start_edit.setDate(QDate(QDate.currentDate().year(), 1, 1))
+        pivot_filter_layout.addWidget(self.pivot_start_edit)
+        self.pivot_end_edit = QDateEdit()
+        self.pivot_end_edit.setDisplayFormat("MM.yyyy")
+        self.pivot_end_edit.setDate(QDate.currentDate())
+        pivot_filter_layout.addWidget(self.pivot_end_edit)
+        
+        self.pivot_refresh_btn = QPushButton("📊 Сформировать")
+        self.pivot_refresh_btn.setProperty("class", "action-button")
+        self.pivot_refresh_btn.clicked.connect(self.refresh_pivot)
+        pivot_filter_layout.addWidget(self.pivot_refresh_btn)
+        
+        self.pivot_export_btn = QPushButton("📤 Экспорт")
+        self.pivot_export_btn.setProperty("class", "secondary-button")
+        self.pivot_export_btn.clicked.connect(self.export_pivot)
+        pivot_filter_layout.addWidget(self.pivot_export_btn)
+        
+        pivot_filter_layout.addStretch()
+        pivot_filter_group.setLayout(pivot_filter_layout)
+        pivot_layout.addWidget(pivot_filter_group)
+        
+        self.pivot_summary_label = QLabel()
+        self.pivot_summary_label.setProperty("class", "stat-label")
+        pivot_layout.addWidget(self.pivot_summary_label)
+        
+        self.pivot_columns = []
+        self.pivot_model = RecordTableModel([], self)
+        self.pivot_table = QTableView()
+        self.pivot_table.setModel(self.pivot_model)
+        self.pivot_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.pivot_table.setAlternatingRowColors(True)
+        pivot_layout.addWidget(self.pivot_table)
+        
+        self.tabs.addTab(pivot_widget, "Сводный отчет")
+        
+        # Вкладка "Стоимость владения"
+        tco_widget = QWidget()
+        tco_layout = QVBoxLayout()
+        tco_widget.setLayout(tco_layout)
+        
+        tco_buttons_layout = QHBoxLayout()
+        tco_buttons_layout.addWidget(QLabel("Период амортизации:"))
+        self.tco_period_edit = QDateEdit()
+        self.tco_period_edit.setCalendarPopup(True)
+        self.tco_period_edit.setDisplayFormat("MM.yyyy")
+        self.tco_period_edit.setDate(QDate.currentDate())
+        tco_buttons_layout.addWidget(self.tco_period_edit)
+        
+        tco_buttons_layout.addWidget(QLabel("Инвентарный номер:"))
+        self.tco_inventory_edit = QLineEdit()
+        self.tco_inventory_edit.setPlaceholderText("все оборудование")
+        self.tco_inventory_edit.returnPressed.connect(self.refresh_tco)
+        tco_buttons_layout.addWidget(self.tco_inventory_edit)
+        
+        self.tco_refresh_btn = QPushButton("📊 Сформировать")
+        self.tco_refresh_btn.setProperty("class", "action-button")
+        self.tco_refresh_btn.clicked.connect(self.refresh_tco)
+        tco_buttons_layout.addWidget(self.tco_refresh_btn)
+        
+        self.tco_export_btn = QPushButton("📤 Экспорт")
+        self.tco_export_btn.setProperty("class", "secondary-button")
+        self.tco_export_btn.clicked.connect(self.export_tco)
+        tco_buttons_layout.addWidget(self.tco_export_btn)
+        
+        tco_buttons_layout.addStretch()
+        tco_layout.addLayout(tco_buttons_layout)
+        
+        self.tco_summary_label = QLabel()
+        self.tco_summary_label.setProperty("class", "stat-label")
+        tco_layout.addWidget(self.tco_summary_label)
+        
+        self.tco_model = RecordTableModel([], self)
+        self.tco_table = QTableView()
+        self.tco_table.setModel(self.tco_model)
+        self.tco_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.tco_table.setAlternatingRowColors(True)
+        self.tco_table.setSortingEnabled(True)
+        tco_layout.addWidget(self.tco_table)
+        
+        self.tabs.addTab(tco_widget, "Стоимость владения")
     
     def refresh_data(self):
-        """Обновить все отчеты"""
-        self.refresh_depreciation()
-        self.refresh_maintenance_cost()
-        self.refresh_maintenance_report()
+        """Обновить все отчеты: запросы выполняются параллельно в фоновом потоке,
+        одинаковые запросы разных вкладок - один раз
+        """
+        self._refresh_generation += 1
+        generation = self._refresh_generation
+        requests = self.report_requests()
+        self.summary_label.setText("⏳ Формирование отчетов...")
+        self.depreciation_summary_label.setText("⏳ Формирование отчетов...")
+        threading.Thread(target=self._run_reports, args=(generation, requests), daemon=True).start()
+    
+    def report_requests(self) -> dict:
+        """Запросы всех отчетов по текущим параметрам вкладок"""
+        period = self.depreciation_period()
+        cost_start, cost_end = self.cost_period()
+        report_start, report_end = self.report_period()
+        return {
+            'depreciation': (self.db.get_depreciation_report, (period,)),
+            'depreciation_period': (self.db.get_depreciation_period, (period,)),
+            'cost_page': (self.db.get_maintenance_report_page,
+                          (cost_start, cost_end, self.cost_offset)),
+            'report_page': (self.db.get_maintenance_report_page,
+                            (report_start, report_end, self.report_offset))
+        }
+    
+    def _run_reports(self, generation: int, requests: dict):
+        """Выполнить запросы отчетов (в фоновом потоке)"""
+        try:
+            # Месячные итоги пересчитываются заранее: параллельные запросы только читают базу
+            self.db.refresh_maintenance_monthly()
+            self.reports_loaded.emit(generation, self.orchestrator.run(requests))
+        except Exception as e:
+            # Любая ошибка фонового потока должна дойти до окна: иначе отчеты не обновятся
+            self.reports_failed.emit(generation, str(e))
+    
+    def on_reports_loaded(self, generation: int, results: dict):
+        """Показать результаты фонового формирования (устаревшие запуски пропускаются)"""
+        if generation != self._refresh_generation:
+            return
+        self.show_depreciation(results['depreciation'], results['depreciation_period'])
+        self.show_maintenance_cost(results['cost_page'])
+        self.show_maintenance_report(results['report_page'])
+    
+    def on_reports_failed(self, generation: int, message: str):
+        """Ошибка фонового формирования отчетов"""
+        if generation == self._refresh_generation:
+            self.summary_label.setText("")
+            self.depreciation_summary_label.setText("")
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сформировать отчеты: {message}")
+    
+    def depreciation_period(self) -> str:
+        """Выбранный период амортизации "ГГГГ-ММ" """
+        return self.depreciation_period_edit.date().toString("yyyy-MM")
+    
+    def cost_period(self):
+        """Выбранный период отчета по стоимости содержания"""
+        return (self.start_date_edit.date().toString(Qt.DateFormat.ISODate),
+                self.end_date_edit.date().toString(Qt.DateFormat.ISODate))
+    
+    def report_period(self):
+        """Выбранный период отчета по ТО"""
+        return (self.report_start_date_edit.date().toString(Qt.DateFormat.ISODate),
+                self.report_end_date_edit.date().toString(Qt.DateFormat.ISODate))
     
     def refresh_depreciation(self):
-        """Обновить отчет по амортизации"""
-        report_data = self.db.get_depreciation_report()
-        self.depreciation_table.setRowCount(len(report_data))
-        
-        for row, item in enumerate(report_data):
-            self.depreciation_table.setItem(row, 0, QTableWidgetItem(str(item['id'])))
-            self.depreciation_table.setItem(row, 1, QTableWidgetItem(item['inventory_number']))
-            self.depreciation_table.setItem(row, 2, QTableWidgetItem(item['name']))
-            self.depreciation_table.setItem(row, 3, QTableWidgetItem(item['category'] or ''))
-            self.depreciation_table.setItem(row, 4, QTableWidgetItem(item['purchase_date'] or ''))
-            # Форматирование цены покупки
-            price = item['purchase_price'] or '0'
-            try:
-                price_decimal = Decimal(str(price))
-                price_text = f"{price_decimal:,.2f} ₽".replace(',', ' ')
-            except:
-                price_text = f"{price} ₽" if price != '0' else "0.00 ₽"
-            price_item = QTableWidgetItem(price_text)
-            price_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.depreciation_table.setItem(row, 5, price_item)
-            
-            days = item.get('days_in_use', 0) or 0
-            self.depreciation_table.setItem(row, 6, QTableWidgetItem(str(days)))
-            
-            # Форматирование стоимости ТО
-            maintenance_cost = item.get('total_maintenance_cost', '0') or '0'
-            try:
-                cost_decimal = Decimal(str(maintenance_cost))
-                cost_text = f"{cost_decimal:,.2f} ₽".replace(',', ' ')
-            except:
-                cost_text = f"{maintenance_cost} ₽" if maintenance_cost != '0' else "0.00 ₽"
-            cost_item = QTableWidgetItem(cost_text)
-            cost_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.depreciation_table.setItem(row, 7, cost_item)
+        """Обновить отчет по амортизации на конец выбранного периода"""
+        period = self.depreciation_period()
+        self.show_depreciation(self.db.get_depreciation_report(period),
+                               self.db.get_depreciation_period(period))
+    
+    def show_depreciation(self, records, closed):
+        """Показать отчет по амортизации и итоги (closed - данные закрытого периода)"""
+        self.depreciation_model.set_records(records)
+        self.depreciation_close_btn.setEnabled(closed is None)
+        totals = closed or {
+            key: sum(record[key] or 0 for record in records)
+            for key in ('purchase_price', 'accumulated_depreciation', 'book_value',
+                        'monthly_depreciation')
+        }
+        state = f"🔒 Период закрыт {closed['closed_at']}" if closed else "Период открыт"
+        self.depreciation_summary_label.setText(
+            f"💰 Цена покупки: <b>{format_money(totals['purchase_price'])}</b> | "
+            f"📉 Накопленная амортизация: <b>{format_money(totals['accumulated_depreciation'])}</b> | "
+            f"📊 Остаточная стоимость: <b>{format_money(totals['book_value'])}</b> | "
+            f"📅 За месяц: <b>{format_money(totals['monthly_depreciation'])}</b> | {state}"
+        )
+    
+    def close_depreciation_period(self):
+        """Закрыть выбранный период: расчет сохраняется и больше не пересчитывается"""
+        period = self.depreciation_period()
+        reply = QMessageBox.question(
+            self, "Закрытие периода",
+            f"Закрыть период {self.depreciation_period_edit.date().toString('MM.yyyy')}? "
+            "Отчет за период будет сохранен и не будет меняться при изменении оборудования.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            self.db.close_depreciation_period(period)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+        self.refresh_depreciation()
     
     def refresh_maintenance_cost(self):
-        """Обновить отчет по стоимости содержания"""
-        start_date = self.start_date_edit.date().toString(Qt.DateFormat.ISODate)
-        end_date = self.end_date_edit.date().toString(Qt.DateFormat.ISODate)
-        
-        # Получаем сводную информацию
-        summary = self.db.get_maintenance_cost_report(start_date, end_date)
-        
-        total_cost = Decimal(summary.get('total_cost', 0) or 0)
-        avg_cost = Decimal(summary.get('avg_cost', 0) or 0)
-        total_count = summary.get('total_maintenances', 0) or 0
+        """Обновить отчет по стоимости содержания (с первой страницы)"""
+        self.load_cost_page(0)
+    
+    def load_cost_page(self, offset: int):
+        """Показать страницу отчета по стоимости содержания"""
+        start_date, end_date = self.cost_period()
+        self.show_maintenance_cost(self.db.get_maintenance_report_page(start_date, end_date, offset))
+    
+    def show_maintenance_cost(self, page):
+        """Показать итоги периода и страницу записей отчета по стоимости содержания"""
+        total_count = page['total_maintenances']
+        if page['offset'] and page['offset'] >= total_count:
+            # После удаления записей страница оказалась за концом отчета
+            return self.load_cost_page(
+                ReportPager.last_page_offset(total_count, page['limit']))
         
         self.summary_label.setText(
             f"📊 Всего обслуживаний: <b>{total_count}</b> | "
-            f"💰 Общая стоимость: <b>{total_cost:,.2f} ₽</b> | "
-            f"📈 Средняя стоимость: <b>{avg_cost:,.2f} ₽</b>".replace(',', ' ')
+            f"💰 Общая стоимость: <b>{format_money(page['total_cost'])}</b> | "
+            f"📈 Средняя стоимость: <b>{format_money(page['avg_cost'])}</b> | "
+            f"↕ Мин./макс.: <b>{format_money(page['min_cost'])}</b> / "
+            f"<b>{format_money(page['max_cost'])}</b>"
         )
         
-        # Получаем детальный отчет
-        report_data = self.db.get_maintenance_report(start_date, end_date)
-        self.maintenance_cost_table.setRowCount(len(report_data))
-        
-        for row, item in enumerate(report_data):
-            self.maintenance_cost_table.setItem(row, 0, QTableWidgetItem(str(item['id'])))
-            equipment_text = f"{item.get('inventory_number', '')} - {item.get('name', '')}"
-            self.maintenance_cost_table.setItem(row, 1, QTableWidgetItem(equipment_text))
-            self.maintenance_cost_table.setItem(row, 2, QTableWidgetItem(item['maintenance_date']))
-            self.maintenance_cost_table.setItem(row, 3, QTableWidgetItem(item['type']))
-            
-            # Форматирование стоимости
-            cost = item.get('cost', '0') or '0'
-            try:
-                cost_decimal = Decimal(str(cost))
-                cost_text = f"{cost_decimal:,.2f} ₽".replace(',', ' ')
-            except:
-                cost_text = f"{cost} ₽" if cost != '0' else "0.00 ₽"
-            cost_item = QTableWidgetItem(cost_text)
-            cost_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.maintenance_cost_table.setItem(row, 4, cost_item)
-            description = item.get('description', '') or ''
-            self.maintenance_cost_table.setItem(row, 5, QTableWidgetItem(description[:50] + '...' if len(description) > 50 else description))
+        self.maintenance_cost_model.set_records(page['rows'])
+        self.cost_offset = page['offset']
+        self.cost_pager.set_page(page['offset'], page['limit'], total_count)
     
     def refresh_maintenance_report(self):
-        """Обновить отчет по техническому обслуживанию (оптимизировано для < 5 сек)"""
-        start_date = self.report_start_date_edit.date().toString(Qt.DateFormat.ISODate)
-        end_date = self.report_end_date_edit.date().toString(Qt.DateFormat.ISODate)
-        
-        report_data = self.db.get_maintenance_report(start_date, end_date)
-        self.maintenance_report_table.setRowCount(len(report_data))
-        
-        for row, item in enumerate(report_data):
-            self.maintenance_report_table.setItem(row, 0, QTableWidgetItem(str(item['id'])))
-            equipment_text = f"{item.get('inventory_number', '')} - {item.get('name', '')}"
-            self.maintenance_report_table.setItem(row, 1, QTableWidgetItem(equipment_text))
-            self.maintenance_report_table.setItem(row, 2, QTableWidgetItem(item['maintenance_date']))
-            self.maintenance_report_table.setItem(row, 3, QTableWidgetItem(item['type']))
-            
-            # Форматирование стоимости
-            cost = item.get('cost', '0') or '0'
-            try:
-                cost_decimal = Decimal(str(cost))
-                cost_text = f"{cost_decimal:,.2f} ₽".replace(',', ' ')
-            except:
-                cost_text = f"{cost} ₽" if cost != '0' else "0.00 ₽"
-            cost_item = QTableWidgetItem(cost_text)
-            cost_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.maintenance_report_table.setItem(row, 4, cost_item)
-            description = item.get('description', '') or ''
-            self.maintenance_report_table.setItem(row, 5, QTableWidgetItem(description[:50] + '...' if len(description) > 50 else description))
+        """Обновить отчет по техническому обслуживанию (с первой страницы)"""
+        self.load_report_page(0)
+    
+    def load_report_page(self, offset: int):
+        """Показать страницу отчета по техническому обслуживанию"""
+        start_date, end_date = self.report_period()
+        self.show_maintenance_report(self.db.get_maintenance_report_page(start_date, end_date, offset))
+    
+    def show_maintenance_report(self, page):
+        """Показать итоги периода и страницу записей отчета по ТО"""
+        total_count = page['total_maintenances']
+        if page['offset'] and page['offset'] >= total_count:
+            return self.load_report_page(
+                ReportPager.last_page_offset(total_count, page['limit']))
+        
+        self.report_summary_label.setText(
+            f"📊 Всего обслуживаний: <b>{total_count}</b> | "
+            f"💰 Общая стоимость: <b>{format_money(page['total_cost'])}</b>"
+        )
+        self.maintenance_report_model.set_records(page['rows'])
+        self.report_offset = page['offset']
+        self.report_pager.set_page(page['offset'], page['limit'], total_count)
+    
+    def refresh_forecast(self):
+        """Рассчитать прогноз ТО и затрат по месяцам, категориям и отделам.
+        Считается по кнопке, а не при каждом обновлении отчетов
+        """
+        forecast = MaintenanceForecast(
+            self.db.get_rule_resolver(),
+            years=self.forecast_years_spinbox.value()
+        ).run(self.db.get_forecast_inputs(), self.db.get_maintenance_cost_averages())
+        
+        self.forecast_summary_label.setText(
+            f"🔧 Обслуживаний по прогнозу: <b>{forecast.total_count}</b> | "
+            f"💰 Ожидаемые затраты: <b>{format_money(round(forecast.total_cost, 2))}</b>"
+        )
+        self.forecast_model.set_records(forecast.rows())
+    
+    def stream_export(self, default_name: str, rows_factory, columns, total: int = None):
+        """Экспорт записей из базы данных в Excel или CSV в фоновом потоке, минуя таблицу"""
+        filename = ExportManager.get_export_filename(self, default_name, excel=True)
+        if not filename:
+            return
+        try:
+            count = ExportManager.stream_to_file(self, rows_factory, columns, filename, total)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось экспортировать отчет: {e}")
+            return
+        if count is not None:
+            QMessageBox.information(self, "Успех",
+                                    f"Отчет экспортирован в {filename} (строк: {count})")
     
     def export_depreciation(self):
-        """Экспорт отчета по амортизации в CSV"""
-        filename = ExportManager.get_export_filename(self, "depreciation_report")
-        if filename:
-            if ExportManager.export_table_to_csv(self.depreciation_table, filename):
-                QMessageBox.information(self, "Успех", f"Отчет экспортирован в {filename}")
-            else:
-                QMessageBox.warning(self, "Ошибка", "Не удалось экспортировать отчет")
+        """Экспорт отчета по амортизации"""
+        period = self.depreciation_period()
+        self.stream_export("depreciation_report",
+                           lambda: self.db.iter_depreciation_report(period),
+                           DEPRECIATION_EXPORT_COLUMNS)
     
     def export_maintenance_cost(self):
-        """Экспорт отчета по стоимости содержания в CSV"""
-        filename = ExportManager.get_export_filename(self, "maintenance_cost_report")
-        if filename:
-            if ExportManager.export_table_to_csv(self.maintenance_cost_table, filename):
-                QMessageBox.information(self, "Успех", f"Отчет экспортирован в {filename}")
-            else:
-                QMessageBox.warning(self, "Ошибка", "Не удалось экспортировать отчет")
+        """Экспорт отчета по стоимости содержания"""
+        start_date, end_date = self.cost_period()
+        self.stream_export("maintenance_cost_report",
+                           lambda: self.db.iter_maintenance_report(start_date, end_date),
+                           MAINTENANCE_EXPORT_COLUMNS,
+                           self.db.count_maintenance_report(start_date, end_date))
     
     def export_maintenance_report(self):
-        """Экспорт отчета по ТО в CSV"""
-        filename = ExportManager.get_export_filename(self, "maintenance_report")
+        """Экспорт отчета по ТО"""
+        start_date, end_date = self.report_period()
+        self.stream_export("maintenance_report",
+                           lambda: self.db.iter_maintenance_report(start_date, end_date),
+                           MAINTENANCE_EXPORT_COLUMNS,
+                           self.db.count_maintenance_report(start_date, end_date))
+    
+    def refresh_pivot(self):
+        """Сформировать сводный отчет по выбранным измерениям и показателю.
+        Считается по кнопке, как и прогноз
+        """
+        row_dimension = self.pivot_rows_combo.currentData()
+        column_dimension = self.pivot_columns_combo.currentData()
+        if column_dimension == row_dimension:
+            column_dimension = None
+        measure = self.pivot_measure_combo.currentData()
+        start_month = end_month = None
+        if self.pivot_period_check.isChecked():
+            start_month = self.pivot_start_edit.date().toString("yyyy-MM")
+            end_month = self.pivot_end_edit.date().toString("yyyy-MM")
+        dimensions = [row_dimension] + ([column_dimension] if column_dimension else [])
+        try:
+            records = self.db.get_pivot_report(dimensions, [measure], start_month, end_month)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+        
+        self.pivot_columns, rows = pivot_table(records, [row_dimension], column_dimension, measure)
+        self.pivot_model = RecordTableModel(
+            [Column(title, key, kind) for title, key, kind in self.pivot_columns], self
+        )
+        self.pivot_model.set_records(rows)
+        self.pivot_table.setModel(self.pivot_model)
+        summary = f"📊 Строк: <b>{len(rows)}</b>"
+        if MEASURES[measure].additive:
+            total = sum(record[measure] or 0 for record in records)
+            shown = format_money(total) if MEASURES[measure].kind == 'money' else total
+            summary += f" | {MEASURES[measure].title}, всего: <b>{shown}</b>"
+        self.pivot_summary_label.setText(summary)
+    
+    def export_pivot(self):
+        """Экспорт сводного отчета в том виде, в каком он показан"""
+        if not self.pivot_columns:
+            QMessageBox.information(self, "Экспорт", "Сначала сформируйте сводный отчет")
+            return
+        rows = self.pivot_model.records()
+        self.stream_export("pivot_report", lambda: iter(rows), self.pivot_columns, len(rows))
+    
+    def tco_inventory_number(self):
+        """Инвентарный номер для отчета о стоимости владения (None - все оборудование)"""
+        return self.tco_inventory_edit.text().strip() or None
+    
+    def refresh_tco(self):
+        """Сформировать отчет о стоимости владения: цена покупки, амортизация,
+        затраты на ТО по типам и дни использования по отделам.
+        Считается по кнопке, как и прогноз
+        """
+        report = self.db.get_tco_report(self.tco_period_edit.date().toString("yyyy-MM"))
+        rows = list(self.db.iter_tco_report(report, self.tco_inventory_number()))
+        self.tco_model = RecordTableModel(
+            [Column(title, key, kind) for title, key, kind in report.columns()], self
+        )
+        self.tco_model.set_records(rows)
+        self.tco_table.setModel(self.tco_model)
+        
+        totals = report.totals(rows)
+        self.tco_summary_label.setText(
+            f"📦 Оборудования: <b>{totals['equipment_count']}</b> | "
+            f"💰 Цена покупки: <b>{format_money(round(totals['purchase_price'], 2))}</b> | "
+            f"🔧 Стоимость ТО: <b>{format_money(round(totals['maintenance_cost'], 2))}</b> | "
+            f"📊 Стоимость владения: "
+            f"<b>{format_money(round(totals['total_cost_of_ownership'], 2))}</b> | "
+            f"📉 Затраты на дату: <b>{format_money(round(totals['consumed_cost'], 2))}</b>"
+        )
+    
+    def export_tco(self):
+        """Экспорт отчета о стоимости владения потоком, без построения таблицы"""
+        report = self.db.get_tco_report(self.tco_period_edit.date().toString("yyyy-MM"))
+        inventory_number = self.tco_inventory_number()
+        self.stream_export("tco_report",
+                           lambda: self.db.iter_tco_report(report, inventory_number),
+                           report.columns())
+    
+    def export_forecast(self):
+        """Экспорт прогноза ТО в CSV"""
+        filename = ExportManager.get_export_filename(self, "maintenance_forecast")
         if filename:
-            if ExportManager.export_table_to_csv(self.maintenance_report_table, filename):
-                QMessageBox.information(self, "Успех", f"Отчет экспортирован в {filename}")
+            if ExportManager.export_table_to_csv(self.forecast_table, filename):
+                QMessageBox.information(self, "Успех", f"Прогноз экспортирован в {filename}")
             else:
-                QMessageBox.warning(self, "Ошибка", "Не удалось экспортировать отчет")
+                QMessageBox.warning(self, "Ошибка", "Не удалось экспортировать прогноз")